@@ -0,0 +1,11 @@
+# AutoVOT as a library: measure VOTs with the AutoVOT programs from already-loaded audio.
+
+from .helpers.decoder import decode, decode_tiers, tier_windows, load_model, autovot_tier, VotModel, Measurement
+from .helpers.instances import TierDefinitions
+from .helpers.models import get_model, resolve_model, compile_model, list_models
+from .helpers.featurecache import FeatureCache, feature_cache
+from .helpers.featurestore import FeatureStore, open_store, write_store
+from .helpers.audio import Resampler, SparseAudio, prefetch_spans, read_spans, resample_wav, wav_info, write_wav
+from .helpers.binaries import find_binary
+from .helpers.frontend import front_end_span
+from .helpers.results import Results, ResultsWriter, Token, read_results
@@ -34,6 +34,11 @@ import csv
 import numpy as np
 
 from auto_vot_extract_features import *
+from helpers.binaries import *
+from helpers.decoder import *
+from helpers.featurecache import *
+from helpers.featurestore import *
+from helpers.models import *
 from helpers.utilities import *
 from helpers.textgrid import *
 
@@ -74,9 +79,15 @@ if __name__ == "__main__":
                                                         'already exists (default: don\'t do so)',
                         action='store_const', const=True, default=False)
     parser.add_argument('--csv_file', help='Write a CSV file with this name with one row per predicited VOT, '
-                                           'with columns for the prediction and the confidence of the prediction'
-                                           ' (default: don\'t do this)', default='')
-
+                                           'with columns for the prediction, the confidence of the prediction and '
+                                           'whether the stop is prevoiced (default: don\'t do this)', default='')
+
+    parser.add_argument('--feature_cache', default='', help='Directory of a persistent cache of acoustic features, '
+                                                            'so that VotFrontEnd2 does not run again on the windows '
+                                                            'seen in an earlier run (default: no cache)')
+    parser.add_argument('--feature_cache_size', default=1024, type=int, help='Maximum size of the feature cache in MB; '
+                                                                             'the least recently used windows are '
+                                                                             'removed beyond it (default: %(default)s)')
     parser.add_argument("--logging_level", help="Level of verbosity of information printed out by this program ("
                                                 "DEBUG, INFO, WARNING or ERROR), in order of increasing verbosity. "
                                                 "See http://docs.python.org/2/howto/logging for definitions. ("
@@ -85,6 +96,8 @@ if __name__ == "__main__":
 
     logging_defaults(args.logging_level)
 
+    cache = feature_cache(args.feature_cache, args.feature_cache_size)
+
     # extract tier definitions
     tier_definitions = TierDefinitions()
     args.window_min /= 1000.0   # convert msec to seconds
@@ -119,19 +132,21 @@ if __name__ == "__main__":
         textgrid_files = f.readlines()
         f.close()
 
+    model_filename = resolve_model(args.model_filename)
+
     problematic_files = list()
 
     out_file = None
     if args.csv_file:
         try:
-            csv_file = open(args.csv_file, 'wb')
+            csv_file = open(args.csv_file, 'w', newline='')
             out_file = csv.writer(csv_file)
-        except:
-            logging.warning("Couldn't open %s for writing. CSV file not being written." % args.csv_name)
+        except OSError:
+            logging.warning("Couldn't open %s for writing. CSV file not being written." % args.csv_file)
             out_file = None
 
     if out_file:
-        out_file.writerow(['wav_file', 'time', 'vot', 'confidence'])
+        out_file.writerow(['wav_file', 'time', 'vot', 'confidence', 'prevoiced'])
 
     # run over files
     for wav_file, textgrid_file in zip(wav_files, textgrid_files):
@@ -169,78 +184,34 @@ if __name__ == "__main__":
         logging.debug("%s, %s" % (textgrid_list, wav_list))
         logging.debug("%s" % input_filename)
 
-        # call front end (extract features)
+        # prepare the front end
         problematic_file = textgrid2front_end(textgrid_list, wav_list, input_filename, features_filename,
                                          features_dir, tier_definitions, decoding=True)
         if len(problematic_file):
             problematic_files += problematic_file
             continue
         
-        cmd_vot_front_end = 'VotFrontEnd2 -verbose %s %s %s %s' % (args.logging_level, input_filename, features_filename,
-                                                                   labels_filename)
-        easy_call(cmd_vot_front_end)
+        windows = read_input_file(input_filename)
+        # call front end (extract features), on the windows the feature cache does not hold
+        if cache is not None:
+            cached_front_end(input_filename, features_filename, labels_filename, cache, args.logging_level)
+        else:
+            binary_call(FRONT_END, [input_filename, features_filename, labels_filename], args.logging_level)
 
         # decoding (i.e., generate VOT predictions)
-        cmd_vot_decode = 'VotDecode -verbose %s -max_onset 200 -min_vot_length %d -max_vot_length %d ' \
-                         '-output_predictions %s %s %s %s' % (args.logging_level, args.min_vot_length,
-                                                              args.max_vot_length, preds_filename, features_filename,
-                                                              labels_filename, args.model_filename)
-        easy_call(cmd_vot_decode)
+        binary_call(DECODER, ['-max_onset', MAX_ONSET, '-min_vot_length', args.min_vot_length, '-max_vot_length',
+                              args.max_vot_length, '-output_predictions', preds_filename, features_filename,
+                              labels_filename, model_filename], args.logging_level)
+        features_list = read_feature_files([line.strip() for line in open(features_filename) if line.strip()])
+        vot_predictions = read_predictions(preds_filename)
 
         # convert decoding back to TextGrid
-        xmin_proc_win = list()
-        xmax_proc_win = list()
-        for line in open(input_filename):
-            items = line.strip().split()
-            xmin_proc_win.append(float(items[1]))
-            xmax_proc_win.append(float(items[2]))
-
-        # convert decoding back to TextGrid. first generate list of xmin, xmax and mark
-        xmin_preds = list()
-        xmax_preds = list()
-        mark_preds = list()
-        k = 0
-        feature_filelist = [line.strip() for line in open(features_filename)]
-        vot_predictions = [line.strip() for line in open(preds_filename)]
-        for feature_filename, vot_prediction in zip(feature_filelist, vot_predictions):
-            (confidence, xmin, xmax) = vot_prediction.split()
-            xmin = float(xmin)
-            xmax = float(xmax)
-            # check pre-voicing
-            features = np.loadtxt(feature_filename.rstrip(), skiprows=1)
-            rapt_voicing_feature = features[:, 7]
-            converted_rapt_voicing = np.where(rapt_voicing_feature < 0.01, -1, 1)
-            prevoicing_decision = np.mean(converted_rapt_voicing[int(xmin):int(xmax)]) > 0
-            if xmin < xmax:  # positive VOT
-                xmin_preds.append(xmin_proc_win[k] + xmin/1000)
-                xmax_preds.append(xmin_proc_win[k] + xmax/1000)
-                if prevoicing_decision:
-                    mark_preds.append("-"+confidence)
-                else:
-                    mark_preds.append(confidence)
-            else:  # negative VOT
-                xmin_preds.append(xmin_proc_win[k] + xmax/1000)
-                xmax_preds.append(xmin_proc_win[k] + xmin/1000)
-                mark_preds.append("neg " + confidence)
-            k += 1
+        vot_measurements = measurements(windows, features_list, vot_predictions)
 
         # add "AutoVOT" tier to textgrid_filename
         textgrid = TextGrid()
         textgrid.read(textgrid_file)
-        auto_vot_tier = IntervalTier(name='AutoVOT', xmin=textgrid.xmin(), xmax=textgrid.xmax())
-        auto_vot_tier.append(Interval(textgrid.xmin(), xmin_preds[0], ''))
-        # print textgrid.xmin(), xmin_preds[0], ''
-        for i in range(len(xmin_preds) - 1):
-            ## instead of mark_preds[i] (confidence number), just put 'pred' in the interval
-            auto_vot_tier.append(Interval(xmin_preds[i], xmax_preds[i], 'pred'))
-            # print xmin_preds[i], xmax_preds[i], mark_preds[i]
-            auto_vot_tier.append(Interval(xmax_preds[i], xmin_preds[i + 1], ''))
-            # print xmax_preds[i], xmin_preds[i+1], ''
-        ## instead of mark_preds[i] (confidence number), just put 'pred' in the interval
-        auto_vot_tier.append(Interval(xmin_preds[-1], xmax_preds[-1], 'pred'))
-        # print xmin_preds[-1], xmax_preds[-1], mark_preds[-1]
-        auto_vot_tier.append(Interval(xmax_preds[-1], textgrid.xmax(), ''))
-        # print xmax_preds[-1], textgrid.xmax(), ''
+        auto_vot_tier = autovot_tier(vot_measurements, textgrid.xmin(), textgrid.xmax())
 
         ## check if target textgrid already has a tier named
         ## "AutoVOT", modulo preceding or trailing spaces or case. If
@@ -265,11 +236,13 @@ if __name__ == "__main__":
             shutil.rmtree(path=working_dir, ignore_errors=True)
 
         if out_file:
-            for i in xrange(len(xmin_preds) - 1):
-                vot, conf = xmax_preds[i] - xmin_preds[i], mark_preds[i]
-                out_file.writerow([wav_file, str(xmin_preds[i]), str(vot), str(conf)])
-            vot, conf = xmax_preds[-1] - xmin_preds[-1], mark_preds[-1]
-            out_file.writerow([wav_file, str(xmin_preds[-1]), str(vot), str(conf)])
+            for measurement in vot_measurements:
+                if measurement.mark.startswith('neg'):  # from the onset of voicing to the burst
+                    time, vot, prevoiced = measurement.xmax, measurement.xmin - measurement.xmax, True
+                else:
+                    time, vot, prevoiced = measurement.xmin, measurement.xmax - measurement.xmin, measurement.prevoiced
+                out_file.writerow([wav_file, '%.3f' % time, '%.3f' % vot, '%f' % measurement.confidence,
+                                   int(prevoiced)])
             
     if out_file:
         csv_file.close()
@@ -27,7 +27,12 @@
 # (abs(predicted - labeled VOT)) when done.
 
 import argparse
+import shutil
+import tempfile
 
+from helpers.binaries import *
+from helpers.featurestore import *
+from helpers.models import *
 from helpers.utilities import *
 
 
@@ -46,8 +51,9 @@ if __name__ == "__main__":
     args = parser.parse_args()
     logging_defaults(args.logging_level)
 
-    # decoding
-    cmd_vot_decode = 'VotDecode -final_results -verbose %s -pos_only %s %s %s' % (args.logging_level,
-                                                                             args.features_filename,
-                                                                          args.labels_filename, args.model_filename)
-    easy_call(cmd_vot_decode)
+    # decoding: VotDecode reads text feature files, so the windows of feature stores are written back to text files
+    working_dir = tempfile.mkdtemp()
+    features_filename = text_feature_list(args.features_filename, working_dir)
+    binary_call(DECODER, ['-final_results', '-pos_only', features_filename, args.labels_filename,
+                          resolve_model(args.model_filename)], args.logging_level)
+    shutil.rmtree(working_dir, ignore_errors=True)
@@ -25,82 +25,16 @@
 import argparse
 from os.path import splitext, basename, isfile
 
+from helpers.binaries import *
+from helpers.frontend import *
+from helpers.featurestore import *
+from helpers.instances import *
 from helpers.textgrid import *
 from helpers.utilities import *
 
 
-class Instance:
-    def __init__(self):
-        self.wav_filename = ""
-        self.window_min = 0
-        self.window_max = 0
-        self.vot_min = 0
-        self.vot_max = 0
-
-    def set(self, wav_filename, window_min, window_max, vot_min, vot_max):
-        self.wav_filename = wav_filename
-        self.window_min = window_min
-        self.window_max = window_max
-        self.vot_min = vot_min
-        self.vot_max = vot_max
-
-    def __str__(self):
-        return '"%s" %.3f %.3f %.3f %.3f [seconds]\n' % (self.wav_filename, self.window_min, self.window_max,
-                                                         self.vot_min, self.vot_max)
-        ## the following lines refer to the old VotFrontEnd (that cannot deal with WAV file names that have spaces in
-        ## their names:
-        ##return '%s %d %d %d %d\n' % (self.wav_filename, int(16000*self.window_min), int(16000*self.window_max),
-        ##                             int(16000*self.vot_min), int(16000*self.vot_max))
-
-
-class TierDefinitions:
-    def __init__(self):
-        self.vot_tier = ''
-        self.vot_mark = '*'
-        self.window_tier = ''
-        self.window_mark = '*'
-        self.window_min = 0
-        self.window_max = 0
-        self.max_num_instances = -1
-
-    def extract_definition(self, args):
-        try:
-            self.vot_tier = args.vot_tier
-        except:
-            pass
-        try:
-            self.vot_mark = args.vot_mark
-        except:
-            pass
-        try:
-            self.window_tier = args.window_tier
-        except:
-            pass
-        try:
-            self.window_mark = args.window_mark
-        except:
-            pass
-        try:
-            self.window_min = args.window_min
-        except:
-            pass
-        try:
-            self.window_max = args.window_max
-        except:
-            pass
-        try:
-            self.max_num_instances = args.max_num_instances
-        except:
-            pass
-
-    def __str__(self):
-        return "vot tier=%s mark=%s  window tier=%s mark=%s min=%d max=%d  max_num_instances=%d" % \
-               (self.vot_tier, self.vot_mark, self.window_tier, self.window_mark, self.window_min, self.window_max,
-                self.max_num_instances)
-
-
 def textgrid2front_end(textgrid_list, wav_list, input_filename, features_filename, features_dir, definitions,
-                       decoding=False):
+                       decoding=False, feature_store=False):
     problematic_files = list()
 
     # check if files exists
@@ -154,80 +88,13 @@ def textgrid2front_end(textgrid_list, wav_list, input_filename, features_filenam
         # read TextGrid
         textgrid.read(textgrid_filename)
 
-        # extract tier names
-        tier_names = textgrid.tierNames()
-
-        instances = list()
-
         if definitions.window_tier == "" and definitions.vot_tier == "":
             logging.error("Either --window_tier or --vot_tier should be given.")
             exit(-1)
 
-        # check if the VOT tier is one of the tiers in the TextGrid
-        if definitions.vot_tier in tier_names:
-            tier_index = tier_names.index(definitions.vot_tier)
-            # run over all intervals in the tier
-            for interval in textgrid[tier_index]:
-                if (definitions.vot_mark == "*" and re.search(r'\S', interval.mark())) \
-                        or (interval.mark() == definitions.vot_mark):
-                    window_min = max(interval.xmin() + definitions.window_min, 0)
-                    window_max = min(min(interval.xmax() + definitions.window_max, textgrid.xmax()), wav_duration)
-                    new_instance = Instance()
-                    new_instance.set(wav_filename, window_min, window_max, interval.xmin(), interval.xmax())
-                    instances.append(new_instance)
-            # check if the given mark was ever found
-            if not instances:
-                logging.warning("The mark '%s' has not found in tier '%s' of %s" % (definitions.vot_mark,
-                                                                                    definitions.vot_tier,
-                                                                                    textgrid_filename))
-                problematic_files.append(textgrid_filename)
-                continue
-
-            # if the window tier is empty and not decoding, fix window information
-            if definitions.window_tier == "":
-                logging.debug("--window_tier and --window_mark were not given - using defaults.")
-                for i in range(1, len(instances) - 1):
-                    # check if window_min is less than the previous vot_max
-                    if instances[i].window_min < instances[i - 1].vot_max:
-                        instances[i].window_min = max(instances[i].vot_min - 0.02, instances[i - 1].vot_max + 0.02)
-                    # check if window_max is greater than the next vot_min
-                    if instances[i].window_max > instances[i + 1].vot_min:
-                        instances[i].window_max = min(instances[i].vot_max + 0.02, instances[i + 1].vot_min - 0.02)
-                    # check for consistency
-                    if instances[i].window_min > instances[i].vot_min \
-                            or instances[i].vot_min > instances[i].window_max \
-                            or instances[i].window_min > instances[i].vot_max \
-                            or instances[i].window_max < instances[i].vot_max:
-                        logging.error("Something wrong in the TextGrid VOT tier: %s" % instances[i])
-                        problematic_files.append(textgrid_filename)
-
-        elif definitions.vot_tier != "":
-            logging.error("The VOT tier '%s' has not found in %s" % (definitions.vot_tier, textgrid_filename))
-            problematic_files.append(textgrid_filename)
-            continue
-
-        # check if the window tier is one of the tiers in the TextGrid
-        if definitions.window_tier in tier_names:
-            tier_index = tier_names.index(definitions.window_tier)
-            # run over all intervals in the tier
-            for interval in textgrid[tier_index]:
-                if (definitions.window_mark == "*" and re.search(r'\S', interval.mark())) \
-                        or (interval.mark() == definitions.window_mark):
-                    window_min = interval.xmin()
-                    window_max = interval.xmax()
-                    new_instance = Instance()
-                    new_instance.set(wav_filename, window_min, window_max, window_min, window_max)
-                    instances.append(new_instance)
-            # check if the given mark was ever found
-            if not instances:
-                logging.warning("The mark '%s' has not found in tier '%s' of %s" % (definitions.window_mark,
-                                                                                    definitions.window_tier,
-                                                                                    textgrid_filename))
-                problematic_files.append(textgrid_filename)
-                continue
-        elif definitions.window_tier != "":
-            logging.error("The window tier '%s' has not found in %s" % (definitions.window_tier, textgrid_filename))
-            problematic_files.append(textgrid_filename)
+        instances = textgrid_instances(textgrid, definitions, wav_filename, wav_duration, textgrid_filename,
+                                       problematic_files)
+        if instances is None:
             continue
 
         # write out the information
@@ -237,7 +104,12 @@ def textgrid2front_end(textgrid_list, wav_list, input_filename, features_filenam
             if max_num_instances > 0 and num_instances >= max_num_instances:
                 break
             my_basename = splitext(basename(textgrid_filename))[0]
-            feature_line = '%s/%s_%.3f.txt\n' % (features_dir, my_basename, instance.window_min)
+            if feature_store:
+                # all the windows of a recording go to one feature store
+                store_filename = '%s/%s%s' % (features_dir, my_basename, STORE_SUFFIX)
+                feature_line = store_entry(store_filename, num_instances) + '\n'
+            else:
+                feature_line = '%s/%s_%.3f.txt\n' % (features_dir, my_basename, instance.window_min)
             input_file.write(str(instance))
             feature_file.write(feature_line)
             num_instances += 1
@@ -288,6 +160,10 @@ if __name__ == "__main__":
                         'boundary. (default: %(default)s)', default=800, type=float)
     parser.add_argument('--max_num_instances',help='Maximum number of instances per file to use '
                                                    '(default: use everything)', default=0, type=int)
+    parser.add_argument('--feature_store', help='Pack the features of all the windows of each recording into one '
+                                                'feature store (features_dir/<recording>.npy and its index), '
+                                                'instead of a text feature file per window. The other AutoVOT '
+                                                'scripts read both', action='store_true', default=False)
     parser.add_argument("--logging_level", help="Level of verbosity of information printed out by this program ("
                                                 "DEBUG, INFO, WARNING or ERROR), in order of increasing verbosity. "
                                                 "See http://docs.python.org/2/howto/logging for definitions. ("
@@ -306,12 +182,14 @@ if __name__ == "__main__":
 
     # prepare files for front end
     problematic_files = textgrid2front_end(args.textgrid_list, args.wav_list, args.input_filename,
-                                           args.features_filename, args.features_dir, tier_definitions, args.decoding)
+                                           args.features_filename, args.features_dir, tier_definitions, args.decoding,
+                                           args.feature_store)
 
     # call front end
-    cmd_vot_front_end = 'VotFrontEnd2 -verbose %s %s %s %s' % (args.logging_level, args.input_filename,
-                                                               args.features_filename, args.labels_filename)
-    easy_call(cmd_vot_front_end)
+    if args.feature_store:
+        store_front_end(args.input_filename, args.features_filename, args.labels_filename, args.logging_level)
+    else:
+        binary_call(FRONT_END, [args.input_filename, args.features_filename, args.labels_filename], args.logging_level)
 
     if len(problematic_files):
         logging.warning("Features extracted for all files except these ones, where something was wrong:")
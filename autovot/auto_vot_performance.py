@@ -26,11 +26,6 @@
 
 import argparse, os, csv
 import numpy as np
-import scipy.stats
-
-corr2 = scipy.stats.spearmanr
-corr1 = scipy.stats.pearsonr
-
 
 from helpers.textgrid import *
 from helpers.utilities import *
@@ -153,6 +148,10 @@ if __name__ == "__main__":
     print "- predicted VOTs: '%s' tier in %s" % (args.predicted_vot_tier, predF)
 
     ## performance measure 1
+    import scipy.stats # only needed here, so that --help does not load scipy
+    corr1 = scipy.stats.pearsonr
+    corr2 = scipy.stats.spearmanr
+
     print
     print "Correlations (Pearson/Spearman) between predicted/labeled:"
     print "-------------"
@@ -89,9 +89,7 @@ if __name__ == "__main__":
                                            features_dir, tier_definitions)
 
     # call front end
-    cmd_vot_front_end = 'VotFrontEnd2 -verbose %s %s %s %s' % (args.logging_level, input_filename, features_filename,
-                                                               labels_filename)
-    easy_call(cmd_vot_front_end)
+    binary_call(FRONT_END, [input_filename, features_filename, labels_filename], args.logging_level)
 
     # Randomize training order of the examples.  We assume the user wants to do this, as it tends to result in better classifiers.
     features_filename_rs = features_filename + ".rs"
@@ -119,13 +117,11 @@ if __name__ == "__main__":
         labels_filename_test = labels_filename_rs + ".test"
         extract_lines(labels_filename_rs, labels_filename_test, instance_range_for_test, has_header=True)
         # Training
-        cmd_vot_training = 'VotTrain -verbose %s -pos_only -vot_loss -epochs 2 -loss_eps 4 -min_vot_length 5 %s %s %s' % \
-            (args.logging_level, features_filename_training, labels_filename_training, args.model_filename)
-        easy_call(cmd_vot_training)
+        binary_call(TRAINER, ['-pos_only', '-vot_loss', '-epochs', 2, '-loss_eps', 4, '-min_vot_length', 5,
+                              features_filename_training, labels_filename_training, args.model_filename],
+                    args.logging_level)
         # Testing
-        cmd_vot_decode = 'VotDecode -verbose %s %s %s %s' % (args.logging_level, features_filename_test,
-            labels_filename_test, args.model_filename)
-        easy_call(cmd_vot_decode)
+        binary_call(DECODER, [features_filename_test, labels_filename_test, args.model_filename], args.logging_level)
 
     ## Option 2: Otherwise, if the user specified data to be used for cross-validation, use that.
     elif args.cv_textgrid_list != '':
@@ -139,28 +135,22 @@ if __name__ == "__main__":
         problematic_files += textgrid2front_end(args.cv_textgrid_list, args.cv_wav_list, input_filename_test,
                                                 features_filename_test, features_dir, tier_definitions)
         # call front end
-        cmd_vot_front_end = 'VotFrontEnd2 -verbose %s %s %s %s' % (args.logging_level, input_filename_test,
-            features_filename_test, labels_filename_test)
-        easy_call(cmd_vot_front_end)
+        binary_call(FRONT_END, [input_filename_test, features_filename_test, labels_filename_test], args.logging_level)
         # Training
-        cmd_vot_training = 'VotTrain -verbose %s -pos_only -vot_loss -epochs 2 -loss_eps 4 -min_vot_length 5 ' \
-                           '- C 50 %s %s %s' % (args.logging_level, features_filename_training,
-                                                labels_filename_training, args.model_filename)
-        easy_call(cmd_vot_training)
+        binary_call(TRAINER, ['-pos_only', '-vot_loss', '-epochs', 2, '-loss_eps', 4, '-min_vot_length', 5, '-C', 50,
+                              features_filename_training, labels_filename_training, args.model_filename],
+                    args.logging_level)
         # Test
-        cmd_vot_decode = 'VotDecode -verbose %s %s %s %s' % (args.logging_level, features_filename_test,
-            labels_filename_test, args.model_filename)
-        easy_call(cmd_vot_decode)
+        binary_call(DECODER, [features_filename_test, labels_filename_test, args.model_filename], args.logging_level)
 
     ## Option 3: Otherwise, use all data for training, and don't do any cross-validation.
     else:
         features_filename_training = features_filename_rs
         labels_filename_training = labels_filename_rs
         # Training
-        cmd_vot_training = 'VotTrain -verbose %s -pos_only -vot_loss -epochs 2 -loss_eps 4 -min_vot_length 5 ' \
-                           '-C 50 %s %s %s' % (args.logging_level, features_filename_training,
-                                               labels_filename_training, args.model_filename)
-        easy_call(cmd_vot_training)
+        binary_call(TRAINER, ['-pos_only', '-vot_loss', '-epochs', 2, '-loss_eps', 4, '-min_vot_length', 5, '-C', 50,
+                              features_filename_training, labels_filename_training, args.model_filename],
+                    args.logging_level)
 
     # remove working directory and its content
     if args.logging_level != "DEBUG":
@@ -26,6 +26,11 @@
 
 
 import argparse
+import shutil
+import tempfile
+
+from helpers.binaries import *
+from helpers.featurestore import *
 from helpers.utilities import *
 
 
@@ -45,14 +50,17 @@ if __name__ == "__main__":
 
     logging_defaults(args.logging_level)
 
+    # VotTrain reads text feature files: the windows of feature stores are written back to text files
+    working_dir = tempfile.mkdtemp()
+    features_filename = text_feature_list(args.features_filename, working_dir)
+
     # random file lines
     features_filename_rs = args.features_filename + ".rs"
     labels_filename_rs = args.labels_filename + ".rs"
-    random_shuffle_data(args.features_filename, args.labels_filename, features_filename_rs, labels_filename_rs)
+    random_shuffle_data(features_filename, args.labels_filename, features_filename_rs, labels_filename_rs)
 
     # Training
-    cmd_vot_training = 'VotTrain -verbose %s -pos_only -vot_loss -epochs 2 -loss_eps 4 -min_vot_length 5 -C ' \
-                       '50 %s %s %s' % (args.logging_level, features_filename_rs, labels_filename_rs,
-                                        args.model_filename)
-    easy_call(cmd_vot_training)
+    binary_call(TRAINER, ['-pos_only', '-vot_loss', '-epochs', 2, '-loss_eps', 4, '-min_vot_length', 5, '-C', 50,
+                          features_filename_rs, labels_filename_rs, args.model_filename], args.logging_level)
 
+    shutil.rmtree(working_dir, ignore_errors=True)
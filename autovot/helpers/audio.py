@@ -0,0 +1,383 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# audio.py: audio input. Memory-maps WAV files and resamples them with
+# a polyphase windowed-sinc filter, either block by block into the
+# 16kHz WAV files the AutoVOT programs read (so that memory does not
+# grow with the length of the recording) or only over the spans the
+# analysis windows need.
+#
+
+import logging
+import struct
+import wave
+from bisect import bisect_right
+from collections import namedtuple
+from math import ceil, gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+logger = logging.getLogger(__name__)
+
+
+BLOCK_FRAMES = 1 << 16
+MERGE_GAP = 1600  # output samples; spans closer than this are read as one
+ZERO_CROSSINGS = 16  # half-length of the resampling filter, in periods of the lower of the two rates
+KAISER_BETA = 8.6
+
+_PCM = 1
+_IEEE_FLOAT = 3
+_EXTENSIBLE = 0xFFFE
+
+WavInfo = namedtuple('WavInfo', ['sample_rate', 'num_channels', 'sample_width', 'is_float', 'data_offset',
+                                 'num_frames'])
+
+
+def wav_info(wav_filename):
+    """ format and position of the samples of a PCM or IEEE float WAV file """
+    with open(wav_filename, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError("%s is not a WAV file" % wav_filename)
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("%s has no data chunk" % wav_filename)
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size % 2:
+                    f.read(1)
+            elif chunk_id == b'data':
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+        if fmt is None:
+            raise ValueError("%s has no format chunk" % wav_filename)
+        f.seek(0, 2)
+        file_size = f.tell()
+
+    format_tag, num_channels, sample_rate, _, block_align, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if format_tag == _EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack('<H', fmt[24:26])[0]
+    sample_width = block_align // num_channels if num_channels else 0
+    if format_tag not in (_PCM, _IEEE_FLOAT) or sample_width not in (1, 2, 3, 4, 8) \
+            or (format_tag == _IEEE_FLOAT and sample_width not in (4, 8)):
+        raise ValueError("%s: unsupported WAV format (format %d, %d bits)" % (wav_filename, format_tag, bits))
+    # some writers leave the size of the data chunk at 0 (or wrong) when streaming; trust the file size then
+    num_frames = min(chunk_size, file_size - data_offset) // block_align if chunk_size else \
+        (file_size - data_offset) // block_align
+    return WavInfo(sample_rate, num_channels, sample_width, format_tag == _IEEE_FLOAT, data_offset, num_frames)
+
+
+class WavReader:
+    """ memory-mapped access to the samples of a WAV file """
+
+    def __init__(self, wav_filename):
+        self.filename = wav_filename
+        self.info = info = wav_info(wav_filename)
+        if info.is_float:
+            dtype, shape = '<f%d' % info.sample_width, (info.num_frames, info.num_channels)
+        elif info.sample_width == 1:
+            dtype, shape = np.uint8, (info.num_frames, info.num_channels)
+        elif info.sample_width == 3:
+            dtype, shape = np.uint8, (info.num_frames, info.num_channels, 3)
+        else:
+            dtype, shape = '<i%d' % info.sample_width, (info.num_frames, info.num_channels)
+        if info.num_frames:
+            self.data = np.memmap(wav_filename, dtype=dtype, mode='r', offset=info.data_offset, shape=shape)
+        else:
+            self.data = np.zeros(shape, dtype=dtype)
+
+    def __len__(self):
+        return self.info.num_frames
+
+    def is_int16(self):
+        return not self.info.is_float and self.info.sample_width == 2
+
+    def read(self, first, last, channels=None):
+        """ samples first..last-1 as a (num_channels, num_frames) float32 array in [-1, 1], with zeros outside the
+        recording. The interleaved samples are converted and de-interleaved in one copy, so that each channel is a
+        contiguous row """
+        num_channels = self.info.num_channels if channels is None else len(channels)
+        samples = np.zeros((num_channels, last - first), dtype=np.float32)
+        lo, hi = max(first, 0), min(last, len(self))
+        if hi > lo:
+            raw = self.data[lo:hi] if channels is None else self.data[lo:hi, channels]
+            self._to_float(np.swapaxes(raw, 0, 1), samples[:, lo - first:hi - first])
+        return samples
+
+    def _to_float(self, raw, out):
+        """ convert raw samples to floats in [-1, 1], writing them to out """
+        if self.info.is_float:
+            out[...] = raw
+        elif self.info.sample_width == 1:
+            np.subtract(raw, 128.0, out=out, casting='unsafe')
+            out /= 128
+        elif self.info.sample_width == 3:
+            raw = raw.astype(np.int32)
+            np.multiply((raw[..., 0] | (raw[..., 1] << 8) | (raw[..., 2] << 16)) << 8 >> 8, 1.0 / (1 << 23), out=out,
+                        casting='unsafe')
+        else:
+            np.multiply(raw, 1.0 / (1 << (8 * self.info.sample_width - 1)), out=out, casting='unsafe')
+
+
+def read_blocks(wav_filename, reader=None, block_frames=BLOCK_FRAMES, channels=None):
+    """ the samples of a WAV file as successive (num_frames, num_channels) float32 blocks. channels optionally
+    selects some of the channels (0-based) """
+    reader = reader or WavReader(wav_filename)
+    for first in range(0, len(reader), block_frames):
+        yield reader.read(first, min(first + block_frames, len(reader)), channels).T
+
+
+class Resampler:
+    """ streaming polyphase resampler: feed blocks of samples (along the first axis) to process(), then call flush()
+    for the last outputs. Every output sample is a Kaiser-windowed sinc interpolation of the input """
+
+    def __init__(self, rate_in, rate_out, num_channels=1, zero_crossings=ZERO_CROSSINGS):
+        divisor = gcd(int(rate_in), int(rate_out))
+        self.up = int(rate_out) // divisor
+        self.down = int(rate_in) // divisor
+        cutoff = min(1.0, self.up / float(self.down))  # relative to the input Nyquist frequency
+        self.half = int(ceil(zero_crossings / cutoff))  # taps on each side, in input samples
+        taps = np.arange(-self.half + 1, self.half + 1)
+        # samples are centered in their periods (as in Praat), so output n lies at input position
+        # (n + 1/2)*down/up - 1/2 = ((2n + 1)*down - up) / 2up = base + phase/2up, and uses the inputs base + taps
+        self.phases = 2 * self.up
+        distance = (np.arange(self.phases) / float(self.phases))[:, None] - taps[None, :]
+        window = np.i0(KAISER_BETA * np.sqrt(np.clip(1 - (distance / self.half) ** 2, 0, None))) / np.i0(KAISER_BETA)
+        filters = cutoff * np.sinc(cutoff * distance) * window
+        self.filters = (filters / filters.sum(axis=1, keepdims=True)).astype(np.float32)
+        # the input seen so far, one row per channel, from absolute sample self.start on; the first inputs see zeros
+        # on their left
+        self.buffer = np.zeros((num_channels, self.half), dtype=np.float32)
+        self.start = -self.half
+        self.next_output = 0
+        self.num_inputs = 0
+
+    def num_outputs(self, num_inputs):
+        return -(-num_inputs * self.up // self.down)
+
+    def _position(self, outputs):
+        return (2 * outputs + 1) * self.down - self.up
+
+    def _filter(self, buffer, start, outputs):
+        """ the (num_channels, num_outputs) outputs, from a (num_channels, num_inputs) buffer holding the inputs from
+        sample start on """
+        bases, phases = np.divmod(self._position(outputs), self.phases)
+        filters = self.filters[phases]
+        first_taps = bases - start - self.half + 1
+        result = np.empty((len(buffer), len(outputs)), dtype=np.float32)
+        for channel, samples in enumerate(buffer):
+            # the inputs of each output are rows of a strided view, so they are gathered as contiguous runs
+            frames = sliding_window_view(samples, 2 * self.half)[first_taps]
+            np.einsum('nt,nt->n', frames, filters, out=result[channel])
+        return result
+
+    def _outputs(self, last):
+        """ outputs self.next_output..last (included), as (num_outputs, num_channels), and drop the inputs no later
+        output needs """
+        result = self._filter(self.buffer, self.start, np.arange(self.next_output, last + 1))
+        self.next_output = last + 1
+        keep_from = self._position(self.next_output) // self.phases - self.half + 1
+        if keep_from > self.start:
+            self.buffer = self.buffer[:, keep_from - self.start:]
+            self.start = keep_from
+        return result.T
+
+    def input_span(self, first, last):
+        """ the inputs [lo, hi) that outputs first..last-1 (last > first) are computed from """
+        return (self._position(first) // self.phases - self.half + 1,
+                self._position(last - 1) // self.phases + self.half + 1)
+
+    def resample_span(self, reader, first, last, channels=None):
+        """ outputs first..last-1 of a whole recording, as a (num_channels, num_outputs) array, computed from the
+        inputs they need only. The result is the same as that of streaming the whole recording """
+        outputs = np.arange(first, last)
+        if not len(outputs):
+            return np.zeros((len(self.buffer), 0), dtype=np.float32)
+        lo, hi = self.input_span(first, last)
+        return self._filter(reader.read(lo, hi, channels), lo, outputs)
+
+    def process(self, block):
+        block = np.asarray(block, dtype=np.float32).reshape(len(block), len(self.buffer))
+        self.buffer = np.concatenate([self.buffer, block.T], axis=1)
+        self.num_inputs += len(block)
+        # output n can be computed once its last input, base + half, has been seen
+        last_base = self.start + self.buffer.shape[1] - 1 - self.half
+        last = ((last_base + 1) * self.phases - 1 + self.up - self.down) // (2 * self.down)
+        last = min(last, self.num_outputs(self.num_inputs) - 1)
+        if last < self.next_output:
+            return np.zeros((0, len(self.buffer)), dtype=np.float32)
+        return self._outputs(last)
+
+    def flush(self):
+        # the last outputs lie up to down/2up samples past the last input, and see zeros on their right
+        padding = self.half + self.down // (2 * self.up) + 1
+        self.buffer = np.concatenate([self.buffer, np.zeros((len(self.buffer), padding), dtype=np.float32)], axis=1)
+        last = self.num_outputs(self.num_inputs) - 1
+        if last < self.next_output:
+            return np.zeros((0, len(self.buffer)), dtype=np.float32)
+        return self._outputs(last)
+
+
+def resample_wav(wav_filename, output_filename, sample_rate, channels=None, block_frames=BLOCK_FRAMES):
+    """ resample (some of the channels of) a WAV file block by block into a 16 bit PCM WAV file, the format the
+    AutoVOT programs read. Only one block is held in memory at a time. Returns the number of frames written """
+    reader = WavReader(wav_filename)
+    info = reader.info
+    num_channels = info.num_channels if channels is None else len(channels)
+    resampler = Resampler(info.sample_rate, sample_rate, num_channels)
+    output = wave.open(output_filename, 'wb')
+    output.setnchannels(num_channels)
+    output.setsampwidth(2)
+    output.setframerate(sample_rate)
+    num_frames = 0
+    try:
+        for block in read_blocks(wav_filename, reader, block_frames, channels):
+            num_frames += _write_pcm16(output, resampler.process(block))
+        num_frames += _write_pcm16(output, resampler.flush())
+    finally:
+        output.close()
+    logger.debug("resampled %s from %d Hz to %d Hz (%d frames)" % (wav_filename, info.sample_rate, sample_rate,
+                                                                  num_frames))
+    return num_frames
+
+
+def write_wav(wav_filename, samples, sample_rate, block_frames=BLOCK_FRAMES, spans=None):
+    """ write one channel of samples (int16, or floats in [-1, 1]) to a 16 bit PCM WAV file, one block at a time.
+    samples may be any array-like with a length, a dtype and slicing (e.g., a memory map, or a SparseAudio). spans
+    optionally restricts the file to [first, last) spans of the samples, written end to end """
+    output = wave.open(wav_filename, 'wb')
+    output.setnchannels(1)
+    output.setsampwidth(2)
+    output.setframerate(sample_rate)
+    try:
+        for span_first, span_last in (spans if spans is not None else [(0, len(samples))]):
+            for first in range(span_first, span_last, block_frames):
+                block = np.asarray(samples[first:min(first + block_frames, span_last)])
+                if np.issubdtype(block.dtype, np.integer):
+                    output.writeframesraw(block.astype('<i2').tobytes())
+                else:
+                    _write_pcm16(output, block)
+    finally:
+        output.close()
+
+
+def _write_pcm16(output, samples):
+    """ write samples in [-1, 1], frames along the first axis, to a 16 bit wave.Wave_write """
+    pcm = np.clip(np.rint(samples * 32768.0), -32768, 32767).astype('<i2')
+    output.writeframesraw(pcm.tobytes())
+    return len(pcm)
+
+
+class SparseAudio:
+    """ one channel of a recording of which only some spans were read. Slicing within a span returns a view of it;
+    samples outside the spans read as zeros """
+
+    def __init__(self, num_samples, spans, dtype):
+        self.num_samples = num_samples
+        self.spans = spans  # sorted, non-overlapping (first sample, samples)
+        self.firsts = [first for first, _ in spans]
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self):
+        return self.num_samples
+
+    def __getitem__(self, item):
+        start, stop, step = item.indices(self.num_samples)
+        if step != 1:
+            raise IndexError("SparseAudio only supports contiguous slices")
+        span = bisect_right(self.firsts, start) - 1
+        if span >= 0:
+            first, samples = self.spans[span]
+            if stop <= first + len(samples):
+                return samples[start - first:stop - first]
+        result = np.zeros(max(stop - start, 0), dtype=self.dtype)
+        for first, samples in self.spans:
+            lo, hi = max(start, first), min(stop, first + len(samples))
+            if hi > lo:
+                result[lo - start:hi - start] = samples[lo - first:hi - first]
+        return result
+
+
+def merge_spans(spans, gap=MERGE_GAP):
+    """ sorted union of [first, last) spans, joining the spans closer than gap """
+    merged = list()
+    for first, last in sorted(spans):
+        if merged and first <= merged[-1][1] + gap:
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return [tuple(span) for span in merged]
+
+
+def _clip_spans(spans, num_samples):
+    """ the [first, last) spans within a recording of num_samples samples, merged """
+    return merge_spans([(max(first, 0), min(last, num_samples)) for first, last in spans if last > 0 and
+                        first < num_samples])
+
+
+def prefetch_spans(wav_filename, spans, sample_rate, block_size=1 << 20):
+    """ read the bytes of a WAV file that read_spans needs for the same spans, so that they are in the page cache
+    when it reads them (memory-mapped reads fetch one page at a time, which is slow on network or spinning disks).
+    Returns the number of bytes read """
+    info = wav_info(wav_filename)
+    resampler = Resampler(info.sample_rate, sample_rate)
+    block_align = info.sample_width * info.num_channels
+    buffer = memoryview(bytearray(block_size))
+    num_bytes = 0
+    with open(wav_filename, 'rb', buffering=0) as f:
+        for first, last in _clip_spans(spans, resampler.num_outputs(info.num_frames)):
+            lo, hi = (first, last) if info.sample_rate == sample_rate else resampler.input_span(first, last)
+            lo, hi = max(lo, 0), min(hi, info.num_frames)
+            f.seek(info.data_offset + lo * block_align)
+            remaining = (hi - lo) * block_align
+            while remaining > 0:
+                read = f.readinto(buffer[:min(remaining, block_size)])
+                if not read:
+                    break
+                remaining -= read
+                num_bytes += read
+    return num_bytes
+
+
+def read_spans(wav_filename, spans, sample_rate, channels=None):
+    """ read, and resample to sample_rate, only the [first, last) spans (in samples at sample_rate) of some of the
+    channels (0-based, default all) of a WAV file. Returns one SparseAudio per channel. 16 bit files at sample_rate
+    are not converted: the channels are strided views of the memory-mapped, interleaved file. Otherwise all the
+    channels of a span are resampled together, and each channel is a contiguous row of the result """
+    reader = WavReader(wav_filename)
+    info = reader.info
+    channels = list(range(info.num_channels)) if channels is None else list(channels)
+    resampler = Resampler(info.sample_rate, sample_rate, len(channels))
+    num_samples = resampler.num_outputs(len(reader))
+    spans = _clip_spans(spans, num_samples)
+    if info.sample_rate == sample_rate and reader.is_int16():
+        blocks = [(first, reader.data[first:last]) for first, last in spans]
+        return [SparseAudio(num_samples, [(first, block[:, channel]) for first, block in blocks], reader.data.dtype)
+                for channel in channels]
+    blocks = [(first, resampler.resample_span(reader, first, last, channels)) for first, last in spans]
+    logger.debug("read %d of the %d samples of %s" % (sum(last - first for first, last in spans), num_samples,
+                                                      wav_filename))
+    return [SparseAudio(num_samples, [(first, block[i]) for first, block in blocks], np.float32)
+            for i in range(len(channels))]
@@ -0,0 +1,120 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# binaries.py: the AutoVOT programs (VotFrontEnd2, VotDecode and
+# VotTrain), which define the features and the decoder the released
+# models were trained with. They are looked up on the PATH, then in the
+# autovot directory, and run without a shell on files of a working
+# directory.
+#
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+
+
+logger = logging.getLogger(__name__)
+
+
+BINARY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FRONT_END = 'VotFrontEnd2'
+DECODER = 'VotDecode'
+TRAINER = 'VotTrain'
+
+_available = dict()
+_versions = dict()
+
+
+def find_binary(name):
+    """ the path of an AutoVOT program """
+    path = shutil.which(name) or shutil.which(name, path=BINARY_DIR)
+    if path is None:
+        raise FileNotFoundError("Unable to find %s on the PATH or in %s" % (name, BINARY_DIR))
+    return path
+
+
+def binary_available(name):
+    """ whether an AutoVOT program is found and can be executed on this platform """
+    if name not in _available:
+        try:
+            subprocess.run([find_binary(name)], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=60)
+            _available[name] = True
+        except (OSError, subprocess.SubprocessError):
+            _available[name] = False
+    return _available[name]
+
+
+def binary_version(name):
+    """ content hash of an AutoVOT program, which identifies e.g. the features VotFrontEnd2 computes """
+    path = find_binary(name)
+    if path not in _versions:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _versions[path] = digest.hexdigest()[:16]
+    return _versions[path]
+
+
+def run_binary(name, arguments, verbose='ERROR', capture_output=True):
+    """ run an AutoVOT program, raising RuntimeError if it fails. Its output is returned (and included in the error),
+    or, without capture_output, left to go to the terminal """
+    command = [find_binary(name), '-verbose', verbose] + [str(argument) for argument in arguments]
+    logger.debug(' '.join(command))
+    output = subprocess.PIPE if capture_output else None
+    try:
+        process = subprocess.run(command, stdin=subprocess.DEVNULL, stdout=output,
+                                 stderr=subprocess.STDOUT if capture_output else None, universal_newlines=True)
+    except OSError as exception:
+        raise RuntimeError("Unable to run %s: %s" % (name, exception))
+    if process.returncode != 0:
+        details = ':\n' + process.stdout.strip() if capture_output else ''
+        raise RuntimeError("%s failed with exit status %d%s" % (name, process.returncode, details))
+    return process.stdout
+
+
+def write_input_file(input_filename, windows, wav_filename=None):
+    """ write a window list in the format VotFrontEnd2 reads (that of textgrid2front_end). wav_filename optionally
+    replaces the WAV file of the windows """
+    input_file = open(input_filename, 'w')
+    for window in windows:
+        input_file.write('"%s" %.3f %.3f %.3f %.3f [seconds]\n' % (wav_filename or window.wav_filename,
+                                                                    window.window_min, window.window_max,
+                                                                    window.vot_min, window.vot_max))
+    input_file.close()
+
+
+def binary_features(wav_filename, windows, working_dir, verbose='ERROR'):
+    """ run VotFrontEnd2 over windows of a 16kHz, 16 bit, mono WAV file. The input, feature file list, labels and text
+    feature files are written to working_dir. Returns the names of the feature file list and of the labels file, and
+    the list of feature files """
+    features_dir = os.path.join(working_dir, 'features')
+    os.makedirs(features_dir, exist_ok=True)
+    input_filename = os.path.join(working_dir, 'windows.input')
+    features_filename = os.path.join(working_dir, 'windows.feature_filelist')
+    labels_filename = os.path.join(working_dir, 'windows.labels')
+    feature_filenames = [os.path.join(features_dir, '%d.txt' % i) for i in range(len(windows))]
+    write_input_file(input_filename, windows, wav_filename)
+    features_file = open(features_filename, 'w')
+    features_file.write(''.join(filename + '\n' for filename in feature_filenames))
+    features_file.close()
+    run_binary(FRONT_END, [input_filename, features_filename, labels_filename], verbose)
+    return features_filename, labels_filename, feature_filenames
@@ -0,0 +1,392 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# decoder.py: structured VOT decoder. Loads the .pos/.neg linear models
+# and measures the VOTs of windows with VotFrontEnd2 and VotDecode,
+# then converts their predictions back to the time line of the
+# recording.
+#
+
+import logging
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from collections import namedtuple, OrderedDict
+
+import numpy as np
+
+from .audio import merge_spans, read_spans, wav_info, write_wav
+from .binaries import DECODER, binary_features, run_binary
+from .featurestore import read_feature_files
+from .frontend import SAMPLE_RATE, VOICING, Window, front_end_span, read_input_file, window_labels
+from .instances import textgrid_instances, limit_instances
+from .textgrid import IntervalTier
+
+
+logger = logging.getLogger(__name__)
+
+
+MAX_ONSET = 200
+
+Prediction = namedtuple('Prediction', ['confidence', 'xmin', 'xmax'])
+# a prediction in seconds, with the mark AutoVOT gives it ("-" prefix for prevoicing, "neg " for negative VOTs)
+Measurement = namedtuple('Measurement', ['xmin', 'xmax', 'confidence', 'mark', 'prevoiced'])
+
+
+class VotModel:
+    """ the linear classifiers of a trained model: positive VOTs (.pos) and, optionally, negative VOTs (.neg) """
+
+    def __init__(self, pos, neg=None, name=''):
+        self.pos = np.asarray(pos, dtype=np.float64)
+        self.neg = np.asarray(neg, dtype=np.float64) if neg is not None else None
+        self.name = name
+
+    def __str__(self):
+        return '<VotModel "%s" pos=%d neg=%s>' % (self.name, len(self.pos),
+                                                 len(self.neg) if self.neg is not None else None)
+
+
+def read_weights(filename):
+    """ read a weight file: the number of weights followed by the weights """
+    values = open(filename).read().split()
+    num_weights = int(values[0])
+    if len(values) - 1 != num_weights:
+        raise ValueError("%s declares %d weights but holds %d" % (filename, num_weights, len(values) - 1))
+    return np.array(values[1:], dtype=np.float64)
+
+
+def load_model(model_filename):
+    pos = read_weights(model_filename + '.pos')
+    neg = read_weights(model_filename + '.neg') if os.path.isfile(model_filename + '.neg') else None
+    return VotModel(pos, neg, name=model_filename)
+
+
+def read_predictions(preds_filename):
+    """ read the (confidence, xmin, xmax) lines of a .preds file """
+    predictions = list()
+    for line in open(preds_filename):
+        items = line.split()
+        if items:
+            predictions.append(Prediction(float(items[0]), float(items[1]), float(items[2])))
+    return predictions
+
+
+def write_model(model_filename, model):
+    """ write the weights of a model to the .pos/.neg text files VotDecode reads """
+    for suffix, weights in (('.pos', model.pos), ('.neg', model.neg)):
+        if weights is not None:
+            np.savetxt(model_filename + suffix, weights, fmt='%.17g', header='%d' % len(weights), comments='')
+
+
+def write_labels(labels_filename, windows):
+    """ write the VOT boundaries of windows, in frames, in the format of the labels files of VotFrontEnd2 """
+    labels_file = open(labels_filename, 'w')
+    labels_file.write('%d 2\n' % len(windows))
+    labels_file.write(''.join('%d %d\n' % window_labels(window) for window in windows))
+    labels_file.close()
+
+
+def _front_end_windows(samples, windows, feature_filenames, working_dir, verbose='ERROR'):
+    """ run VotFrontEnd2 over windows of 16kHz samples, writing their features to feature_filenames. Only the audio
+    around the windows is written to the WAV file it reads """
+    spans, moved = window_audio(windows, len(samples))
+    front_end_dir = tempfile.mkdtemp(dir=working_dir)
+    wav_filename = os.path.join(front_end_dir, 'audio.wav')
+    write_wav(wav_filename, samples, SAMPLE_RATE, spans=spans)
+    _, _, written = binary_features(wav_filename, moved, front_end_dir, verbose)
+    for filename, feature_filename in zip(written, feature_filenames):
+        os.replace(filename, feature_filename)
+    shutil.rmtree(front_end_dir, ignore_errors=True)
+
+
+def front_end_features(samples, windows, feature_filenames, working_dir, cache=None, channel=0, verbose='ERROR'):
+    """ write the VotFrontEnd2 features of windows over one channel of 16kHz samples to feature_filenames. With a
+    FeatureCache, VotFrontEnd2 only runs on the windows it does not hold (channel is part of the cache keys) """
+    def front_end(indices):
+        _front_end_windows(samples, [windows[i] for i in indices], [feature_filenames[i] for i in indices],
+                           working_dir, verbose)
+
+    if cache is None:
+        front_end(range(len(windows)))
+    else:
+        cache.feature_files(samples, windows, feature_filenames, front_end, channel)
+
+
+def cached_front_end(input_filename, features_filename, labels_filename, cache, verbose='ERROR'):
+    """ 'VotFrontEnd2 input_filename features_filename labels_filename', reading the features of the windows a
+    FeatureCache holds from it: VotFrontEnd2 only runs on the other windows, on the audio around them """
+    windows = read_input_file(input_filename)
+    feature_filenames = [line.strip() for line in open(features_filename) if line.strip()]
+    if len(feature_filenames) != len(windows):
+        raise ValueError("The number of windows in %s does not match the number of feature files in %s" %
+                         (input_filename, features_filename))
+    by_wav = OrderedDict()
+    for i, window in enumerate(windows):
+        by_wav.setdefault(window.wav_filename, list()).append(i)
+    working_dir = tempfile.mkdtemp()
+    try:
+        for wav_filename, indices in by_wav.items():
+            wav_windows = [windows[i] for i in indices]
+            # only the spans of the recording the windows need are read
+            samples = read_spans(wav_filename, map(front_end_span, wav_windows), SAMPLE_RATE, [0])[0]
+            front_end_features(samples, wav_windows, [feature_filenames[i] for i in indices], working_dir, cache,
+                               verbose=verbose)
+    finally:
+        shutil.rmtree(working_dir, ignore_errors=True)
+    write_labels(labels_filename, windows)
+
+
+def binary_decode(features_filename, labels_filename, model, working_dir, min_vot_length=15, max_vot_length=250,
+                  max_onset=MAX_ONSET, verbose='ERROR'):
+    """ run VotDecode over the windows of a feature file list. Returns their predictions """
+    model_filename = model.name
+    if not model_filename or not os.path.isfile(model_filename + '.pos'):
+        # e.g., a model given as arrays
+        model_filename = os.path.join(working_dir, 'model')
+        write_model(model_filename, model)
+    preds_filename = os.path.join(working_dir, 'windows.preds')
+    run_binary(DECODER, ['-max_onset', max_onset, '-min_vot_length', min_vot_length, '-max_vot_length',
+                         max_vot_length, '-output_predictions', preds_filename, features_filename, labels_filename,
+                         model_filename], verbose)
+    return read_predictions(preds_filename)
+
+
+def binary_decode_windows(wav_filename, windows, model, min_vot_length=15, max_vot_length=250, max_onset=MAX_ONSET,
+                          verbose='ERROR'):
+    """ run VotFrontEnd2 and VotDecode over windows of a 16kHz, 16 bit, mono WAV file. Returns the features and the
+    predictions of the windows """
+    if not windows:
+        return list(), list()
+    working_dir = tempfile.mkdtemp()
+    try:
+        features_filename, labels_filename, feature_filenames = binary_features(wav_filename, windows, working_dir,
+                                                                                verbose)
+        predictions = binary_decode(features_filename, labels_filename, model, working_dir, min_vot_length,
+                                    max_vot_length, max_onset, verbose)
+        features_list = read_feature_files(feature_filenames)
+    finally:
+        shutil.rmtree(working_dir, ignore_errors=True)
+    if len(predictions) != len(windows):
+        raise RuntimeError("%s predicted %d of the %d windows of %s" % (DECODER, len(predictions), len(windows),
+                                                                        wav_filename))
+    return features_list, predictions
+
+
+def front_end_files(samples, windows, working_dir, cache=None, channel=0, verbose='ERROR'):
+    """ run VotFrontEnd2 (only on the windows a FeatureCache does not hold, if one is given) over windows of one
+    channel of 16kHz samples, writing the feature files, the feature file list and the labels file of the windows to
+    working_dir. Returns the names of the list and of the labels file, and the list of feature files """
+    features_dir = os.path.join(working_dir, 'features')
+    os.makedirs(features_dir, exist_ok=True)
+    feature_filenames = [os.path.join(features_dir, '%d.txt' % i) for i in range(len(windows))]
+    front_end_features(samples, windows, feature_filenames, working_dir, cache, channel, verbose)
+    features_filename = os.path.join(working_dir, 'windows.feature_filelist')
+    features_file = open(features_filename, 'w')
+    features_file.write(''.join(filename + '\n' for filename in feature_filenames))
+    features_file.close()
+    labels_filename = os.path.join(working_dir, 'windows.labels')
+    write_labels(labels_filename, windows)
+    return features_filename, labels_filename, feature_filenames
+
+
+def binary_decode_samples(samples, windows, model, min_vot_length=15, max_vot_length=250, max_onset=MAX_ONSET,
+                          cache=None, channel=0, verbose='ERROR'):
+    """ run VotFrontEnd2 and VotDecode over windows of one channel of 16kHz samples. Only the audio around the
+    windows is written to the WAV file VotFrontEnd2 reads, and, with a FeatureCache, only that of the windows it does
+    not hold. Returns the features and the predictions of the windows """
+    if not windows:
+        return list(), list()
+    working_dir = tempfile.mkdtemp()
+    try:
+        features_filename, labels_filename, feature_filenames = front_end_files(samples, windows, working_dir, cache,
+                                                                                channel, verbose)
+        predictions = binary_decode(features_filename, labels_filename, model, working_dir, min_vot_length,
+                                    max_vot_length, max_onset, verbose)
+        features_list = read_feature_files(feature_filenames)
+    finally:
+        shutil.rmtree(working_dir, ignore_errors=True)
+    if len(predictions) != len(windows):
+        raise RuntimeError("%s predicted %d of the %d windows" % (DECODER, len(predictions), len(windows)))
+    return features_list, predictions
+
+
+def prevoicing_decisions(features_list, predictions):
+    """ a predicted VOT is prevoiced when its frames are mostly voiced (RAPT voicing >= 0.01). The decisions of all
+    the windows are taken at once: the voicing tracks are stacked in one zero-padded array, and the mean over each
+    predicted span is taken from its cumulative sums """
+    if not predictions:
+        return np.zeros(0, dtype=bool)
+    lengths = np.array([len(features) for features in features_list])
+    voicing = np.zeros((len(features_list), lengths.max() + 1), dtype=np.int32)
+    for i, features in enumerate(features_list):
+        voicing[i, 1:lengths[i] + 1] = np.where(features[:, VOICING] < 0.01, -1, 1)
+    np.cumsum(voicing, axis=1, out=voicing)
+    spans = np.array([(prediction.xmin, prediction.xmax) for prediction in predictions], dtype=int).reshape(-1, 2)
+    spans = np.clip(spans, 0, lengths[:, None])
+    rows = np.arange(len(predictions))
+    # the mean is positive iff the sum is, over a non-empty span
+    return (spans[:, 1] > spans[:, 0]) & (voicing[rows, spans[:, 1]] - voicing[rows, spans[:, 0]] > 0)
+
+
+def measurements(windows, features_list, predictions):
+    """ convert the predictions of each window back to the time line of the recording """
+    result = list()
+    prevoiced = prevoicing_decisions(features_list, predictions)
+    for window, prediction, is_prevoiced in zip(windows, predictions, prevoiced):
+        confidence = '%f' % prediction.confidence
+        xmin = float(prediction.xmin)
+        xmax = float(prediction.xmax)
+        if xmin < xmax:  # positive VOT
+            mark = "-" + confidence if is_prevoiced else confidence
+            result.append(Measurement(window.window_min + xmin/1000, window.window_min + xmax/1000,
+                                      prediction.confidence, mark, bool(is_prevoiced)))
+        else:  # negative VOT
+            result.append(Measurement(window.window_min + xmax/1000, window.window_min + xmin/1000,
+                                      prediction.confidence, "neg " + confidence, False))
+    return result
+
+
+def autovot_tier(measurements, xmin, xmax, name='AutoVOT'):
+    """ an interval tier with a 'pred' interval per measurement """
+    auto_vot_tier = IntervalTier(name=name, xmin=xmin, xmax=xmax)
+    # the tier alternates empty intervals with the measured ones
+    bounds = [xmin]
+    for measurement in measurements:
+        bounds += [measurement.xmin, measurement.xmax]
+    bounds.append(xmax)
+    ## instead of the mark (confidence number), just put 'pred' in the interval
+    auto_vot_tier.extend_columns(bounds[:-1], bounds[1:], ['', 'pred'] * len(measurements) + [''])
+    return auto_vot_tier
+
+
+def tier_windows(textgrid, definitions_list, duration, wav_filename='', textgrid_filename=''):
+    """ the windows to decode on each tier of a TextGrid (None for tiers without usable instances), given the
+    duration of the recording in seconds """
+    problematic_files = list()
+    result = list()
+    for definitions in definitions_list:
+        if definitions.window_tier == "" and definitions.vot_tier == "":
+            raise ValueError("Either a window tier or a VOT tier should be given.")
+        instances = textgrid_instances(textgrid, definitions, wav_filename, duration, textgrid_filename,
+                                       problematic_files)
+        if instances is None:
+            result.append(None)
+            continue
+        # the same millisecond precision as the .input files of the front end
+        result.append([Window(wav_filename, round(instance.window_min, 3), round(instance.window_max, 3),
+                              round(instance.vot_min, 3), round(instance.vot_max, 3))
+                       for instance in limit_instances(instances, definitions)])
+    return result
+
+
+def _duration(audio, sample_rate):
+    """ the duration in seconds of an array of samples, or of a WAV file """
+    if isinstance(audio, str):
+        return wav_info(audio).num_frames / float(sample_rate)
+    return len(audio) / float(sample_rate)
+
+
+def window_audio(windows, num_samples):
+    """ the spans of a recording of num_samples samples that VotFrontEnd2 reads for windows (merged), and the windows
+    moved to the time line of a file that only holds these spans, end to end. The spans start on whole frames, so
+    that the windows only move by whole milliseconds """
+    spans = merge_spans([(max(first, 0), min(last, num_samples)) for first, last in map(front_end_span, windows)
+                         if last > 0 and first < num_samples], gap=0)
+    firsts = [first for first, _ in spans]
+    offsets = np.cumsum([0] + [last - first for first, last in spans])
+    moved = list()
+    for window in windows:
+        span = max(bisect_right(firsts, max(front_end_span(window)[0], 0)) - 1, 0)
+        shift = (firsts[span] - offsets[span]) / float(SAMPLE_RATE) if spans else 0.0
+        moved.append(window._replace(window_min=round(window.window_min - shift, 3),
+                                     window_max=round(window.window_max - shift, 3),
+                                     vot_min=round(window.vot_min - shift, 3),
+                                     vot_max=round(window.vot_max - shift, 3)))
+    return spans, moved
+
+
+def _decode_group(samples, windows, model, sample_rate, min_vot_length, max_vot_length, cache, channel):
+    """ the features and the predictions of windows over one array of samples, or one WAV file """
+    if isinstance(samples, str) and cache is None:
+        return binary_decode_windows(samples, windows, model, min_vot_length, max_vot_length)
+    if sample_rate != SAMPLE_RATE:
+        raise ValueError('The AutoVOT programs expect audio sampled at %d Hz' % SAMPLE_RATE)
+    if isinstance(samples, str):
+        samples = read_spans(samples, map(front_end_span, windows), sample_rate, [0])[0]
+    return binary_decode_samples(samples, windows, model, min_vot_length, max_vot_length, cache=cache,
+                                 channel=channel)
+
+
+def decode_tiers(audio, textgrid, definitions_list, model, sample_rate=SAMPLE_RATE, min_vot_length=15,
+                 max_vot_length=250, wav_filename='', textgrid_filename='', cache=None, channels=None, windows=None):
+    """ measure the VOTs of several tiers of a TextGrid in one pass. audio is either the audio shared by all the
+    tiers, or a list with the audio of each tier (e.g., one channel per speaker): an array of samples (16kHz, int16
+    or floats), or the name of a 16kHz, 16 bit, mono WAV file. Each distinct window of each distinct audio is
+    measured once, and all the windows of an audio in one batch: VotFrontEnd2 and VotDecode run on them (for arrays,
+    only the audio around the windows is written to a temporary WAV file first) and, if a FeatureCache is given,
+    VotFrontEnd2 only runs on the windows it does not hold (channels gives the channel of each tier's audio for the
+    cache keys). windows optionally gives the result of tier_windows, e.g. when the audio was only read around the
+    windows. Returns a list with the measurements of each tier (None for tiers without usable instances) """
+    if not isinstance(audio, (list, tuple)):
+        audio = [audio] * len(definitions_list)
+    if channels is None:
+        channels = [0] * len(definitions_list)
+    if windows is None:
+        windows = tier_windows(textgrid, definitions_list, _duration(audio[0], sample_rate), wav_filename,
+                               textgrid_filename) if audio else list()
+
+    # gather the windows of all the tiers, grouped by the audio they are read from
+    groups = OrderedDict()
+    tier_items = list()
+    for samples, channel, tier in zip(audio, channels, windows):
+        if tier is None:
+            tier_items.append(None)
+            continue
+        bounds = groups.setdefault(id(samples), (samples, channel, OrderedDict()))[2]
+        for window in tier:
+            bounds.setdefault((window.window_min, window.window_max), len(bounds))
+        tier_items.append((id(samples), tier))
+
+    # measure every distinct window once
+    decoded = dict()
+    for key, (samples, channel, bounds) in groups.items():
+        group_windows = [Window(wav_filename, window_min, window_max, window_min, window_max)
+                         for window_min, window_max in bounds]
+        decoded[key] = (bounds,) + tuple(_decode_group(samples, group_windows, model, sample_rate, min_vot_length,
+                                                       max_vot_length, cache, channel))
+
+    result = list()
+    for item in tier_items:
+        if item is None:
+            result.append(None)
+            continue
+        key, tier = item
+        bounds, features_list, predictions = decoded[key]
+        indices = [bounds[(window.window_min, window.window_max)] for window in tier]
+        result.append(measurements(tier, [features_list[i] for i in indices], [predictions[i] for i in indices]))
+    return result
+
+
+def decode(samples, textgrid, definitions, model, sample_rate=SAMPLE_RATE, min_vot_length=15, max_vot_length=250,
+           wav_filename='', textgrid_filename='', cache=None):
+    """ measure the VOTs of the instances a TextGrid defines, using audio that has already been loaded (16kHz, one
+    channel, either int16 samples or floats) or a 16kHz, 16 bit, mono WAV file. Returns a list of Measurement, or
+    None if the TextGrid has no usable instances """
+    return decode_tiers(samples, textgrid, [definitions], model, sample_rate, min_vot_length, max_vot_length,
+                        wav_filename, textgrid_filename, cache)[0]
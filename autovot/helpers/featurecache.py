@@ -0,0 +1,153 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# featurecache.py: persistent cache of window features. Entries are
+# the feature files VotFrontEnd2 writes, keyed by the hash of the
+# (resampled) samples around the window, the channel, the window bounds
+# and the hash of the VotFrontEnd2 program, so re-running a corpus only
+# runs the front end on the windows that were never seen before.
+#
+
+import hashlib
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from .binaries import FRONT_END, binary_version
+from .frontend import front_end_span
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MAX_SIZE = 1024  # MB
+EVICTION_RATIO = 0.9  # evict down to 90% of the maximal size, so that eviction does not run on every insertion
+
+_caches = dict()
+
+
+def window_hash(samples, window):
+    """ content hash of the samples VotFrontEnd2 may read for a window (only those are read, so sparse recordings stay
+    sparse) """
+    first, last = front_end_span(window)
+    lo, hi = max(first, 0), min(last, len(samples))
+    digest = hashlib.sha256(('%s %d %d' % (np.dtype(samples.dtype).str, lo - first, last - hi)).encode())
+    if hi > lo:
+        digest.update(np.ascontiguousarray(samples[lo:hi]).data)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """ a directory of VotFrontEnd2 feature files, one per window, evicted in least recently used order """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = int(max_size * 1024 * 1024)
+        self.size = None  # computed on the first insertion
+        self.hits = 0
+        self.misses = 0
+
+    def filename(self, key, channel, window):
+        return os.path.join(self.directory, key[:2], '%s_%s_%.3f_%.3f_%s.txt' %
+                            (key, channel, window.window_min, window.window_max, binary_version(FRONT_END)))
+
+    def get(self, filename, feature_filename):
+        """ copy a cached feature file to feature_filename. Returns whether it was cached """
+        try:
+            shutil.copyfile(filename, feature_filename)
+        except OSError:
+            return False
+        try:
+            os.utime(filename)  # mark as recently used
+        except OSError:
+            pass
+        return True
+
+    def put(self, filename, feature_filename):
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            temp_filename = '%s.%d.tmp' % (filename, os.getpid())
+            shutil.copyfile(feature_filename, temp_filename)
+            os.replace(temp_filename, filename)
+        except OSError as exception:
+            logger.warning("Unable to write %s to the feature cache: %s" % (filename, exception))
+            return
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        else:
+            self.size += os.path.getsize(filename)
+        if self.size > self.max_size:
+            self.evict()
+
+    def entries(self):
+        """ (last use, size, filename) of all the cached files """
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if entry.name.endswith('.txt'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:  # removed by another process
+                        continue
+                    yield stat.st_mtime, stat.st_size, entry.path
+
+    def evict(self):
+        entries = sorted(self.entries())
+        self.size = sum(size for _, size, _ in entries)
+        target = self.max_size * EVICTION_RATIO
+        removed = 0
+        for _, size, filename in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                continue
+            self.size -= size
+            removed += 1
+        logger.debug("evicted %d windows from the feature cache %s" % (removed, self.directory))
+
+    def feature_files(self, samples, windows, feature_filenames, front_end, channel=0):
+        """ write the feature files of windows over one recording: those of the cached windows are copied from the
+        cache, and front_end(indices) is called to write those of the other windows, which are then cached """
+        filenames = [self.filename(window_hash(samples, window), channel, window) for window in windows]
+        missing = [i for i, (filename, feature_filename) in enumerate(zip(filenames, feature_filenames))
+                   if not self.get(filename, feature_filename)]
+        self.hits += len(windows) - len(missing)
+        self.misses += len(missing)
+        logger.debug("feature cache: %d of %d windows cached" % (len(windows) - len(missing), len(windows)))
+        if missing:
+            front_end(missing)
+            for i in missing:
+                self.put(filenames[i], feature_filenames[i])
+
+
+def feature_cache(directory, max_size=DEFAULT_MAX_SIZE):
+    """ the cache of a directory, shared by all the callers of the process (None if no directory is given) """
+    if not directory:
+        return None
+    directory = os.path.abspath(directory)
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = FeatureCache(directory, max_size)
+    else:
+        cache.max_size = int(max_size * 1024 * 1024)
+    return cache
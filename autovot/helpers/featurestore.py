@@ -0,0 +1,182 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# featurestore.py: per-recording feature store. The text feature files
+# VotFrontEnd2 writes for the windows of a recording are packed into
+# one .npy matrix, next to an index of the first frame and the number
+# of frames of each window. Feature file lists refer to a window as
+# "<store>.npy:<window number>"; the AutoVOT programs are given the
+# windows of stores back as text feature files. The features are kept
+# as float64, so that those text files hold exactly the values
+# VotFrontEnd2 wrote.
+#
+
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .binaries import FRONT_END, run_binary
+
+
+logger = logging.getLogger(__name__)
+
+
+STORE_SUFFIX = '.npy'
+INDEX_SUFFIX = '.index.npy'
+
+_stores = dict()
+
+
+def store_entry(store_filename, window_number):
+    """ the feature file list line of a window of a store """
+    return '%s:%d' % (store_filename, window_number)
+
+
+def parse_entry(entry):
+    """ (store filename, window number) of a feature file list line, or (filename, None) for a text feature file """
+    store_filename, _, window_number = entry.rpartition(':')
+    if store_filename.endswith(STORE_SUFFIX) and window_number.isdigit():
+        return store_filename, int(window_number)
+    return entry, None
+
+
+def index_filename(store_filename):
+    return store_filename[:-len(STORE_SUFFIX)] + INDEX_SUFFIX
+
+
+def read_text_features(feature_filename):
+    """ read a text feature file of VotFrontEnd2: the numbers of rows and columns, then the rows """
+    with open(feature_filename, 'rb') as f:
+        num_rows, num_columns = [int(x) for x in f.readline().split()[:2]]
+        values = np.fromstring(f.read(), dtype=np.float64, sep=' ')
+    if len(values) != num_rows * num_columns:
+        raise ValueError("%s declares %d x %d features but holds %d values" % (feature_filename, num_rows,
+                                                                               num_columns, len(values)))
+    return values.reshape(num_rows, num_columns)
+
+
+def read_feature_files(feature_filenames):
+    """ the features of the text feature files of a recording, as views of one matrix """
+    features_list = [read_text_features(feature_filename) for feature_filename in feature_filenames]
+    if not features_list:
+        return list()
+    lengths = np.cumsum([len(features) for features in features_list])[:-1]
+    return np.split(np.concatenate(features_list), lengths)
+
+
+def write_store(store_filename, features_list):
+    """ write the features of the windows of a recording to a store and its index """
+    lengths = np.array([len(features) for features in features_list], dtype=np.int64)
+    index = np.zeros((len(features_list), 2), dtype=np.int64)
+    index[1:, 0] = np.cumsum(lengths)[:-1]
+    index[:, 1] = lengths
+    num_columns = features_list[0].shape[1] if features_list else 0
+    temp_filename = '%s.%d.tmp' % (store_filename, os.getpid())
+    store = np.lib.format.open_memmap(temp_filename, mode='w+', dtype=np.float64,
+                                      shape=(int(lengths.sum()), num_columns))
+    for (first, length), features in zip(index, features_list):
+        store[first:first + length] = features
+    store.flush()
+    del store
+    # replace rather than overwrite, so that stores that are already mapped stay valid
+    os.replace(temp_filename, store_filename)
+    np.save(index_filename(store_filename), index)
+    _stores.pop(store_filename, None)
+
+
+class FeatureStore:
+    """ read-only view of a store: store[i] is the (num_frames, num_features) matrix of window i, without a copy """
+
+    def __init__(self, store_filename):
+        self.filename = store_filename
+        self.features = np.load(store_filename, mmap_mode='r')
+        self.index = np.load(index_filename(store_filename))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, window_number):
+        first, length = self.index[window_number]
+        return self.features[first:first + length]
+
+
+def open_store(store_filename):
+    """ the stores of the process are opened (mapped) only once """
+    store = _stores.get(store_filename)
+    if store is None:
+        store = _stores[store_filename] = FeatureStore(store_filename)
+    return store
+
+
+def read_entry(entry):
+    """ the features of a line of a feature file list: a window of a store, or a text feature file """
+    filename, window_number = parse_entry(entry)
+    if window_number is None:
+        return read_text_features(filename)
+    return open_store(filename)[window_number]
+
+
+def store_front_end(input_filename, features_filename, labels_filename, verbose='ERROR'):
+    """ 'VotFrontEnd2 input_filename features_filename labels_filename' for a feature file list of store entries:
+    VotFrontEnd2 writes the text feature files to a temporary directory, and those of the windows of each store are
+    then packed into it """
+    entries = [line.strip() for line in open(features_filename) if line.strip()]
+    working_dir = tempfile.mkdtemp()
+    try:
+        text_filenames = [entry if parse_entry(entry)[1] is None else os.path.join(working_dir, '%d.txt' % i)
+                          for i, entry in enumerate(entries)]
+        text_list = os.path.join(working_dir, 'text.feature_filelist')
+        with open(text_list, 'w') as f:
+            f.write(''.join(filename + '\n' for filename in text_filenames))
+        run_binary(FRONT_END, [input_filename, text_list, labels_filename], verbose)
+        stores = dict()
+        for entry, text_filename in zip(entries, text_filenames):
+            store_filename, window_number = parse_entry(entry)
+            if window_number is not None:
+                stores.setdefault(store_filename, dict())[window_number] = text_filename
+        for store_filename, store_windows in stores.items():
+            if sorted(store_windows) != list(range(len(store_windows))):
+                raise ValueError("The windows of %s in %s are not numbered consecutively" % (store_filename,
+                                                                                           features_filename))
+            write_store(store_filename, read_feature_files([store_windows[i] for i in range(len(store_windows))]))
+    finally:
+        shutil.rmtree(working_dir, ignore_errors=True)
+
+
+def text_feature_list(features_filename, working_dir):
+    """ a feature file list the AutoVOT programs can read for features_filename: the windows of stores are written
+    back to text feature files in working_dir. features_filename is returned as is if it has no store entries """
+    entries = [line.strip() for line in open(features_filename) if line.strip()]
+    if all(parse_entry(entry)[1] is None for entry in entries):
+        return features_filename
+    text_filenames = list()
+    for i, entry in enumerate(entries):
+        if parse_entry(entry)[1] is None:
+            text_filenames.append(entry)
+            continue
+        text_filenames.append(os.path.join(working_dir, '%d.txt' % i))
+        features = read_entry(entry)
+        np.savetxt(text_filenames[-1], features, fmt='%.17g', header='%d %d' % features.shape, comments='')
+    text_list = os.path.join(working_dir, os.path.basename(features_filename))
+    with open(text_list, 'w') as f:
+        f.write(''.join(filename + '\n' for filename in text_filenames))
+    return text_list
+
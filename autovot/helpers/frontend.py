@@ -0,0 +1,62 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# frontend.py: the windows AutoVOT's front end (VotFrontEnd2) works
+# on: the .input window lists it reads, the frames and labels of a
+# window, and the span of audio it reads around each window.
+#
+
+import re
+from collections import namedtuple
+
+
+SAMPLE_RATE = 16000
+FRAME_SHIFT = 16  # 1 msec, i.e., one feature frame per millisecond
+# samples kept on each side of a window for VotFrontEnd2, well beyond the reach of its analysis frames, so that the
+# features of a window do not depend on the audio outside of these margins
+FRONT_END_MARGIN = 1600  # 100 msec, a whole number of frames
+# column of the RAPT voicing (0 for unvoiced frames) in the features of VotFrontEnd2
+VOICING = 7
+
+Window = namedtuple('Window', ['wav_filename', 'window_min', 'window_max', 'vot_min', 'vot_max'])
+
+_input_line = re.compile(r'^"(.*)"\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)')
+
+
+def read_input_file(input_filename):
+    """ read the window list written by textgrid2front_end """
+    windows = list()
+    for line in open(input_filename):
+        match = _input_line.match(line.strip())
+        if not match:
+            continue
+        windows.append(Window(match.group(1), *[float(x) for x in match.groups()[1:]]))
+    return windows
+
+
+def window_labels(window):
+    """ the VOT boundaries in frames, relative to the beginning of the window """
+    return (int(round((window.vot_min - window.window_min) * 1000)),
+            int(round((window.vot_max - window.window_min) * 1000)))
+
+
+def front_end_span(window):
+    """ the samples [first, last) VotFrontEnd2 may read for a window: the window on whole frames, with a margin of
+    FRONT_END_MARGIN on each side """
+    return (int(round(window.window_min * 1000)) * FRAME_SHIFT - FRONT_END_MARGIN,
+            int(round(window.window_max * 1000)) * FRAME_SHIFT + FRONT_END_MARGIN)
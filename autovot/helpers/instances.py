@@ -0,0 +1,188 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# instances.py: the VOT instances (search windows and VOT intervals)
+# defined by the tiers of a TextGrid.
+#
+
+import logging
+import re
+
+
+logger = logging.getLogger(__name__)
+
+
+class Instance:
+    def __init__(self):
+        self.wav_filename = ""
+        self.window_min = 0
+        self.window_max = 0
+        self.vot_min = 0
+        self.vot_max = 0
+
+    def set(self, wav_filename, window_min, window_max, vot_min, vot_max):
+        self.wav_filename = wav_filename
+        self.window_min = window_min
+        self.window_max = window_max
+        self.vot_min = vot_min
+        self.vot_max = vot_max
+
+    def __str__(self):
+        return '"%s" %.3f %.3f %.3f %.3f [seconds]\n' % (self.wav_filename, self.window_min, self.window_max,
+                                                         self.vot_min, self.vot_max)
+        ## the following lines refer to the old VotFrontEnd (that cannot deal with WAV file names that have spaces in
+        ## their names:
+        ##return '%s %d %d %d %d\n' % (self.wav_filename, int(16000*self.window_min), int(16000*self.window_max),
+        ##                             int(16000*self.vot_min), int(16000*self.vot_max))
+
+
+class TierDefinitions:
+    def __init__(self, vot_tier='', vot_mark='*', window_tier='', window_mark='*', window_min=0, window_max=0,
+                 max_num_instances=-1):
+        self.vot_tier = vot_tier
+        self.vot_mark = vot_mark
+        self.window_tier = window_tier
+        self.window_mark = window_mark
+        self.window_min = window_min
+        self.window_max = window_max
+        self.max_num_instances = max_num_instances
+
+    def extract_definition(self, args):
+        try:
+            self.vot_tier = args.vot_tier
+        except:
+            pass
+        try:
+            self.vot_mark = args.vot_mark
+        except:
+            pass
+        try:
+            self.window_tier = args.window_tier
+        except:
+            pass
+        try:
+            self.window_mark = args.window_mark
+        except:
+            pass
+        try:
+            self.window_min = args.window_min
+        except:
+            pass
+        try:
+            self.window_max = args.window_max
+        except:
+            pass
+        try:
+            self.max_num_instances = args.max_num_instances
+        except:
+            pass
+
+    def __str__(self):
+        return "vot tier=%s mark=%s  window tier=%s mark=%s min=%d max=%d  max_num_instances=%d" % \
+               (self.vot_tier, self.vot_mark, self.window_tier, self.window_mark, self.window_min, self.window_max,
+                self.max_num_instances)
+
+
+def accepted_marks(mark):
+    """ the marks a tier definition selects, as accepted by IntervalTier.select: "*" stands for any non-blank mark """
+    if mark == "*":
+        return lambda label: re.search(r'\S', label) is not None
+    return mark
+
+
+def textgrid_instances(textgrid, definitions, wav_filename, wav_duration, textgrid_filename, problematic_files):
+    """ the instances (windows and VOTs) defined by the tiers of a TextGrid. Returns None if the TextGrid should be
+    skipped; files with problems are appended to problematic_files """
+
+    # extract tier names
+    tier_names = textgrid.tierNames()
+
+    instances = list()
+
+    # check if the VOT tier is one of the tiers in the TextGrid
+    if definitions.vot_tier in tier_names:
+        tier_index = tier_names.index(definitions.vot_tier)
+        tier = textgrid[tier_index]
+        # run over the intervals of the tier with the given mark
+        selected = tier.select(accepted_marks(definitions.vot_mark))
+        for vot_min, vot_max in zip(tier.xmins()[selected].tolist(), tier.xmaxs()[selected].tolist()):
+            window_min = max(vot_min + definitions.window_min, 0)
+            window_max = min(min(vot_max + definitions.window_max, textgrid.xmax()), wav_duration)
+            new_instance = Instance()
+            new_instance.set(wav_filename, window_min, window_max, vot_min, vot_max)
+            instances.append(new_instance)
+        # check if the given mark was ever found
+        if not instances:
+            logger.warning("The mark '%s' has not found in tier '%s' of %s" % (definitions.vot_mark,
+                                                                                definitions.vot_tier,
+                                                                                textgrid_filename))
+            problematic_files.append(textgrid_filename)
+            return None
+
+        # if the window tier is empty and not decoding, fix window information
+        if definitions.window_tier == "":
+            logger.debug("--window_tier and --window_mark were not given - using defaults.")
+            for i in range(1, len(instances) - 1):
+                # check if window_min is less than the previous vot_max
+                if instances[i].window_min < instances[i - 1].vot_max:
+                    instances[i].window_min = max(instances[i].vot_min - 0.02, instances[i - 1].vot_max + 0.02)
+                # check if window_max is greater than the next vot_min
+                if instances[i].window_max > instances[i + 1].vot_min:
+                    instances[i].window_max = min(instances[i].vot_max + 0.02, instances[i + 1].vot_min - 0.02)
+                # check for consistency
+                if instances[i].window_min > instances[i].vot_min \
+                        or instances[i].vot_min > instances[i].window_max \
+                        or instances[i].window_min > instances[i].vot_max \
+                        or instances[i].window_max < instances[i].vot_max:
+                    logger.error("Something wrong in the TextGrid VOT tier: %s" % instances[i])
+                    problematic_files.append(textgrid_filename)
+
+    elif definitions.vot_tier != "":
+        logger.error("The VOT tier '%s' has not found in %s" % (definitions.vot_tier, textgrid_filename))
+        problematic_files.append(textgrid_filename)
+        return None
+
+    # check if the window tier is one of the tiers in the TextGrid
+    if definitions.window_tier in tier_names:
+        tier_index = tier_names.index(definitions.window_tier)
+        tier = textgrid[tier_index]
+        # run over the intervals of the tier with the given mark
+        selected = tier.select(accepted_marks(definitions.window_mark))
+        for window_min, window_max in zip(tier.xmins()[selected].tolist(), tier.xmaxs()[selected].tolist()):
+            new_instance = Instance()
+            new_instance.set(wav_filename, window_min, window_max, window_min, window_max)
+            instances.append(new_instance)
+        # check if the given mark was ever found
+        if not instances:
+            logger.warning("The mark '%s' has not found in tier '%s' of %s" % (definitions.window_mark,
+                                                                                definitions.window_tier,
+                                                                                textgrid_filename))
+            problematic_files.append(textgrid_filename)
+            return None
+    elif definitions.window_tier != "":
+        logger.error("The window tier '%s' has not found in %s" % (definitions.window_tier, textgrid_filename))
+        problematic_files.append(textgrid_filename)
+        return None
+
+    return instances
+
+
+def limit_instances(instances, definitions):
+    if definitions.max_num_instances > 0:
+        return instances[:definitions.max_num_instances]
+    return instances
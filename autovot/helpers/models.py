@@ -0,0 +1,153 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# models.py: model registry. Resolves models by name or path, compiles
+# the .pos/.neg weight files into a memory-mappable binary blob with a
+# content hash, and keeps the loaded models of the process in a cache.
+#
+
+import hashlib
+import logging
+import os
+import struct
+
+import numpy as np
+
+from .decoder import VotModel, read_weights
+
+
+logger = logging.getLogger(__name__)
+
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+DEFAULT_MODEL = 'vot_predictor.amanda.max_num_instances_1000.model'
+BINARY_SUFFIX = '.bin'
+
+# blob layout: magic, version, number of .pos and .neg weights (-1: no .neg), sha256 of the weights, then the
+# float64 weights, little endian, starting at HEADER_SIZE
+MAGIC = b'AUTOVOT\0'
+VERSION = 1
+_header = struct.Struct('<8sIii32s')
+HEADER_SIZE = 64
+
+_cache = dict()
+
+
+def list_models():
+    """ names of the models shipped in the models directory """
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(MODELS_DIR) if name.endswith('.pos'))
+
+
+def resolve_model(model):
+    """ the base filename (without .pos/.neg) of a model given by path or by its name in the models directory.
+    An empty name resolves to the default model """
+    model = model or DEFAULT_MODEL
+    for suffix in ('.pos', '.neg', BINARY_SUFFIX):
+        if model.endswith(suffix):
+            model = model[:-len(suffix)]
+    candidates = [model]
+    if not os.path.dirname(model):
+        candidates += [os.path.join(MODELS_DIR, model), os.path.join(MODELS_DIR, model + '.model')]
+    for candidate in candidates:
+        if os.path.isfile(candidate + '.pos') or os.path.isfile(candidate + BINARY_SUFFIX):
+            return os.path.abspath(candidate)
+    raise FileNotFoundError("Unable to find the model '%s' (looked for %s)" %
+                            (model, ', '.join(candidate + '.pos' for candidate in candidates)))
+
+
+def weights_hash(pos, neg):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(pos, dtype='<f8').tobytes())
+    if neg is not None:
+        digest.update(b'neg')
+        digest.update(np.ascontiguousarray(neg, dtype='<f8').tobytes())
+    return digest.digest()
+
+
+def compile_model(model_filename, blob_filename=None):
+    """ convert the .pos/.neg text files of a model into a binary blob. Returns the name of the blob """
+    pos = read_weights(model_filename + '.pos')
+    neg = read_weights(model_filename + '.neg') if os.path.isfile(model_filename + '.neg') else None
+    blob_filename = blob_filename or model_filename + BINARY_SUFFIX
+    header = _header.pack(MAGIC, VERSION, len(pos), -1 if neg is None else len(neg), weights_hash(pos, neg))
+    temp_filename = '%s.%d.tmp' % (blob_filename, os.getpid())
+    with open(temp_filename, 'wb') as blob:
+        blob.write(header.ljust(HEADER_SIZE, b'\0'))
+        blob.write(pos.astype('<f8').tobytes())
+        if neg is not None:
+            blob.write(neg.astype('<f8').tobytes())
+    os.replace(temp_filename, blob_filename)  # atomic, so concurrent workers never read a partial blob
+    return blob_filename
+
+
+def read_blob(blob_filename, name=''):
+    """ memory-map a compiled model """
+    with open(blob_filename, 'rb') as blob:
+        magic, version, num_pos, num_neg, digest = _header.unpack(blob.read(_header.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("%s is not a compiled AutoVOT model" % blob_filename)
+    weights = np.memmap(blob_filename, dtype='<f8', mode='r', offset=HEADER_SIZE)
+    neg = weights[num_pos:num_pos + num_neg] if num_neg >= 0 else None
+    model = VotModel(weights[:num_pos], neg, name=name)
+    model.hash = digest.hex()
+    return model
+
+
+def _sources(model_filename):
+    return [filename for filename in (model_filename + '.pos', model_filename + '.neg') if os.path.isfile(filename)]
+
+
+def _signature(filenames):
+    stats = [os.stat(filename) for filename in filenames]
+    return tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+
+
+def get_model(model=''):
+    """ the model given by name or path, loaded at most once per process. The binary blob is (re)compiled when it
+    is missing or older than the weight files; if it cannot be written, the weights are read from the text files """
+    model_filename = resolve_model(model)
+    blob_filename = model_filename + BINARY_SUFFIX
+    sources = _sources(model_filename)
+    signature = _signature(sources + [blob_filename] if os.path.isfile(blob_filename) else sources)
+    cached = _cache.get(model_filename)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    if sources and (not os.path.isfile(blob_filename)
+                    or os.path.getmtime(blob_filename) < max(os.path.getmtime(source) for source in sources)):
+        try:
+            compile_model(model_filename, blob_filename)
+            logger.debug("compiled %s" % blob_filename)
+        except OSError as exception:
+            logger.debug("unable to write %s (%s), reading the weight files" % (blob_filename, exception))
+            blob_filename = None
+    if blob_filename:
+        loaded = read_blob(blob_filename, name=model_filename)
+    else:
+        pos = read_weights(model_filename + '.pos')
+        neg = read_weights(model_filename + '.neg') if os.path.isfile(model_filename + '.neg') else None
+        loaded = VotModel(pos, neg, name=model_filename)
+        loaded.hash = weights_hash(pos, neg).hex()
+
+    sources = _sources(model_filename)
+    _cache[model_filename] = (_signature(sources + [blob_filename] if blob_filename else sources), loaded)
+    return loaded
+
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,205 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# results.py: append-only columnar store of the VOTs measured over a
+# corpus. A store is a directory with one binary file per column, each
+# holding the values of the column as a flat little-endian array, so
+# that a column is read on its own, without touching the others. The
+# strings (file, speaker, stop, word and model) are stored as codes
+# into a text file of the distinct strings. All the files are only
+# appended to, one recording at a time; a recording without tokens is
+# appended as an empty chunk, so that it still replaces its old tokens.
+#
+
+import json
+import logging
+import os
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+STRINGS_FILENAME = 'strings.jsonl'
+
+# a measured token: the stop and the word it was measured in, the burst time (in seconds, on the time line of the
+# recording), the VOT (in seconds, negative for a negative VOT), the confidence of the prediction and whether the
+# stop is prevoiced
+Token = namedtuple('Token', ['speaker', 'stop', 'word', 'burst', 'vot', 'confidence', 'prevoiced'])
+
+STRING_COLUMNS = ('file', 'speaker', 'stop', 'word', 'model')
+COLUMNS = ('file', 'speaker', 'stop', 'word', 'burst', 'vot', 'confidence', 'prevoiced', 'model')
+# the type of the file of each column. 'chunk' is the number of the first row of the recording's tokens, which tells
+# appends for the same file apart
+COLUMN_TYPES = {'file': np.dtype('<i4'), 'speaker': np.dtype('<i4'), 'stop': np.dtype('<i4'),
+                'word': np.dtype('<i4'), 'model': np.dtype('<i4'), 'chunk': np.dtype('<i8'),
+                'burst': np.dtype('<f8'), 'vot': np.dtype('<f8'), 'confidence': np.dtype('<f8'),
+                'prevoiced': np.dtype('?')}
+# the row of an empty chunk: the file and the chunk, without a token (no speaker, stop, word or model)
+EMPTY_ROW = {'speaker': -1, 'stop': -1, 'word': -1, 'model': -1, 'burst': np.nan, 'vot': np.nan,
+             'confidence': np.nan, 'prevoiced': False}
+
+
+def column_filename(store_directory, column):
+    return os.path.join(store_directory, column + '.bin')
+
+
+def read_strings(store_directory):
+    """ the strings of a store, indexed by their code, and the size of the complete lines of the file (a line cut
+    short by a crash is ignored) """
+    try:
+        with open(os.path.join(store_directory, STRINGS_FILENAME), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    size = data.rfind(b'\n') + 1
+    return [json.loads(line) for line in data[:size].decode('utf-8').splitlines()], size
+
+
+def num_rows(store_directory):
+    """ the number of complete rows of a store: those that reached the files of all the columns (an append cut short
+    by a crash leaves the columns with different lengths) """
+    try:
+        return min(os.path.getsize(column_filename(store_directory, column)) // dtype.itemsize
+                   for column, dtype in COLUMN_TYPES.items())
+    except FileNotFoundError:
+        return 0
+
+
+class ResultsWriter:
+    """ appends the tokens of recordings to a store. The strings of a recording are written (and flushed) before
+    its rows, so that every row that reaches the disk can be decoded """
+
+    def __init__(self, store_directory):
+        self.directory = store_directory
+        os.makedirs(store_directory, exist_ok=True)
+        self.strings, size = read_strings(store_directory)
+        self.codes = {string: code for code, string in enumerate(self.strings)}
+        self.num_rows = num_rows(store_directory)
+        self.new_strings = list()
+        # drop what a crash left half written, before appending after it
+        self.strings_file = open(os.path.join(store_directory, STRINGS_FILENAME), 'ab')
+        self.strings_file.truncate(size)
+        self.column_files = dict()
+        for column, dtype in COLUMN_TYPES.items():
+            self.column_files[column] = open(column_filename(store_directory, column), 'ab')
+            self.column_files[column].truncate(self.num_rows * dtype.itemsize)
+
+    def code(self, string):
+        code = self.codes.get(string)
+        if code is None:
+            code = self.codes[string] = len(self.strings)
+            self.strings.append(string)
+            self.new_strings.append(string)
+        return code
+
+    def append(self, file, model, tokens):
+        """ append the tokens measured in a recording; they replace those appended for the same file earlier. A
+        recording without tokens (none were found, or it failed) is appended as an empty chunk, one row without a
+        token, which replaces them all the same """
+        if tokens:
+            columns = {'model': [self.code(model)] * len(tokens)}
+            for column in ('speaker', 'stop', 'word'):
+                columns[column] = [self.code(getattr(token, column)) for token in tokens]
+            for column in ('burst', 'vot', 'confidence', 'prevoiced'):
+                columns[column] = [getattr(token, column) for token in tokens]
+        else:
+            columns = {column: [value] for column, value in EMPTY_ROW.items()}
+        rows = len(columns['stop'])
+        columns['file'] = [self.code(file)] * rows
+        columns['chunk'] = [self.num_rows] * rows
+        if self.new_strings:
+            self.strings_file.write(''.join(json.dumps(string) + '\n' for string in self.new_strings).encode('utf-8'))
+            self.strings_file.flush()
+            self.new_strings = list()
+        for column, dtype in COLUMN_TYPES.items():
+            self.column_files[column].write(np.asarray(columns[column], dtype=dtype).tobytes())
+            self.column_files[column].flush()
+        self.num_rows += rows
+
+    def close(self):
+        self.strings_file.close()
+        for column_file in self.column_files.values():
+            column_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def read_column(store_directory, column, count):
+    """ the first count values of a column of a store """
+    if not count:
+        return np.zeros(0, dtype=COLUMN_TYPES[column])
+    return np.fromfile(column_filename(store_directory, column), dtype=COLUMN_TYPES[column], count=count)
+
+
+class Results(Mapping):
+    """ the columns of a store, as arrays (the string columns as arrays of str) in the order of COLUMNS, one row per
+    token. Each column is read from its file when it is first used. Tokens of a file that were replaced by a later
+    append (possibly an empty chunk) are left out, unless superseded is True. The rows are those complete when the
+    store was opened """
+
+    def __init__(self, store_directory, superseded=False):
+        self.directory = store_directory
+        self.superseded = superseded
+        self.num_rows = num_rows(store_directory)
+        self.columns = dict()
+        self.strings = None
+        self.rows = None
+
+    def token_rows(self):
+        """ which rows hold tokens (not empty chunks), of the latest chunk of their file unless superseded """
+        if self.rows is None:
+            self.rows = read_column(self.directory, 'stop', self.num_rows) >= 0
+            if not self.superseded:
+                files = read_column(self.directory, 'file', self.num_rows)
+                chunks = read_column(self.directory, 'chunk', self.num_rows)
+                latest = np.full(files.max() + 1 if len(files) else 0, -1, dtype=np.int64)
+                np.maximum.at(latest, files, chunks)
+                self.rows &= chunks == latest[files]
+        return self.rows
+
+    def __getitem__(self, column):
+        if column not in COLUMNS:
+            raise KeyError(column)
+        if column not in self.columns:
+            values = read_column(self.directory, column, self.num_rows)[self.token_rows()]
+            if column in STRING_COLUMNS:
+                if self.strings is None:
+                    strings = read_strings(self.directory)[0]
+                    self.strings = np.array(strings, dtype=str) if strings else np.zeros(0, dtype=str)
+                values = self.strings[values]
+            self.columns[column] = values
+        return self.columns[column]
+
+    def __iter__(self):
+        return iter(COLUMNS)
+
+    def __len__(self):
+        return len(COLUMNS)
+
+
+def read_results(store_directory, superseded=False):
+    """ the columns of a store (see Results), read as they are used """
+    return Results(store_directory, superseded)
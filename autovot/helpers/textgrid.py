@@ -17,65 +17,74 @@
 
 
 
+import codecs
 import logging
+import mmap
+import os
 import re
+import struct
+
+import numpy as np
 
 
 class mlf:
     """
     read in a HTK .mlf file. iterating over it gives you a list of 
-    TextGrids
+    TextGrids, read one utterance at a time (see mlf_utterances)
     """
 
     def __init__(self, file):
-        self.__items = []
-        self.__n = 0
-        text = open(file, 'r')
-        text.readline() # get rid of header
-        while 1: # loop over text
-            name = text.readline()[1:-1]
-            if name:
-                grid = TextGrid()
-                phon = IntervalTier('phones')
-                word = IntervalTier('words')
-                wmrk = ''
-                wsrt = 0.
-                wend = 0.
-                while 1: # loop over the lines in each grid
-                    line = text.readline().rstrip().split()
-                    if len(line) == 4: # word on this baby
-                        pmin = float(line[0]) / 10e6
-                        pmax = float(line[1]) / 10e6
-                        phon.append(Interval(pmin, pmax, line[2]))
-                        if wmrk:
-                            word.append(Interval(wsrt, wend, wmrk))
-                        wmrk = line[3]
-                        wsrt = pmin
-                        wend = pmax
-                    elif len(line) == 3: # just phone
-                        pmin = float(line[0]) / 10e6
-                        pmax = float(line[1]) / 10e6
-                        phon.append(Interval(pmin, pmax, line[2]))
-                        wend = pmax 
-                    else: # it's a period
-                        word.append(Interval(wsrt, wend, wmrk))
-                        self.__items.append(grid)
-                        break
-                grid.append(phon)
-                grid.append(word)
-                self.__n += 1
-            else:
-                text.close()
-                break
+        self.__file = file
+        self.__n = None
 
     def __iter__(self):
-        return iter(self.__items)
+        for name, phones, words in mlf_utterances(self.__file):
+            grid = TextGrid(name)
+            grid.append(phones)
+            grid.append(words)
+            yield grid
 
     def __len__(self):
+        if self.__n is None: # count the utterances without parsing them
+            with open(self.__file, 'r') as text:
+                self.__n = sum(1 for line in text if line.startswith('"'))
         return self.__n
 
     def __str__(self):
-        return '<MLF instance with %d TextGrids>' % self.__n
+        return '<MLF instance with %d TextGrids>' % len(self)
+
+def mlf_utterances(file):
+    """ read a HTK .mlf file one utterance at a time: yields the name of
+    each utterance with its 'phones' and 'words' IntervalTiers. A line with a
+    word label starts a new word, which lasts until the next one; times are
+    in units of 100 ns """
+    with open(file, 'r') as text:
+        text.readline() # get rid of header
+        for line in text: # loop over text
+            name = line.strip()[1:-1]
+            if not name:
+                continue
+            starts, ends, phones, words, word_starts = [], [], [], [], []
+            for line in text: # loop over the lines in each utterance
+                line = line.split()
+                if len(line) < 3: # it's a period
+                    break
+                starts.append(line[0])
+                ends.append(line[1])
+                phones.append(line[2])
+                if len(line) == 4: # word on this baby
+                    words.append(line[3])
+                    word_starts.append(len(phones) - 1)
+            starts = np.array(starts, dtype=np.float64) / 1e7
+            ends = np.array(ends, dtype=np.float64) / 1e7
+            xmax = float(ends[-1]) if len(ends) else 0.
+            phone_tier = IntervalTier('phones', 0., xmax)
+            phone_tier.extend_columns(starts, ends, phones)
+            word_tier = IntervalTier('words', 0., xmax)
+            word_starts = np.array(word_starts, dtype=int)
+            word_ends = np.append(word_starts[1:] - 1, len(phones) - 1)[:len(words)]
+            word_tier.extend_columns(starts[word_starts], ends[word_ends], words)
+            yield name, phone_tier, word_tier
 
 class TextGrid:
     """ represents Praat TextGrids as list of different types of tiers """
@@ -91,14 +100,17 @@ class TextGrid:
         return '<TextGrid with %d tiers>' % self.__n
 
     def __iter__(self):
-        return iter(self.__tiers)
+        return (self[i] for i in range(self.__n))
 
     def __len__(self):
         return self.__n
 
     def __getitem__(self, i):
         """ return the (i-1)th tier """
-        return self.__tiers[i] 
+        tier = self.__tiers[i]
+        if isinstance(tier, LazyTier):
+            tier = self.__tiers[i] = tier.parse()
+        return tier
 
     # Morgan Sonderegger
     def tierNames(self, case=None):
@@ -113,6 +125,10 @@ class TextGrid:
     def xmax(self):
         return self.__xmax
 
+    def renameTier(self, i, name):
+        """ rename the (i-1)th tier, without parsing it """
+        self.__tiers[i].rename(name)
+
     def append(self, tier):
         self.__tiers.append(tier)
         ## JosephKeshet
@@ -120,8 +136,6 @@ class TextGrid:
             self.__xmin = tier.xmin()
         else:
             self.__xmin = min(tier.xmin(), self.__xmin)
-        ## JosephKeshet
-        self.__xmax = max(tier.xmax(), self.__xmax)
         ## JosephKeshet / MS
         if self.__xmax is None:
             self.__xmax = tier.xmax()
@@ -130,242 +144,320 @@ class TextGrid:
         self.__n += 1
 
     def read(self, file):
-        """ read TextGrid from Praat .TextGrid file """
-        text = open(file, 'r')
-        text.readline() # header crap
-        text.readline()
-        text.readline()
-        self.__xmin = float(text.readline().rstrip().split()[2])
-        self.__xmax = float(text.readline().rstrip().split()[2])
-        text.readline()
-        m = int(text.readline().rstrip().split()[2]) # will be self.__n soon
-        text.readline()
-        for i in range(m): # loop over grids
-            text.readline()
-            if text.readline().rstrip().split()[2] == '"IntervalTier"':
-                # inam = text.readline().rstrip().split()[2][1:-1]
-                inam = text.readline().split('=')[1].strip().strip('"') # Joseph Keshet: handle space in the tier name
-                imin = float(text.readline().rstrip().split()[2])
-                imax = float(text.readline().rstrip().split()[2])
-                itie = IntervalTier(inam, imin, imax) # redundant FIXME
-                n = int(text.readline().rstrip().split()[3])
-                for j in range(n):
-                    try:
-                        text.readline().rstrip().split() # header junk
-                        jmin = float(text.readline().rstrip().split()[2])
-                        jmax = float(text.readline().rstrip().split()[2])
-                        # Morgan Sonderegger changed, to account for intervals where label
-                        # begins with spacing
-                        #jmrk = text.readline().rstrip().split()[2][1:-1]
-                        #jmrk = text.readline().split('=')[1].strip().strip('"') # Joseph Keshet: handle space in the
-                        # tier
-                        # name
-                        jmrk = getMark(text)
-                        #
-                        itie.append(Interval(jmin, jmax, jmrk))
-                    except:
-                        logging.error("Unable to parse TextGrid %s." % text.name)
-
-                self.append(itie) 
-            else: # pointTier
-                # inam = text.readline().rstrip().split()[2][1:-1]
-                inam = text.readline().split('=')[1].strip().strip('"') # Joseph Keshet: handle space in the tier name
-                imin = float(text.readline().rstrip().split()[2])
-                imax = float(text.readline().rstrip().split()[2])
-                itie = PointTier(inam, imin, imax) # redundant FIXME
-                n = int(text.readline().rstrip().split()[3])
-                for j in range(n):
-                    text.readline().rstrip() # header junk
-                    jtim = float( text.readline().rstrip().split()[2])
-                    jmrk = text.readline().rstrip().split()[2][1:-1]
-                    itie.append(Point(jtim, jmrk))
-                self.append(itie)
-        text.close()
+        """ read TextGrid from Praat .TextGrid file, in the long or the short text format or in the binary format. In
+        the text formats, only the headers of the tiers are parsed here, the intervals (or points) of a tier are parsed
+        when the tier is first used """
+        try:
+            self.__xmin, self.__xmax, tiers = read_tiers(file)
+        except (IndexError, KeyError, ValueError) as exception:
+            raise ValueError("Unable to parse TextGrid %s (%s)." % (file, exception))
+        for tier in tiers:
+            self.append(tier)
+
+    def write(self, text, form = 'long'):
+        """ write it into a file that Praat can read, in the long or the
+        short text format or in the binary format (form is 'long', 'short'
+        or 'binary'). The file is assembled in memory and written at once """
+        if form == 'binary':
+            with open(text, 'wb') as f:
+                f.write(b''.join(binary_form(self)))
+        elif form in ('long', 'short'):
+            with open(text, 'w', encoding='utf-8') as f:
+                f.write(''.join(long_form(self) if form == 'long' else short_form(self)))
+        else:
+            raise ValueError("Unknown TextGrid format '%s'." % form)
 
-    def write(self, text):
-        """ write it into a text file that Praat can read """
-        text = open(text, 'w')
-        text.write('File type = "ooTextFile"\n')
-        text.write('Object class = "TextGrid"\n\n')
-        text.write('xmin = %f\n' % self.__xmin)
-        text.write('xmax = %f\n' % self.__xmax)
-        text.write('tiers? <exists>\n')
-        text.write('size = %d\n' % self.__n)
-        text.write('item []:\n')
-        for (tier, n) in zip(self.__tiers, range(1, self.__n + 1)):
-            text.write('\titem [%d]:\n' % n)
-            if tier.__class__ == IntervalTier: 
-                text.write('\t\tclass = "IntervalTier"\n')
-                text.write('\t\tname = "%s"\n' % tier.name())
-                text.write('\t\txmin = %f\n' % tier.xmin())
-                text.write('\t\txmax = %f\n' % tier.xmax())
-                text.write('\t\tintervals: size = %d\n' % len(tier))
-                for (interval, o) in zip(tier, range(1, len(tier) + 1)): 
-                    text.write('\t\t\tintervals [%d]:\n' % o)
-                    text.write('\t\t\t\txmin = %f\n' % interval.xmin())
-                    text.write('\t\t\t\txmax = %f\n' % interval.xmax())
-                    text.write('\t\t\t\ttext = "%s"\n' % interval.mark())
-            else: # PointTier
-                text.write('\t\tclass = "TextTier"\n')
-                text.write('\t\tname = "%s"\n' % tier.name())
-                text.write('\t\txmin = %f\n' % tier.xmin())
-                text.write('\t\txmax = %f\n' % tier.xmax())
-                text.write('\t\tpoints: size = %d\n' % len(tier))
-                for (point, o) in zip(tier, range(1, len(tier) + 1)):
-                    text.write('\t\t\tpoints [%d]:\n' % o)
-                    text.write('\t\t\t\ttime = %f\n' % point.time())
-                    text.write('\t\t\t\tmark = "%s"\n' % point.mark())
-        text.close()
+class ArrayTier:
+    """ storage shared by IntervalTier and PointTier: the times are kept in
+    contiguous float64 arrays and the marks as integer codes into the list of
+    the distinct marks (labels) of the tier. Intervals and points are created
+    on the fly when the tier is indexed or iterated """
 
-class IntervalTier:
-    """ represents IntervalTier as a list plus some features: min/max time, 
-    size, and tier name """
+    num_columns = 0 # number of time columns
 
     def __init__(self, name = None, xmin = None, xmax = None):
-        self.__n = 0
-        self.__name = name
-        self.__xmin = xmin
-        self.__xmax = xmax
-        self.__intervals = []
+        self._n = 0
+        self._name = name
+        self._xmin = xmin
+        self._xmax = xmax
+        self._columns = [np.empty(0) for _ in range(self.num_columns)]
+        self._codes = np.empty(0, dtype=np.int32)
+        self._labels = []
+        self._label_codes = {}
+
+    def __len__(self):
+        return self._n
+
+    def name(self):
+        return self._name
+
+    def rename(self, name):
+        self._name = name
+
+    def xmin(self):
+        return self._xmin
+
+    def xmax(self):
+        return self._xmax
+
+    def labels(self):
+        """ the distinct marks of the tier, indexed by their code """
+        return list(self._labels)
+
+    def code(self, mark):
+        """ the code of a mark (-1 if no interval or point has it) """
+        return self._label_codes.get(mark, -1)
+
+    def codes(self):
+        """ the code of the mark of each interval or point (read-only view) """
+        return _view(self._codes, self._n)
+
+    def marks(self):
+        labels = self._labels
+        return [labels[code] for code in self.codes().tolist()]
+
+    def _column(self, i):
+        return _view(self._columns[i], self._n)
+
+    def _code(self, mark):
+        code = self._label_codes.get(mark)
+        if code is None:
+            code = self._label_codes[mark] = len(self._labels)
+            self._labels.append(mark)
+        return code
+
+    def _reserve(self, n):
+        if n > len(self._codes): # grow geometrically, so that appending is amortized constant time
+            capacity = max(n, 2 * len(self._codes), 16)
+            self._columns = [_resized(column, self._n, capacity) for column in self._columns]
+            self._codes = _resized(self._codes, self._n, capacity)
+
+    def _append(self, times, mark):
+        self._reserve(self._n + 1)
+        for column, time in zip(self._columns, times):
+            column[self._n] = time
+        self._codes[self._n] = self._code(mark)
+        self._n += 1
+
+    def _extend(self, columns, marks):
+        n = len(marks)
+        self._reserve(self._n + n)
+        for column, times in zip(self._columns, columns):
+            column[self._n:self._n + n] = times
+        self._codes[self._n:self._n + n] = [self._code(mark) for mark in marks]
+        self._n += n
+
+    def _delete(self, i):
+        for column in self._columns + [self._codes]:
+            column[i:self._n - 1] = column[i + 1:self._n]
+        self._n -= 1
+
+    def _accepted(self, marks):
+        """ mask of the intervals or points whose mark is accepted: marks is a mark, a collection of marks or a
+        function returning True for the accepted marks (None accepts all). Each distinct mark is tested once """
+        if marks is None:
+            return np.ones(self._n, dtype=bool)
+        if callable(marks):
+            accepted = [code for code, label in enumerate(self._labels) if marks(label)]
+        elif isinstance(marks, str):
+            accepted = [self.code(marks)]
+        else:
+            accepted = [self.code(mark) for mark in marks]
+        lookup = np.zeros(len(self._labels) + 1, dtype=bool) # the last entry is for code -1 (unknown marks)
+        lookup[accepted] = True
+        lookup[-1] = False
+        return lookup[self.codes()]
+
+class IntervalTier(ArrayTier):
+    """ represents IntervalTier as arrays of start and end times and mark
+    codes plus some features: min/max time, size, and tier name """
+
+    num_columns = 2
 
     def __str__(self):
-        return '<IntervalTier "%s" with %d points>' % (self.__name, self.__n)
+        return '<IntervalTier "%s" with %d points>' % (self._name, self._n)
 
     def __iter__(self):
-        return iter(self.__intervals)
-
-    def __len__(self):
-        return self.__n
+        return map(Interval, self.xmins().tolist(), self.xmaxs().tolist(), self.marks())
 
     def __getitem__(self, i):
         """ return the (i-1)th interval """
-        return self.__intervals[i]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        i = range(self._n)[i]
+        return Interval(float(self._columns[0][i]), float(self._columns[1][i]), self._labels[self._codes[i]])
 
-    def xmin(self):
-        return self.__xmin
-
-    def xmax(self):
-        return self.__xmax
+    def xmins(self):
+        """ the start times of the intervals (read-only view) """
+        return self._column(0)
 
-    def name(self):
-        return self.__name
+    def xmaxs(self):
+        """ the end times of the intervals (read-only view) """
+        return self._column(1)
 
     def append(self, interval):
-        self.__intervals.append(interval)
-        self.__xmax = interval.xmax()
-        self.__n += 1
+        self._append((interval.xmin(), interval.xmax()), interval.mark())
+        self._xmax = interval.xmax()
+
+    def extend(self, intervals):
+        intervals = list(intervals)
+        self.extend_columns([interval.xmin() for interval in intervals], [interval.xmax() for interval in intervals],
+                            [interval.mark() for interval in intervals])
+
+    def extend_columns(self, xmins, xmaxs, marks):
+        """ append intervals given as sequences of start times, end times and marks """
+        self._extend((xmins, xmaxs), marks)
+        if len(marks):
+            self._xmax = float(xmaxs[-1])
+
+    def fill_gaps(self, xmin = None, xmax = None, mark = ''):
+        """ insert intervals with the given mark where the intervals do not
+        meet, and from xmin to the first interval and from the last interval
+        to xmax (by default, the limits of the tier), as Praat expects """
+        xmin = self._xmin if xmin is None else xmin
+        xmax = self._xmax if xmax is None else xmax
+        starts = np.append(self.xmins(), xmax)
+        ends = np.insert(self.xmaxs(), 0, xmin)
+        gaps = np.flatnonzero(starts > ends)
+        if not len(gaps):
+            return
+        xmins = np.insert(self.xmins(), gaps, ends[gaps])
+        xmaxs = np.insert(self.xmaxs(), gaps, starts[gaps])
+        codes = np.insert(self.codes(), gaps, self._code(mark))
+        self._n = 0
+        self._reserve(len(codes))
+        self._columns[0][:len(codes)] = xmins
+        self._columns[1][:len(codes)] = xmaxs
+        self._codes[:len(codes)] = codes
+        self._n = len(codes)
+        self._xmin, self._xmax = min(self._xmin, xmin), max(self._xmax, xmax)
+
+    def select(self, marks = None, xmin = None, xmax = None):
+        """ indices of the intervals with an accepted mark (see
+        ArrayTier._accepted) that lie within [xmin, xmax] """
+        selected = self._accepted(marks)
+        if xmin is not None:
+            selected &= self.xmins() >= xmin
+        if xmax is not None:
+            selected &= self.xmaxs() <= xmax
+        return np.flatnonzero(selected)
 
     # Morgan Sonderegger added
     def remove(self, interval):
         logging.debug("removing %d" % interval.xmin())
-        self.__intervals.remove(interval)
-        self.__n -= 1
+        matches = np.flatnonzero((self.xmins() == interval.xmin()) & (self.xmaxs() == interval.xmax())
+                                 & (self.codes() == self.code(interval.mark())))
+        if not len(matches):
+            raise ValueError("IntervalTier.remove(interval): interval not in tier")
+        self._delete(matches[0])
 
     def read(self, file):
         text = open(file, 'r')
         text.readline() # header junk 
         text.readline()
         text.readline()
-        self.__xmin = float(text.readline().rstrip().split()[2])
-        self.__xmax = float(text.readline().rstrip().split()[2])
-        self.__n = int(text.readline().rstrip().split()[3])
-        for i in range(self.__n):
+        self._xmin = float(text.readline().rstrip().split()[2])
+        self._xmax = float(text.readline().rstrip().split()[2])
+        n = int(text.readline().rstrip().split()[3])
+        xmins, xmaxs, marks = [], [], []
+        for i in range(n):
             text.readline().rstrip() # header
-            imin = float(text.readline().rstrip().split()[2]) 
-            imax = float(text.readline().rstrip().split()[2])
+            xmins.append(float(text.readline().rstrip().split()[2]))
+            xmaxs.append(float(text.readline().rstrip().split()[2]))
             # imrk = text.readline().rstrip().split()[2].replace('"', '') # txt
-            imrk = text.readline().split('=')[1].strip().strip('"') # Joseph Keshet: handle space in the mark
-            self.__intervals.append(Interval(imin, imax, imrk))
+            marks.append(text.readline().split('=')[1].strip().strip('"')) # Joseph Keshet: handle space in the mark
+        self._extend((xmins, xmaxs), marks)
         text.close()
 
     def write(self, file):
-        text = open(file, 'w')
-        text.write('File type = "ooTextFile"\n')
-        text.write('Object class = "IntervalTier"\n\n')
-        text.write('xmin = %f\n' % self.__xmin)
-        text.write('xmax = %f\n' % self.__xmax)
-        text.write('intervals: size = %d\n' % self.__n)
-        for (interval, n) in zip(self.__intervals, range(1, self.__n + 1)):
-            text.write('intervals [%d]:\n' % n)
-            text.write('\txmin = %f\n' % interval.xmin())
-            text.write('\txmax = %f\n' % interval.xmax())
-            text.write('\ttext = "%s"\n' % interval.mark())
-        text.close()
+        with open(file, 'w', encoding='utf-8') as text:
+            text.write(''.join(['File type = "ooTextFile"\n',
+                                'Object class = "IntervalTier"\n\n',
+                                'xmin = %f\n' % self._xmin,
+                                'xmax = %f\n' % self._xmax,
+                                'intervals: size = %d\n' % self._n] +
+                               _rows(self, 'intervals [%d]:\n\txmin = %f\n\txmax = %f\n\ttext = "%s"\n')))
 
-class PointTier:
-    """ represents PointTier (also called TextTier for some reason) as a list 
-    plus some features: min/max time, size, and tier name """
+class PointTier(ArrayTier):
+    """ represents PointTier (also called TextTier for some reason) as arrays
+    of times and mark codes plus some features: min/max time, size, and tier
+    name """
 
-    def __init__(self, name = None, xmin = None, xmax = None):
-        self.__n = 0
-        self.__name = name
-        self.__xmin = xmin
-        self.__xmax = xmax
-        self.__points = []
+    num_columns = 1
 
     def __str__(self):
-        return '<PointTier "%s" with %d points>' % (self.__name, self.__n)
+        return '<PointTier "%s" with %d points>' % (self._name, self._n)
 
     def __iter__(self):
-        return iter(self.__points)
-    
-    def __len__(self):
-        return self.__n
-    
+        return map(Point, self.times().tolist(), self.marks())
+
     def __getitem__(self, i):
         """ return the (i-1)th tier """
-        return self.__points[i]
-
-    def name(self):
-        return self.__name
-
-    def xmin(self):
-        return self.__xmin
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._n))]
+        i = range(self._n)[i]
+        return Point(float(self._columns[0][i]), self._labels[self._codes[i]])
 
-    def xmax(self): 
-        return self.__xmax
+    def times(self):
+        """ the times of the points (read-only view) """
+        return self._column(0)
 
     def append(self, point):
-        self.__points.append(point)
+        self._append((point.time(),), point.mark())
         ## MS: points don't have xmax, right?
-        # self.__xmax = point.xmax()
-        if self.__xmax is None:
-            self.__xmax = point.time()
-        else:
-            self.__max = max(point.time(), self.__xmax)
+        if self._xmax is None:
+            self._xmax = point.time()
         ## MS: do we then need to do this for xmin as well?
-        self.__n += 1
+
+    def extend(self, points):
+        points = list(points)
+        self.extend_columns([point.time() for point in points], [point.mark() for point in points])
+
+    def extend_columns(self, times, marks):
+        """ append points given as sequences of times and marks """
+        self._extend((times,), marks)
+        if self._xmax is None and len(marks):
+            self._xmax = float(times[0])
+
+    def select(self, marks = None, xmin = None, xmax = None):
+        """ indices of the points with an accepted mark (see
+        ArrayTier._accepted) that lie within [xmin, xmax] """
+        selected = self._accepted(marks)
+        if xmin is not None:
+            selected &= self.times() >= xmin
+        if xmax is not None:
+            selected &= self.times() <= xmax
+        return np.flatnonzero(selected)
 
     def read(self, file):
         text = open(file, 'r')
         text.readline() # header junk 
         text.readline()
         text.readline()
-        self.__xmin = float(text.readline().rstrip().split()[2])
-        self.__xmax = float(text.readline().rstrip().split()[2])
-        self.__n = int(text.readline().rstrip().split()[3])
-        for i in range(self.__n):
+        self._xmin = float(text.readline().rstrip().split()[2])
+        self._xmax = float(text.readline().rstrip().split()[2])
+        n = int(text.readline().rstrip().split()[3])
+        times, marks = [], []
+        for i in range(n):
             text.readline().rstrip() # header
-            itim = float(text.readline().rstrip().split()[2])
-            imrk = text.readline().rstrip().split()[2].replace('"', '') # txt
-            self.__points.append(Point(imrk, itim))
+            times.append(float(text.readline().rstrip().split()[2]))
+            marks.append(text.readline().rstrip().split()[2].replace('"', '')) # txt
+        self._extend((times,), marks)
         text.close()
 
     def write(self, file):
-        text = open(file, 'w')
-        text.write('File type = "ooTextFile"\n')
-        text.write('Object class = "TextTier"\n\n')
-        text.write('xmin = %f\n' % self.__xmin)
-        text.write('xmax = %f\n' % self.__xmax)
-        text.write('points: size = %d\n' % self.__n)
-        for (point, n) in zip(self.__points, range(1, self.__n + 1)):
-            text.write('points [%d]:\n' % n)
-            text.write('\ttime = %f\n' % point.time())
-            text.write('\tmark = "%s"\n' % point.mark())
-        text.close()
+        with open(file, 'w', encoding='utf-8') as text:
+            text.write(''.join(['File type = "ooTextFile"\n',
+                                'Object class = "TextTier"\n\n',
+                                'xmin = %f\n' % self._xmin,
+                                'xmax = %f\n' % self._xmax,
+                                'points: size = %d\n' % self._n] +
+                               _rows(self, 'points [%d]:\n\ttime = %f\n\tmark = "%s"\n')))
 
 class Interval:
     """ represent an Interval """
+    __slots__ = ('__xmin', '__xmax', '__mark')
+
     def __init__(self, xmin, xmax, mark):
         self.__xmin = xmin
         self.__xmax = xmax
@@ -389,6 +481,8 @@ class Interval:
 
 class Point:
     """ represent a Point """
+    __slots__ = ('__time', '__mark')
+
     def __init__(self, time, mark):
         self.__time = time
         self.__mark = mark
@@ -402,12 +496,288 @@ class Point:
     def mark(self):
         return self.__mark
 
-# Morgan Sonderegger added: account for intervals with writing beginning with whitespace
-#def correctLine(line):
-def getMark(text):
-    line = text.readline().rstrip()
-    a = re.search('(\S+) (=) (".*")', line)
-    assert(a)
-    assert(len(a.groups())==3)
-    return a.groups()[2][1:-1]
-    
+def _resized(array, n, capacity):
+    resized = np.empty(capacity, dtype=array.dtype)
+    resized[:n] = array[:n]
+    return resized
+
+def _view(array, n):
+    view = array[:n]
+    view.flags.writeable = False
+    return view
+
+class LazyTier:
+    """ a tier of a TextGrid file whose header has been read but whose intervals (or points) have not been parsed
+    yet. TextGrid replaces it with the parsed tier when the tier is first used. The body is either the text of the
+    tier (long form) or a list of tokens starting at first (short form) """
+
+    def __init__(self, tier_class, name, xmin, xmax, size, body, first=0, file=''):
+        self.__class = tier_class
+        self.__name = name
+        self.__xmin = xmin
+        self.__xmax = xmax
+        self.__size = size
+        self.__body = body
+        self.__first = first
+        self.__file = file
+
+    def __str__(self):
+        return '<%s "%s" with %d points (not parsed)>' % (self.__class.__name__, self.__name, self.__size)
+
+    def __len__(self):
+        return self.__size
+
+    def name(self):
+        return self.__name
+
+    def rename(self, name):
+        self.__name = name
+
+    def xmin(self):
+        return self.__xmin
+
+    def xmax(self):
+        return self.__xmax
+
+    def parse(self):
+        tier = self.__class(self.__name, self.__xmin, self.__xmax)
+        fields = 3 if self.__class is IntervalTier else 2
+        if isinstance(self.__body, bytes):
+            tokens = _LONG_TOKENS.findall(self.__body)
+        else:
+            tokens = self.__body[self.__first:self.__first + fields * self.__size]
+        try:
+            if len(tokens) != fields * self.__size:
+                raise ValueError("%d values instead of %d" % (len(tokens), fields * self.__size))
+            marks = tokens[fields - 1::fields]
+            labels = {token: _string(token) for token in set(marks)} # decode each distinct mark once
+            marks = [labels[token] for token in marks]
+            if fields == 3:
+                tier.extend_columns(np.array(tokens[0::3], dtype=np.float64),
+                                    np.array(tokens[1::3], dtype=np.float64), marks)
+            else:
+                tier.extend_columns(np.array(tokens[0::2], dtype=np.float64), marks)
+        except ValueError as exception:
+            raise ValueError("Unable to parse the tier '%s' of TextGrid %s (%s)." % (self.__name, self.__file,
+                                                                                     exception))
+        self.__body = None
+        return tier
+
+
+# tokens of the Praat text format: strings (quotes inside are doubled), numbers and flags. The long form labels
+# every value ("xmin = 0", 'text = "a"') except the <exists> flag, so its values are found by searching for "= ";
+# the short form has one token per line, and lines starting with "!" are comments
+_STRING = re.compile(rb'"[^"]*(?:""[^"]*)*"')
+_LONG_FORM = re.compile(rb'\s*xmin = ')
+_LONG_TOKENS = re.compile(rb'= ("[^"]*(?:""[^"]*)*"|\S+)')
+_SHORT_TOKENS = re.compile(rb'(?m)^[ \t]*("[^"]*(?:""[^"]*)*"|[^\s!]\S*)')
+# the header of a tier in the long form
+_LONG_ITEM = re.compile(rb'item \[\d+\]:')
+_LONG_TIER = re.compile(rb'\s*class = ("[^"]*")\s*name = ("[^"]*(?:""[^"]*)*")\s*xmin = (\S+)\s*xmax = (\S+)'
+                        rb'\s*(?:intervals|points): size = (\d+)')
+
+_tier_classes = {b'"IntervalTier"': IntervalTier, b'"TextTier"': PointTier, b'"PointTier"': PointTier}
+
+
+# the Praat binary format: numbers are big-endian, class names have a one-byte length and strings a 16-bit length
+_BINARY_FORM = b'ooBinaryFile'
+_BINARY_DOUBLES = struct.Struct('>2d')
+_BINARY_COUNT = struct.Struct('>i')
+_BINARY_LENGTH = struct.Struct('>H')
+
+_binary_classes = {b'IntervalTier': IntervalTier, b'TextTier': PointTier}
+
+
+def read_tiers(filename):
+    """ xmin, xmax and the (not yet parsed) tiers of a TextGrid file, found by scanning the memory-mapped file.
+    In the long form, the tiers are located by their "item [i]:" headers and each keeps its own text, so only the
+    tiers that are used are ever tokenized; the short form is tokenized in one scan. UTF-16 files are converted to
+    UTF-8 first """
+    with open(filename, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise ValueError("empty file")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with data:
+        if data[:len(_BINARY_FORM)] == _BINARY_FORM:
+            return binary_tiers(data, filename)
+        text = data[:].decode('utf-16').encode('utf-8') if data[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) \
+            else data
+        file_type = _STRING.search(text)
+        object_class = file_type and _STRING.search(text, file_type.end())
+        if not object_class or (file_type.group(), object_class.group()) != (b'"ooTextFile"', b'"TextGrid"'):
+            raise ValueError("not a TextGrid")
+        start = object_class.end()
+        if _LONG_FORM.match(text, start):
+            tiers = long_form_tiers(text, start, filename)
+            if tiers is not None:
+                return tiers
+            tokens = _LONG_TOKENS.findall(text, start)
+            tokens.insert(2, b'<exists>' if len(tokens) > 2 else b'<absent>') # "tiers? <exists>" has no "= "
+        else:
+            tokens = _SHORT_TOKENS.findall(text, start)
+    return short_form_tiers(tokens, filename)
+
+
+def long_form_tiers(text, start, filename):
+    """ the tiers of a long form TextGrid, located by their headers. None if the headers are not as Praat writes
+    them (e.g. a label contains a header), the file is then read token by token """
+    items = list(_LONG_ITEM.finditer(text, start))
+    header = _LONG_TOKENS.findall(text, start, items[0].start() if items else len(text))
+    if len(header) != (3 if items else 2) or (items and int(header[2]) != len(items)):
+        return None
+    tiers = list()
+    for i, item in enumerate(items):
+        tier = _LONG_TIER.match(text, item.end())
+        if tier is None or tier.group(1) not in _tier_classes:
+            return None
+        end = items[i + 1].start() if i + 1 < len(items) else len(text)
+        tiers.append(LazyTier(_tier_classes[tier.group(1)], _string(tier.group(2)), float(tier.group(3)),
+                              float(tier.group(4)), int(tier.group(5)), text[tier.end():end], file=filename))
+    return float(header[0]), float(header[1]), tiers
+
+
+def short_form_tiers(tokens, filename):
+    """ the tiers of a TextGrid given as tokens, in the order of the short form """
+    tiers = list()
+    num_tiers = int(tokens[3]) if tokens[2] == b'<exists>' else 0
+    position = 4
+    for i in range(num_tiers):
+        tier_class = _tier_classes[tokens[position]]
+        first = position + 5
+        size = int(tokens[first - 1])
+        position = first + size * (3 if tier_class is IntervalTier else 2)
+        if position > len(tokens):
+            raise ValueError("tier %d is truncated" % (i + 1))
+        tiers.append(LazyTier(tier_class, _string(tokens[first - 4]), float(tokens[first - 3]),
+                              float(tokens[first - 2]), size, tokens, first, filename))
+    return float(tokens[0]), float(tokens[1]), tiers
+
+
+def binary_tiers(data, filename):
+    """ xmin, xmax and the tiers of a TextGrid in the Praat binary format. Its strings have variable lengths, so the
+    tiers can only be located by going through their intervals (or points): they are parsed here """
+    try:
+        position = len(_BINARY_FORM) + 1 + data[len(_BINARY_FORM)]
+        if data[len(_BINARY_FORM) + 1:position] != b'TextGrid':
+            raise ValueError("not a TextGrid")
+        xmin, xmax = _BINARY_DOUBLES.unpack_from(data, position)
+        num_tiers = _BINARY_COUNT.unpack_from(data, position + 17)[0] if data[position + 16] else 0
+        position += 21
+        tiers = list()
+        for i in range(num_tiers):
+            end = position + 1 + data[position]
+            tier_class = _binary_classes[data[position + 1:end]]
+            position = _binary_string_end(data, end)
+            tier = tier_class(_binary_text(data[end:position]), *_BINARY_DOUBLES.unpack_from(data, position))
+            size = _BINARY_COUNT.unpack_from(data, position + 16)[0]
+            position += 20
+            width = 8 * tier_class.num_columns
+            times, marks = list(), list()
+            for _ in range(size):
+                end = _binary_string_end(data, position + width)
+                times.append(data[position:position + width])
+                marks.append(data[position + width:end])
+                position = end
+            if position > len(data):
+                raise ValueError("tier %d is truncated" % (i + 1))
+            labels = {mark: _binary_text(mark) for mark in set(marks)} # decode each distinct mark once
+            times = np.frombuffer(b''.join(times), dtype=">f8").astype(np.float64).reshape(size, width // 8)
+            tier.extend_columns(*times.T, [labels[mark] for mark in marks])
+            tiers.append(tier)
+    except struct.error:
+        raise ValueError("truncated file")
+    return xmin, xmax, tiers
+
+
+def _binary_string_end(data, position):
+    """ the end of the binary string at position: a 16-bit length and ASCII
+    characters, or 0xFFFF, a 16-bit length and UTF-16 characters """
+    length = _BINARY_LENGTH.unpack_from(data, position)[0]
+    if length == 0xFFFF:
+        return position + 4 + 2 * _BINARY_LENGTH.unpack_from(data, position + 2)[0]
+    return position + 2 + length
+
+
+def _binary_text(string):
+    if string[:2] == b'\xff\xff':
+        return string[4:].decode('utf-16-be')
+    return string[2:].decode('latin-1')
+
+
+def _binary_string(text):
+    try:
+        string = text.encode('ascii')
+        return _BINARY_LENGTH.pack(len(string)) + string
+    except UnicodeEncodeError:
+        string = text.encode('utf-16-be')
+        return _BINARY_LENGTH.pack(0xFFFF) + _BINARY_LENGTH.pack(len(string) // 2) + string
+
+
+def _string(token):
+    """ the text of a string token: Praat doubles the quotes inside strings """
+    try:
+        text = token[1:-1].decode('utf-8')
+    except UnicodeDecodeError: # written by Praat as Latin-1
+        text = token[1:-1].decode('latin-1')
+    return text.replace('""', '"')
+
+
+def quote(text):
+    return text.replace('"', '""')
+
+
+def _rows(tier, row_format, numbered = True):
+    """ the intervals (or points) of a tier in a text format: row_format is
+    applied to the number (if numbered), the times and the quoted mark of
+    each. Each distinct mark is quoted once """
+    marks = [quote(label) for label in tier.labels()]
+    values = [tier._column(i).tolist() for i in range(tier.num_columns)]
+    values.append([marks[code] for code in tier.codes().tolist()])
+    if numbered:
+        values.insert(0, range(1, len(tier) + 1))
+    return [row_format % row for row in zip(*values)]
+
+
+def long_form(textgrid):
+    """ the text of a TextGrid in the long text format, in pieces """
+    text = ['File type = "ooTextFile"\nObject class = "TextGrid"\n\nxmin = %f\nxmax = %f\ntiers? <exists>\n'
+            'size = %d\nitem []:\n' % (textgrid.xmin(), textgrid.xmax(), len(textgrid))]
+    for n, tier in enumerate(textgrid, 1):
+        if tier.__class__ == IntervalTier:
+            text.append('\titem [%d]:\n\t\tclass = "IntervalTier"\n\t\tname = "%s"\n\t\txmin = %f\n\t\txmax = %f\n'
+                        '\t\tintervals: size = %d\n' % (n, quote(tier.name()), tier.xmin(), tier.xmax(), len(tier)))
+            text.extend(_rows(tier, '\t\t\tintervals [%d]:\n\t\t\t\txmin = %f\n\t\t\t\txmax = %f\n\t\t\t\ttext = "%s"\n'))
+        else: # PointTier
+            text.append('\titem [%d]:\n\t\tclass = "TextTier"\n\t\tname = "%s"\n\t\txmin = %f\n\t\txmax = %f\n'
+                        '\t\tpoints: size = %d\n' % (n, quote(tier.name()), tier.xmin(), tier.xmax(), len(tier)))
+            text.extend(_rows(tier, '\t\t\tpoints [%d]:\n\t\t\t\ttime = %f\n\t\t\t\tmark = "%s"\n'))
+    return text
+
+
+def short_form(textgrid):
+    """ the text of a TextGrid in the short text format (one value per line), in pieces """
+    text = ['File type = "ooTextFile"\nObject class = "TextGrid"\n\n%f\n%f\n<exists>\n%d\n'
+            % (textgrid.xmin(), textgrid.xmax(), len(textgrid))]
+    for tier in textgrid:
+        if tier.__class__ == IntervalTier:
+            text.append('"IntervalTier"\n"%s"\n%f\n%f\n%d\n' % (quote(tier.name()), tier.xmin(), tier.xmax(), len(tier)))
+            text.extend(_rows(tier, '%f\n%f\n"%s"\n', numbered=False))
+        else: # PointTier
+            text.append('"TextTier"\n"%s"\n%f\n%f\n%d\n' % (quote(tier.name()), tier.xmin(), tier.xmax(), len(tier)))
+            text.extend(_rows(tier, '%f\n"%s"\n', numbered=False))
+    return text
+
+
+def binary_form(textgrid):
+    """ the bytes of a TextGrid in the Praat binary format, in pieces """
+    data = [_BINARY_FORM, b'\x08TextGrid', _BINARY_DOUBLES.pack(textgrid.xmin(), textgrid.xmax()), b'\x01',
+            _BINARY_COUNT.pack(len(textgrid))]
+    for tier in textgrid:
+        tier_class = b'\x0cIntervalTier' if tier.__class__ == IntervalTier else b'\x08TextTier'
+        data.extend([tier_class, _binary_string(tier.name()), _BINARY_DOUBLES.pack(tier.xmin(), tier.xmax()),
+                     _BINARY_COUNT.pack(len(tier))])
+        marks = [_binary_string(label) for label in tier.labels()]
+        times = np.column_stack([tier._column(i) for i in range(tier.num_columns)]).astype('>f8').tobytes()
+        width = 8 * tier.num_columns
+        data.extend(times[width * i:width * (i + 1)] + marks[code] for i, code in enumerate(tier.codes().tolist()))
+    return data
@@ -23,6 +23,9 @@ import random
 import logging
 import wave
 
+from .binaries import run_binary
+
+
 def logging_defaults(logging_level="INFO"):
     logging.basicConfig(level=logging_level, format='%(asctime)s.%(msecs)d [%(filename)s] %(levelname)s: %(message)s',
                         datefmt='%H:%M:%S')
@@ -49,6 +52,15 @@ def easy_call(command):
         exit(-1)
 
 
+def binary_call(name, arguments, logging_level="INFO"):
+    """ run one of the AutoVOT programs (found on the PATH or in the autovot directory), exiting if it fails """
+    try:
+        run_binary(name, arguments, logging_level, capture_output=False)
+    except (OSError, RuntimeError) as exception:
+        logging.error(exception)
+        exit(-1)
+
+
 def random_shuffle_data(in_features_filename, in_labels_filename, out_features_filename, out_labels_filename):
 
     # open files
@@ -0,0 +1,396 @@
+#! /usr/bin/env python3
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# pipeline.py: times each stage of calculateVOT on a synthetic corpus,
+# and the whole pipeline. The corpus has WAV and TextGrid pairs of a
+# given duration, sample rate, number of channels and speakers, and
+# number of stops per second per speaker. The stages are the stop
+# tiers (processParameters and addStopTier), reading and resampling
+# the audio around the stops, feature extraction, decoding, and
+# writing the TextGrids; each is timed on the output of the previous
+# one. Features and decoding are the AutoVOT programs (VotFrontEnd2 on
+# the audio around the windows, VotDecode), as calculateVOT runs them.
+# The peak resident set size of each stage, and of the programs it
+# runs, is measured on an extra run in a child process. The tokens
+# (stops) per second and the memory of each stage are written to a
+# JSON file, to compare versions.
+#
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import autovot
+import calculateVOT
+from autovot.helpers.decoder import binary_decode, front_end_files, measurements
+from autovot.helpers.featurestore import read_feature_files
+from autovot.helpers.textgrid import TextGrid, IntervalTier
+
+STOP_LABELS = ('p', 't', 'k')
+WORD_LENGTH = 0.3  # seconds: a stop (closure, burst and aspiration) followed by a vowel
+STOP_LENGTH = 0.07
+BURST = 0.03  # seconds from the start of the stop
+VOWEL_PITCH = 120
+
+
+def stop_times(duration, density, rng):
+    """ the start times of the stops of a speaker: one per slot of 1/density seconds, at a random place in it """
+    num_stops = int(duration * density)
+    slot = duration / num_stops if num_stops else duration
+    return np.arange(num_stops) * slot + rng.uniform(0.05, slot - WORD_LENGTH - 0.05, num_stops)
+
+
+def synthetic_pair(basename, duration, sample_rate, num_channels, num_speakers, density, rng):
+    """ write basename.wav and basename.TextGrid. Each speaker speaks on channel speaker % num_channels; each of
+    their words is a voiceless stop (silence, a burst and aspiration noise) followed by a voiced vowel """
+    num_samples = int(duration * sample_rate)
+    audio = rng.normal(0, 30, (num_samples, num_channels))
+    vowel_time = np.arange(int((WORD_LENGTH - STOP_LENGTH) * sample_rate)) / sample_rate
+    vowel = sum(np.sin(2 * np.pi * VOWEL_PITCH * harmonic * vowel_time) / harmonic for harmonic in range(1, 11))
+    vowel *= 4000 * np.hanning(len(vowel))
+    aspiration_length = int((STOP_LENGTH - BURST) * sample_rate)
+
+    textgrid = TextGrid(basename)
+    for speaker in range(num_speakers):
+        starts = stop_times(duration, density, rng)
+        channel = audio[:, speaker % num_channels]
+        for start in starts:
+            first = int((start + BURST) * sample_rate)
+            channel[int(start * sample_rate):first] *= 0.1  # closure
+            channel[first:first + aspiration_length] += rng.normal(0, 3000, aspiration_length) * \
+                np.exp(-np.arange(aspiration_length) / (0.01 * sample_rate))
+            first += aspiration_length
+            channel[first:first + len(vowel)] += vowel
+
+        # tiers without gaps: blank intervals between the words
+        bounds = np.column_stack((starts, starts + WORD_LENGTH)).ravel()
+        word_bounds = np.concatenate(([0.0], bounds, [duration]))
+        words = IntervalTier('%d-words' % (speaker + 1), 0.0, duration)
+        words.extend_columns(word_bounds[:-1], word_bounds[1:], ['', 'ta'] * len(starts) + [''])
+        phone_bounds = np.column_stack((starts, starts + STOP_LENGTH, starts + WORD_LENGTH)).ravel()
+        phone_bounds = np.concatenate(([0.0], phone_bounds, [duration]))
+        labels = list()
+        for label in rng.choice(STOP_LABELS, len(starts)):
+            labels += ['', str(label), 'a']
+        phones = IntervalTier('%d-phones' % (speaker + 1), 0.0, duration)
+        phones.extend_columns(phone_bounds[:-1], phone_bounds[1:], labels + [''])
+        textgrid.append(words)
+        textgrid.append(phones)
+    textgrid.write(basename + '.TextGrid')
+
+    with wave.open(basename + '.wav', 'wb') as wav_file:
+        wav_file.setnchannels(num_channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.clip(audio, -32768, 32767).astype('<i2').tobytes())
+
+
+def synthetic_corpus(directory, num_files, duration, sample_rate, num_channels, num_speakers, density, seed=0):
+    """ write num_files synthetic WAV and TextGrid pairs to directory; returns their paths """
+    rng = np.random.default_rng(seed)
+    pairs = list()
+    for i in range(num_files):
+        basename = os.path.join(directory, 'synthetic_%03d' % (i + 1))
+        synthetic_pair(basename, duration, sample_rate, num_channels, num_speakers, density, rng)
+        pairs.append((basename + '.wav', basename + '.TextGrid'))
+    return pairs
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """ the peak resident set size so far, in MB (ru_maxrss is in kB on Linux, in bytes on macOS) """
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def forked_run(function):
+    """ run function once in a child process. Returns its time, in seconds, and the peak RSS of the child process
+    (peak_rss_mb), how much it grew over the RSS the child started with, i.e. that of this process
+    (rss_growth_mb), and the largest peak RSS of the processes the run started (programs_peak_rss_mb), in MB. Unlike
+    a trace of the Python allocations, the RSS includes the memory of NumPy, the WAV reader and the C libraries """
+    sys.stdout.flush()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            # the peak RSS of a forked process starts at the RSS it was forked with
+            start_rss = peak_rss_mb()
+            start = time.perf_counter()
+            function()
+            seconds = time.perf_counter() - start
+            peak = peak_rss_mb()
+            result = {'seconds': seconds, 'peak_rss_mb': peak, 'rss_growth_mb': peak - start_rss,
+                      'programs_peak_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN)}
+            with os.fdopen(write_fd, 'w') as result_file:
+                json.dump(result, result_file)
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as result_file:
+        message = result_file.read()
+    _, status = os.waitpid(pid, 0)
+    if status:
+        raise RuntimeError('the measured run failed (status %d)' % status)
+    return json.loads(message)
+
+
+class Stages:
+    """ the time and the peak RSS of each stage. The memory is measured on an extra, untimed run in a child process,
+    so that the peak of a stage is not that of an earlier one """
+
+    def __init__(self, num_tokens):
+        self.num_tokens = num_tokens
+        self.results = dict()
+
+    def time(self, name, function, runs):
+        """ the best time of runs runs of function, and the memory of an extra one; returns the result of the last
+        run. With no runs, function only runs in the child process, which is timed """
+        best = None
+        result = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        measured = forked_run(function)
+        if best is None:
+            best = measured['seconds']
+        del measured['seconds']
+        self.results[name] = dict(seconds=best, tokens_per_second=self.num_tokens / best if best else None,
+                                  **measured)
+        print('%-12s %10.3fs %12.0f tokens/s %8.1f MB %8.1f MB %8.1f MB'
+              % (name, best, self.num_tokens / best if best else 0, measured['peak_rss_mb'],
+                 measured['rss_growth_mb'], measured['programs_peak_rss_mb']))
+        return result
+
+
+def stop_tiers(pairs, start_padding, end_padding, stops):
+    """ processParameters and addStopTier on each pair: (TextGrid, stop tiers, output name) """
+    result = list()
+    for wav_filename, textgrid_filename in pairs:
+        start, end, stop_labels = calculateVOT.processParameters(start_padding, end_padding, list(stops),
+                                                                 textgrid_filename)
+        result.append(calculateVOT.addStopTier(textgrid_filename, start, end, stop_labels))
+    return result
+
+
+def windows(pairs, annotations, distinct_channels):
+    """ the windows, the channel of each speaker and the definitions of each pair, as getPredictions finds them """
+    result = list()
+    for (wav_filename, textgrid_filename), (textgrid, tiers, _) in zip(pairs, annotations):
+        definitions_list = [autovot.TierDefinitions(vot_tier=name, vot_mark="*", window_min=-0.05, window_max=0.8)
+                            for name in tiers]
+        info = autovot.wav_info(wav_filename)
+        channels = calculateVOT.speakerChannels(wav_filename, info.num_channels, len(tiers), 1, distinct_channels)
+        tier_windows = autovot.tier_windows(textgrid, definitions_list, info.num_frames / float(info.sample_rate),
+                                            wav_filename, textgrid_filename)
+        result.append((tier_windows, channels, definitions_list))
+    return result
+
+
+def read_audio(pairs, pair_windows):
+    """ the 16kHz audio of each speaker, read (and resampled) around the windows only """
+    result = list()
+    for (wav_filename, _), (tier_windows, channels, _) in zip(pairs, pair_windows):
+        spans = [autovot.front_end_span(window) for tier in tier_windows if tier for window in tier]
+        audio = dict(zip(sorted(set(channels)), autovot.read_spans(wav_filename, spans, 16000,
+                                                                  sorted(set(channels)))))
+        result.append([audio[channel] for channel in channels])
+    return result
+
+
+def features(pair_windows, pair_audio, features_dir):
+    """ VotFrontEnd2 on the audio around the windows of each tier: the directory of its files, the feature file
+    list, the labels file and the feature files of each tier """
+    result = list()
+    for i, ((tier_windows, _, _), audio) in enumerate(zip(pair_windows, pair_audio)):
+        tier_files = list()
+        for j, (samples, tier) in enumerate(zip(audio, tier_windows)):
+            if tier:
+                working_dir = os.path.join(features_dir, '%d_%d' % (i, j))
+                tier_files.append((working_dir,) + front_end_files(samples, tier, working_dir))
+            else:
+                tier_files.append(None)
+        result.append(tier_files)
+    return result
+
+
+def decode(pair_files, model):
+    """ VotDecode on the features of each tier: the features (as calculateVOT reads them back) and the predictions
+    of each tier """
+    result = list()
+    for tier_files in pair_files:
+        tier_decoded = list()
+        for files in tier_files:
+            if files is None:
+                tier_decoded.append(None)
+                continue
+            working_dir, features_filename, labels_filename, feature_filenames = files
+            predictions = binary_decode(features_filename, labels_filename, model, working_dir)
+            tier_decoded.append((read_feature_files(feature_filenames), predictions))
+        result.append(tier_decoded)
+    return result
+
+
+def write(annotations, output_directory, output_format):
+    for textgrid, _, save_name in annotations:
+        textgrid.write(os.path.join(output_directory, save_name), output_format)
+
+
+
+def batch(corpus_directory, output_directory, distinct_channels, jobs, output_format):
+    """ calculateVOTBatch on the corpus, without its progress output """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return calculateVOT.calculateVOTBatch(corpus_directory, [], output_directory, 0, 0, 1, distinct_channels, '',
+                                              jobs, '', output_format, True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time each stage of calculateVOT, and the whole pipeline, on a '
+                                                 'synthetic corpus')
+    parser.add_argument('--files', type=int, default=4, help='number of WAV and TextGrid pairs (default: '
+                                                             '%(default)s)')
+    parser.add_argument('--duration', type=float, default=60, help='duration of each recording, in seconds (default: '
+                                                                   '%(default)s)')
+    parser.add_argument('--sampleRate', type=int, default=44100, help='sample rate of the recordings (default: '
+                                                                      '%(default)s; 16000 reads them unconverted)')
+    parser.add_argument('--channels', type=int, default=1, help='number of channels (default: %(default)s)')
+    parser.add_argument('--speakers', type=int, default=1, help='number of speakers; with as many channels as '
+                                                                'speakers, each speaks on their own (default: '
+                                                                '%(default)s)')
+    parser.add_argument('--density', type=float, default=1.0, help='stops per second per speaker (default: '
+                                                                   '%(default)s; at most 2.5)')
+    parser.add_argument('--outputFormat', default='long', choices=['long', 'short', 'binary'],
+                        help='format of the TextGrids written (default: %(default)s)')
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes of the end-to-end run (default: '
+                                                            '%(default)s)')
+    parser.add_argument('--runs', type=int, default=3, help='number of runs of each stage, the best is reported '
+                                                            '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the corpus (default: %(default)s)')
+    parser.add_argument('--corpus', default='', help='directory where the corpus is written and kept (default: a '
+                                                     'temporary directory)')
+    parser.add_argument('--json', default='pipeline.json', help='file the results are written to (default: '
+                                                                '%(default)s)')
+    args = parser.parse_args()
+    if not 0 < args.density <= 2.5:  # the words (WORD_LENGTH) need room between them
+        parser.error('the density must be positive and at most 2.5 stops per second')
+    if args.speakers < 1 or args.channels < 1:
+        parser.error('there must be at least one speaker and one channel')
+    distinct_channels = args.channels > 1 and args.channels == args.speakers
+
+    json_filename = os.path.abspath(args.json)
+    work_dir = tempfile.mkdtemp()
+    corpus_dir = os.path.abspath(args.corpus) if args.corpus else os.path.join(work_dir, 'corpus')
+    os.makedirs(corpus_dir, exist_ok=True)
+    output_dir = os.path.join(work_dir, 'output')
+    os.makedirs(output_dir)
+
+    # the log file goes to the working directory; only errors are reported
+    os.chdir(work_dir)
+    calculateVOT.setupLogging()
+    calculateVOT.logger.setLevel(logging.ERROR)
+    logging.getLogger('autovot').setLevel(logging.ERROR)
+
+    start = time.perf_counter()
+    pairs = synthetic_corpus(corpus_dir, args.files, args.duration, args.sampleRate, args.channels, args.speakers,
+                             args.density, args.seed)
+    print('%d pairs of %.0f s (%d Hz, %d channels, %d speakers) generated in %.1f s'
+          % (args.files, args.duration, args.sampleRate, args.channels, args.speakers, time.perf_counter() - start))
+
+    model = autovot.get_model('')
+    annotations = stop_tiers(pairs, 0, 0, [])
+    pair_windows = windows(pairs, annotations, distinct_channels)
+    num_tokens = sum(len(tier) for tier_windows, _, _ in pair_windows for tier in tier_windows if tier)
+    print('%d tokens' % num_tokens)
+
+    stages = Stages(num_tokens)
+    print('%-12s %11s %19s %11s %11s %11s' % ('stage', 'time', 'throughput', 'peak RSS', 'growth', 'programs'))
+    stages.time('stopTiers', lambda: stop_tiers(pairs, 0, 0, []), args.runs)
+    pair_audio = stages.time('resampling', lambda: read_audio(pairs, pair_windows), args.runs)
+    features_dir = os.path.join(work_dir, 'features')
+    pair_files = stages.time('features', lambda: features(pair_windows, pair_audio, features_dir), args.runs)
+    pair_decoded = stages.time('decoding', lambda: decode(pair_files, model), args.runs)
+    for (textgrid, tiers, _), (tier_windows, _, _), tier_decoded in zip(annotations, pair_windows, pair_decoded):
+        for name, window_list, decoded in zip(tiers, tier_windows, tier_decoded):
+            if window_list:
+                features_list, predictions = decoded
+                textgrid.append(autovot.autovot_tier(measurements(window_list, features_list, predictions),
+                                                     textgrid.xmin(), textgrid.xmax(),
+                                                     name.replace('stops', 'AutoVOT')))
+    stages.time('writing', lambda: write(annotations, output_dir, args.outputFormat), args.runs)
+    del annotations, pair_audio, pair_files, pair_decoded
+    shutil.rmtree(features_dir)
+
+    # the whole pipeline, as the command line runs it on a directory (the model is already loaded), run and
+    # measured once in a child process: the programs include the worker processes with several jobs
+    end_to_end = os.path.join(work_dir, 'end_to_end')
+    stages.time('endToEnd', lambda: batch(corpus_dir, end_to_end, distinct_channels, args.jobs, args.outputFormat),
+                0)
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'corpus': {'files': args.files, 'duration': args.duration, 'sample_rate': args.sampleRate,
+                   'channels': args.channels, 'speakers': args.speakers, 'density': args.density,
+                   'seed': args.seed},
+        'output_format': args.outputFormat,
+        'jobs': args.jobs,
+        'runs': args.runs,
+        'tokens': num_tokens,
+        'stages': stages.results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    with open(json_filename, 'w') as json_file:
+        json.dump(results, json_file, indent=2)
+    print('results written to %s' % json_filename)
+
+    os.chdir(ROOT)
+    if args.corpus:
+        shutil.rmtree(output_dir)
+        shutil.rmtree(end_to_end, ignore_errors=True)
+        os.remove(os.path.join(work_dir, 'VOT-CP.log'))
+        os.rmdir(work_dir)
+    else:
+        shutil.rmtree(work_dir)
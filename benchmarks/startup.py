@@ -0,0 +1,91 @@
+#! /usr/bin/env python3
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# startup.py: checks the startup budget of the command line. It runs
+# 'calculateVOT.py --help' under 'python -X importtime', reports the
+# total import time and the slowest imports, and fails (exit status 1)
+# if the imports exceed the budget, if a heavy module (numpy,
+# parselmouth, praatio, scipy, autovot) is imported, or if the log file
+# is created.
+#
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('numpy', 'parselmouth', 'praatio', 'scipy', 'autovot')
+
+
+def import_times(command, cwd):
+    """ the cumulative import time (in ms) of each top-level import of a command run under 'python -X importtime',
+    and the modules it imported """
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=cwd, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = dict()
+    modules = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        if not name.startswith('  '):  # nested imports are included in the time of their top-level import
+            times[name.strip()] = int(cumulative) / 1000
+    return times, modules
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import time of 'calculateVOT.py --help' against a budget")
+    parser.add_argument('--budget', type=float, default=150, help='maximum total import time, in ms (default: '
+                                                                   '%(default)s)')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs, the best is reported (default: '
+                                                            '%(default)s)')
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports listed (default: %(default)s)')
+    args = parser.parse_args()
+
+    # run in an empty directory, to see whether the log file is created
+    work_dir = tempfile.mkdtemp()
+    command = [os.path.join(ROOT, 'calculateVOT.py'), '--help']
+    runs = [import_times(command, work_dir) for _ in range(args.runs)]
+    times, modules = min(runs, key=lambda run: sum(run[0].values()))
+    log_created = os.path.exists(os.path.join(work_dir, 'VOT-CP.log'))
+    if log_created:
+        os.remove(os.path.join(work_dir, 'VOT-CP.log'))
+    os.rmdir(work_dir)
+
+    total = sum(times.values())
+    print('%-32s %10s' % ('import', 'time'))
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print('%-32s %8.1fms' % (name, cumulative))
+    print('%-32s %8.1fms (budget %.1fms)' % ('total', total, args.budget))
+
+    failures = list()
+    if total > args.budget:
+        failures.append('the imports take %.1f ms, over the budget of %.1f ms' % (total, args.budget))
+    heavy = sorted(set(name.split('.')[0] for name in modules) & set(HEAVY_MODULES))
+    if heavy:
+        failures.append('heavy modules are imported: %s' % ', '.join(heavy))
+    if log_created:
+        failures.append('VOT-CP.log is created')
+    for failure in failures:
+        print('FAIL: %s' % failure)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,148 @@
+#! /usr/bin/env python3
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# textgrid_read.py: times the TextGrid reader on large multi-speaker
+# grids, reading all the tiers and reading a single tier, in the long
+# and the short text formats and in the binary format. The grids are
+# built by tiling the tiers of an example TextGrid. The reader of an earlier git revision and praatio
+# can be timed as a reference.
+#
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from autovot.helpers.textgrid import TextGrid, IntervalTier, PointTier, Interval, Point
+
+DEFAULT_TEXTGRID = os.path.join(ROOT, 'Examples', 'english_corpus',
+                                'DP_EN_03_EN_05_EN_EN_03_DP_EN_03_EN_05_EN_EN_05.TextGrid')
+
+
+def tiled_textgrid(textgrid_filename, repeat, speakers):
+    """ a TextGrid with the tiers of textgrid_filename repeated 'repeat' times in time and 'speakers' times in
+    number """
+    source = TextGrid()
+    source.read(textgrid_filename)
+    duration = source.xmax() - source.xmin()
+    textgrid = TextGrid()
+    for speaker in range(speakers):
+        for tier in source:
+            if isinstance(tier, IntervalTier):
+                tiled = IntervalTier('%d-%s' % (speaker + 1, tier.name()), source.xmin(), source.xmax())
+                tiled.extend(Interval(interval.xmin() + i * duration, interval.xmax() + i * duration, interval.mark())
+                             for i in range(repeat) for interval in tier)
+            else:
+                tiled = PointTier('%d-%s' % (speaker + 1, tier.name()), source.xmin(), source.xmax())
+                tiled.extend(Point(point.time() + i * duration, point.mark()) for i in range(repeat) for point in tier)
+            textgrid.append(tiled)
+    return textgrid
+
+
+def baseline_reader(revision):
+    """ the TextGrid class of helpers/textgrid.py at a git revision """
+    source = subprocess.check_output(['git', 'show', '%s:autovot/helpers/textgrid.py' % revision], cwd=ROOT)
+    module = types.ModuleType('textgrid_%s' % revision)
+    exec(compile(source, 'textgrid.py@%s' % revision, 'exec'), module.__dict__)
+    return module.TextGrid
+
+
+def best_time(function, runs):
+    times = list()
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def read_all(reader, filename):
+    textgrid = reader()
+    textgrid.read(filename)
+    for tier in textgrid:
+        for _ in tier:
+            pass
+
+
+def read_one(reader, filename, tier_name):
+    textgrid = reader()
+    textgrid.read(filename)
+    for _ in textgrid[textgrid.tierNames().index(tier_name)]:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the TextGrid reader on large multi-speaker grids')
+    parser.add_argument('--textgrid', default=DEFAULT_TEXTGRID, help='TextGrid whose tiers are tiled (default: the '
+                                                                      'English example)')
+    parser.add_argument('--repeat', type=int, default=10, help='number of copies of the tiers in time (default: '
+                                                               '%(default)s)')
+    parser.add_argument('--speakers', type=int, default=4, help='number of copies of the tiers, as speakers '
+                                                                '(default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs, the best is reported (default: '
+                                                            '%(default)s)')
+    parser.add_argument('--baseline', default='', help='also time the reader of this git revision (it only reads the '
+                                                       'long format)')
+    args = parser.parse_args()
+
+    readers = [('TextGrid', TextGrid)]
+    if args.baseline:
+        readers.append(('TextGrid@%s' % args.baseline, baseline_reader(args.baseline)))
+    try:
+        from praatio import tgio
+    except ImportError:
+        tgio = None
+
+    textgrid = tiled_textgrid(args.textgrid, args.repeat, args.speakers)
+    tier_name = textgrid.tierNames()[-1]
+    num_intervals = sum(len(tier) for tier in textgrid)
+    temp_dir = tempfile.mkdtemp()
+    long_filename = os.path.join(temp_dir, 'long.TextGrid')
+    textgrid.write(long_filename)
+    short_filename = os.path.join(temp_dir, 'short.TextGrid')
+    textgrid.write(short_filename, 'short')
+    binary_filename = os.path.join(temp_dir, 'binary.TextGrid')
+    textgrid.write(binary_filename, 'binary')
+    print('%d tiers, %d intervals, %.1f MB (long format), %.1f MB (short format), %.1f MB (binary format)'
+          % (len(textgrid), num_intervals, os.path.getsize(long_filename) / 1e6,
+             os.path.getsize(short_filename) / 1e6, os.path.getsize(binary_filename) / 1e6))
+
+    print('%-28s %-6s %12s %12s' % ('reader', 'format', 'all tiers', 'one tier'))
+    for name, reader in readers:
+        for form, filename in (('long', long_filename), ('short', short_filename), ('binary', binary_filename)):
+            if reader is not TextGrid and form != 'long':
+                continue
+            print('%-28s %-6s %10.1fms %10.1fms' % (name, form,
+                                                    1000 * best_time(lambda: read_all(reader, filename), args.runs),
+                                                    1000 * best_time(lambda: read_one(reader, filename, tier_name),
+                                                                     args.runs)))
+    if tgio is not None:
+        for form, filename in (('long', long_filename), ('short', short_filename)):
+            print('%-28s %-6s %10.1fms %12s' % ('praatio', form,
+                                                1000 * best_time(lambda: tgio.openTextgrid(filename), args.runs), '-'))
+
+    for filename in (long_filename, short_filename, binary_filename):
+        os.remove(filename)
+    os.rmdir(temp_dir)
@@ -1,30 +1,123 @@
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.INFO)
+loggingReady = False
 
-formatter = logging.Formatter('%(levelname)s: %(message)s')
 
-file_handler = logging.FileHandler("VOT-CP.log")
-file_handler.setFormatter(formatter)
+import os
+import sys
+import json
+from collections import namedtuple
 
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(formatter)
+# numpy, parselmouth and autovot are imported by the functions that use them, so that the command line starts quickly 
+# when nothing is processed (eg, with --help); see benchmarks/startup.py
 
-logger.addHandler(file_handler)
-logger.addHandler(stream_handler)
 
+# outcome of one wav/TextGrid pair in batch processing, with the tokens it measured (see stopTokens)
+BatchResult = namedtuple("BatchResult", ["wav", "TextGrid", "outputFile", "complete", "error", "tokens"], 
+	defaults=[None])
 
-import os
-import sys
-import argparse
-import tempfile
-import subprocess
-import parselmouth
-from praatio import tgio
-from collections import Counter
+# the stop windows of one recording, and what is needed to read and decode them (see getPredictions)
+StopWindows = namedtuple("StopWindows", ["model", "definitionsList", "channels", "tierWindows", "psnd"])
+
+# number of pairs each stage of the batch pipeline may hold ready for the next one
+PIPELINE_DEPTH = 2
+
+# seconds a stage of the batch pipeline waits on a queue before checking whether the pipeline was stopped
+POLL_INTERVAL = 0.1
+
+# parameters a request to the VOT service may set, and their type in form fields
+SERVICE_PARAMETERS = {"stops": list, "startPadding": float, "endPadding": float, "preferredChannel": int, 
+	"distinctChannels": bool, "trainedModel": str, "featureCache": str, "outputFormat": str}
+# the values the service accepts for its parameters that are choices
+SERVICE_CHOICES = {"outputFormat": ("long", "short", "binary")}
+
+# number of latest requests the latency percentiles of the VOT service are computed over
+LATENCY_WINDOW = 10000
+
+# file in the output directory recording the pairs a batch completed, so that later runs skip them
+MANIFEST = "VOT-CP_manifest.jsonl"
+
+# results store (a directory) in the output directory, holding the tokens measured by the batches (see 
+# autovot.read_results)
+RESULTS = "VOT-CP_results"
+
+def setupLogging():
+
+	# log to the terminal and to VOT-CP.log. Done once, when processing starts (not on import), so that the log file is 
+	# only created when there is something to log
+	global loggingReady
+	if loggingReady:
+		return
+	loggingReady = True
+
+	logger.setLevel(logging.INFO)
 
+	formatter = logging.Formatter('%(levelname)s: %(message)s')
 
+	file_handler = logging.FileHandler("VOT-CP.log")
+	file_handler.setFormatter(formatter)
+
+	stream_handler = logging.StreamHandler()
+	stream_handler.setFormatter(formatter)
+
+	logger.addHandler(file_handler)
+	logger.addHandler(stream_handler)
+
+class ErrorCollector(logging.Handler):
+
+	# keep the error messages logged while a pair is processed, to report them in its BatchResult; only those of one 
+	# thread, if given
+	def __init__(self, thread=None):
+		super().__init__(logging.ERROR)
+		self.messages = []
+		self.thread = thread
+
+	def emit(self, record):
+		if self.thread is None or record.thread == self.thread:
+			self.messages.append(record.getMessage().strip())
+
+def fileSignature(path):
+
+	# size and modification time of a file (None if it does not exist); they change whenever the file is rewritten
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None
+	return [stat.st_size, stat.st_mtime_ns]
+
+def readManifest(manifestFile):
+
+	# the entries of a batch manifest, by wav and TextGrid path. Later lines replace earlier ones, and a line cut 
+	# short by a crash is ignored
+	entries = {}
+	try:
+		with open(manifestFile, encoding="utf-8") as f:
+			for line in f:
+				try:
+					entry = json.loads(line)
+					entries[(entry["wav"], entry["TextGrid"])] = entry
+				except (ValueError, KeyError, TypeError):
+					continue
+	except OSError:
+		pass
+	return entries
+
+def manifestEntry(wav, TextGrid, outputFile, parameters):
+
+	# the record of a completed pair: its inputs, its parameters (including the model) and its output
+	return {"wav": os.path.abspath(wav), "TextGrid": os.path.abspath(TextGrid), 
+		"wavSignature": fileSignature(wav), "TextGridSignature": fileSignature(TextGrid), 
+		"parameters": parameters, "output": os.path.abspath(outputFile), "outputSignature": fileSignature(outputFile)}
+
+def isCurrent(entry, wav, TextGrid, parameters):
+
+	# a pair is current if it was completed with the same parameters, and neither its inputs nor its output changed 
+	# since
+	return entry is not None and entry["parameters"] == parameters \
+		and entry["wavSignature"] == fileSignature(wav) \
+		and entry["TextGridSignature"] == fileSignature(TextGrid) \
+		and entry["outputSignature"] is not None and entry["outputSignature"] == fileSignature(entry["output"])
 
 def approvedFileFormat(wav, TextGrid):
 
@@ -118,21 +211,30 @@ def addStopTier(
 	startPadding, 
 	endPadding, 
 	stops, 
-	outputPath
+	tg=None
 	):
 
-	# open textgrid
-	tg = tgio.openTextgrid(TextGrid)
+	from autovot.helpers import textgrid as autovotTextgrid
+
+	# open textgrid, unless it is already in memory (eg, an utterance of an MLF); it stays in memory until the 
+	# predictions are added, and is written once
+	if tg is None:
+		tg = autovotTextgrid.TextGrid()
+		try:
+			tg.read(TextGrid)
+		except (OSError, ValueError) as e:
+			logger.error("Unable to read {}: {}\n".format(TextGrid.split("/")[-1], e))
+			raise RuntimeError("    *** Process incomplete. ***")
 
 	# remove file path from TG name if present, for reporting purposes
 	TextGrid = TextGrid.split("/")[-1]
 
 	# verify that no 'AutoVOT' or 'stops' tiers exist. Reject TG with unnamed tiers
-	for tierName in tg.tierNameList:
+	for i, tierName in enumerate(tg.tierNames()):
 		if tierName == "AutoVOT":
 			logger.warning("A tier named 'AutoVOT' already exists. Said tier will be renamed as "\
 				"'autovot - original' to avoid a naming conflict.\n")
-			tg.renameTier("AutoVOT", "autovot - original")
+			tg.renameTier(i, "autovot - original")
 		elif tierName[-5:] == "stops":
 			logger.error("There is a tier with the word 'stops' in its label in {}. You must "\
 				"relabel said tier before continuing.\n".format(TextGrid))
@@ -143,246 +245,367 @@ def addStopTier(
 			raise RuntimeError("    *** Process incomplete. ***")
 	
 	# convert tier labels to lowercase
-	tg.tierNameList = [tierName.lower() for tierName in tg.tierNameList]
-	tg.tierDict = dict((k.lower(), v) for k, v in tg.tierDict.items())
+	for i, tierName in enumerate(tg.tierNames()):
+		tg.renameTier(i, tierName.lower())
+	tierIndex = {tierName: i for i, tierName in enumerate(tg.tierNames())}
+
+	# interval tiers must cover the whole TextGrid; gaps are filled with blank intervals
+	for tier in tg:
+		if isinstance(tier, autovotTextgrid.IntervalTier):
+			tier.fill_gaps(tg.xmin(), tg.xmax())
 
 	# collect all word tiers or terminate process if none exists
-	allWordTiers = [tierName for tierName in tg.tierNameList if "word" in tierName]
+	allWordTiers = [tierName for tierName in tg.tierNames() if "word" in tierName]
 	if len(allWordTiers) == 0:
 		logger.error("{} does not contain any tier labeled 'words'.\n".format(TextGrid))
 		raise RuntimeError("    *** Process incomplete. ***")
 
 	# collect all phone tiers or terminate process if none exists
-	allPhoneTiers = [tierName for tierName in tg.tierNameList if "phone" in tierName]
+	allPhoneTiers = [tierName for tierName in tg.tierNames() if "phone" in tierName]
 	if len(allPhoneTiers) == 0:
 		logger.error("{} does not contain any tier labeled 'phones'.\n".format(TextGrid))
 		raise RuntimeError("    *** Process incomplete. ***")
 
 	# verify that an equal number of word and phone tiers exists before continuing
-	if len(allWordTiers) == len(allPhoneTiers):
-
-		voicedTokens =[]
-		totalSpeakers = len(allPhoneTiers)
-		currentSpeaker = 0
-		lastSpeaker =	False
-		populatedTiers = 0
-
-		# add stop tier
-		for tierName in allPhoneTiers:
-			currentSpeaker += 1
-			if tierName.replace("phone", "word") in allWordTiers:
-				speakerName = tierName.split("phone")
-				if speakerName[1].lower().startswith('s'):
-					speakerName[1] = speakerName[1][1:]
-				phoneTier = tg.tierDict[tierName]
-				wordTier = tg.tierDict[tierName.replace("phone", "word")]
-				wordStartTimes = [int(entry[0]*100000) for entry in wordTier.entryList]
-				if totalSpeakers == currentSpeaker:
-					lastSpeaker = True
-				newTier = processStopTier(
-						phoneTier, 
-						stops, 
-						wordStartTimes, 
-						voicedTokens, 
-						startPadding, 
-						endPadding, 
-						TextGrid, 
-						lastSpeaker, 
-						speakerName
-						)
-				if newTier:
-					tg.addTier(newTier)
-					populatedTiers += 1
-				else:
-					continue
-			
-			else:
-				logger.error("The names of the 'word' and 'phone' tiers are inconsistent in file {}. "\
-					"Fix the issue before continuing.\n".format(TextGrid))
-				raise RuntimeError("    *** Process incomplete. ***")
-	
-	else:
+	if len(allWordTiers) != len(allPhoneTiers):
 		logger.error("There isn't an even number of 'phone' and 'word' tiers per speaker in file {}. "\
 			"Fix the issue before continuing.\n".format(TextGrid))
 		raise RuntimeError("    *** Process incomplete. ***")
 
-	if populatedTiers == 0:
+	# pair the phone and word tiers of each speaker
+	speakers = []
+	for tierName in allPhoneTiers:
+		if tierName.replace("phone", "word") not in allWordTiers:
+			logger.error("The names of the 'word' and 'phone' tiers are inconsistent in file {}. "\
+				"Fix the issue before continuing.\n".format(TextGrid))
+			raise RuntimeError("    *** Process incomplete. ***")
+		speakerName = tierName.split("phone")
+		if speakerName[1].lower().startswith('s'):
+			speakerName[1] = speakerName[1][1:]
+		speakers.append((speakerName, tg[tierIndex[tierName]], tg[tierIndex[tierName.replace("phone", "word")]]))
+
+	# add stop tiers, selected and padded for all speakers at once
+	newTiers = processStopTiers(speakers, stops, startPadding, endPadding, tg.xmin(), tg.xmax(), TextGrid)
+	for newTier in newTiers:
+		tg.append(newTier)
+
+	if len(newTiers) == 0:
 		logger.error("There were no voiceless stops found in {}.\n".format(TextGrid))
 		raise RuntimeError("    *** Process incomplete. ***")
 
 	# generate list of all stop tiers created
-	stopTiers = [tierName for tierName in tg.tierNameList if "stops" in tierName]
+	stopTiers = [tierName for tierName in tg.tierNames() if "stops" in tierName]
 
-	# save the new textgrid that contains one or more 'stops' tiers, using long form
+	# name of the new textgrid that contains one or more 'stops' tiers
 	saveName = TextGrid.split(".TextGrid")[0]+"_output.TextGrid"
-	tg.save(os.path.join(outputPath, saveName), useShortForm=False)
 	
-	return stopTiers, saveName
-
-def processStopTier(
-	phoneTier, 
+	return tg, stopTiers, saveName
+
+def wordInitialStops(phoneStarts, wordStarts, tolerance=0.00001):
+
+	import numpy as np
+
+	# mask of the phones that start a word. Each phone start is matched to the nearest word start with a binary 
+	# search, within the tolerance (10 µs, the resolution of the former integer matching)
+	wordStarts = np.sort(wordStarts)
+	if len(wordStarts) == 0 or len(phoneStarts) == 0:
+		return np.zeros(len(phoneStarts), dtype=bool)
+	position = np.searchsorted(wordStarts, phoneStarts)
+	previous = wordStarts[np.maximum(position - 1, 0)]
+	following = wordStarts[np.minimum(position, len(wordStarts) - 1)]
+	return np.minimum(np.abs(phoneStarts - previous), np.abs(following - phoneStarts)) <= tolerance
+
+def resolveConflicts(starts, ends, sameSpeaker):
+
+	import numpy as np
+
+	# apply the length and proximity rules to padded stops, given in order. sameSpeaker[i] tells whether stop i+1 
+	# follows stop i in the same speaker's tier. A stop shorter than 25 ms is elongated to 25 ms (except the last 
+	# stop of a speaker), and a stop starting within 20 ms of the end of the previous one is shifted to 21 ms after 
+	# the (elongated) end of the previous one. Shifting a stop can make it short, so the rules are applied until the 
+	# starts no longer change: each pass settles at least one more stop of every chain of conflicts
+	hasNext = np.append(sameSpeaker, False)
+	newStarts = starts
+	while True:
+		short = hasNext & (ends - newStarts < 0.025)
+		newEnds = np.where(short, newStarts + 0.025, ends)
+		near = sameSpeaker & (starts[1:] - newEnds[:-1] <= 0.020)
+		shiftedStarts = np.concatenate((starts[:1], np.where(near, newEnds[:-1] + 0.021, starts[1:])))
+		if np.array_equal(shiftedStarts, newStarts):
+			return newStarts, newEnds, short, near
+		newStarts = shiftedStarts
+
+def processStopTiers(
+	speakers, 
 	stops, 
-	wordStartTimes, 
-	voicedTokens, 
 	startPadding, 
 	endPadding, 
-	TextGrid, 
-	lastSpeaker, 
-	speakerName
+	xmin, 
+	xmax, 
+	TextGrid
 	):
 
+	import numpy as np
+	from autovot.helpers import textgrid as autovotTextgrid
+
 	# specify voiced stops
 	voicedStops = ['b', 'd', 'ɖ', 'ɟ', 'g', 'ɢ', 'ɓ', 'ɗ', 'ʄ', 'ɠ', 'ʛ']
-
-	# gather stops of interest from TextGrid
-	stopEntryList = []
-	for entry in phoneTier.entryList:
-		entryStart = int(entry[0]*100000)
-		if (entry[-1].lower() in stops or entry[-1] in stops) and entryStart in wordStartTimes:
-			stopEntryList.append(entry)
-			if entry[-1][0].lower() in voicedStops:
-				voicedTokens.append(entry[-1].lower())
-
-	# apply padding
-	extendedEntryList = []
-	for start, stop, label in stopEntryList:
-		extendedEntryList.append([start+startPadding, stop+endPadding, label])
-
-	# check for and resolve length requirements and timing conflicts
-	for interval in range(len(extendedEntryList)-1):
-		currentPhone = extendedEntryList[interval]
-		nextPhone = extendedEntryList[interval+1]
-		startTime, endTime = 0, 1
-
-		if currentPhone[endTime] > nextPhone[startTime]:  # check if there is an overlap between phones
+	stopSet = set(stops)
+
+	# gather the word-initial stops of interest of all speakers (labels are compared without surrounding blanks, 
+	# and blank words are not word starts)
+	speakerStops = []
+	for speakerName, phoneTier, wordTier in speakers:
+		candidates = phoneTier.select(lambda label: label.strip().lower() in stopSet or label.strip() in stopSet)
+		wordStarts = wordTier.xmins()[wordTier.select(lambda label: label.strip() != "")]
+		selected = candidates[wordInitialStops(phoneTier.xmins()[candidates], wordStarts)]
+		labels = phoneTier.labels()
+		speakerStops.append((phoneTier.xmins()[selected], phoneTier.xmaxs()[selected], 
+			[labels[code].strip() for code in phoneTier.codes()[selected].tolist()]))
+	voicedTokens = [label.lower() for _, _, stopLabels in speakerStops for label in stopLabels 
+		if label[0].lower() in voicedStops]
+
+	# apply padding, then resolve length requirements and timing conflicts, for all speakers at once
+	starts = np.concatenate([stopStarts for stopStarts, _, _ in speakerStops]) + startPadding
+	ends = np.concatenate([stopEnds for _, stopEnds, _ in speakerStops]) + endPadding
+	speakerIndex = np.repeat(np.arange(len(speakerStops)), [len(stopLabels) for _, _, stopLabels in speakerStops])
+	sameSpeaker = speakerIndex[1:] == speakerIndex[:-1]
+	newStarts, newEnds, short, near = resolveConflicts(starts, ends, sameSpeaker)
+
+	# report the conflicts in order; an overlap between phones stops the process
+	overlap = sameSpeaker & (ends[:-1] > starts[1:])
+	for i in np.flatnonzero(overlap | short[:-1] | near):
+		if overlap[i]:  # check if there is an overlap between phones
 			logger.error("In file {} (after adding padding), the segment starting at {:.3f} sec overlaps "\
 				"with the segment starting at {:.3f}."\
 				"\nYou might have to decrease the amount of padding and/or manually adjust segmentation to "\
 				"solve the conflicts."\
-				"\n\nProcess incomplete.\n".format(TextGrid, currentPhone[startTime], nextPhone[startTime]))
+				"\n\nProcess incomplete.\n".format(TextGrid, newStarts[i], starts[i+1]))
 			raise RuntimeError("    *** Process incomplete. ***")
-		elif currentPhone[endTime] - currentPhone[startTime] < 0.025:  # check if currentPhone is under 25ms
-			if nextPhone[startTime] - currentPhone[endTime] <= 0.020:  # check if nextPhone is within 20ms
-				currentPhone[endTime] = currentPhone[startTime] + 0.025  # make currentPhone 25ms long
-				nextPhone[startTime] = currentPhone[endTime] + 0.021  # shift nextPhone 21ms after currentPhone
-				logger.warning("In File {}, the phone starting at {:.3f} was elongaged to 25 ms because it "\
-					"did not meet length requirements, and the phone starting at {:.3f} was shifted forward "\
-					"due to a proximity issue. Please, verify manually that the modified windows still capture "\
-					"the segments accurately.\n".format(TextGrid, currentPhone[startTime], nextPhone[startTime]))
-			else:
-				currentPhone[endTime] = currentPhone[startTime] + 0.025  # make currentPhone 25ms long
-				logger.warning("In File {}, the phone starting at {:.3f} was elongaged to 25 ms because it did "\
-					"not meet length requirements.\n".format(TextGrid, currentPhone[startTime]))
+		elif short[i] and near[i]:
+			logger.warning("In File {}, the phone starting at {:.3f} was elongaged to 25 ms because it "\
+				"did not meet length requirements, and the phone starting at {:.3f} was shifted forward "\
+				"due to a proximity issue. Please, verify manually that the modified windows still capture "\
+				"the segments accurately.\n".format(TextGrid, newStarts[i], newStarts[i+1]))
+		elif short[i]:
+			logger.warning("In File {}, the phone starting at {:.3f} was elongaged to 25 ms because it did "\
+				"not meet length requirements.\n".format(TextGrid, newStarts[i]))
 		else:
-			if nextPhone[startTime] - currentPhone[endTime] <= 0.020:  # check if nextPhone is within 20ms
-				nextPhone[startTime] = currentPhone[endTime] + 0.021  # shift nextPhone 21ms after currentPhone
-				logger.warning("In File {}, the phone starting at {:.3f} was shifted forward due to a proximity "\
-					"issue.\n".format(TextGrid, nextPhone[startTime]))
-
-		if interval == len(extendedEntryList)-1 and nextPhone[endTime] - nextPhone[startTime] < 0.025:  # last segment
-			nextPhone[endTime] = nextPhone[startTime] + 0.025  # shift last phone's endTime 25 ms after startTime
+			logger.warning("In File {}, the phone starting at {:.3f} was shifted forward due to a proximity "\
+				"issue.\n".format(TextGrid, newStarts[i+1]))
 
 	# provide warning for voiced tokens
-	if len(list(set(voicedTokens))) == 1 and lastSpeaker:  # print only once, for last speaker
+	if len(list(set(voicedTokens))) == 1:
 		logger.warning("You're trying to obtain VOT calculations of the following voiced stop: '{}'"\
 		.format(*list(set(voicedTokens))))
 		logger.info("Note that AutoVOT's current model only works on voiceless stops; "\
 			"prevoicing in the productions may result in inaccurate calculations.\n")
-	elif len(list(set(voicedTokens))) > 1 and lastSpeaker:  # print only once, for last speaker
+	elif len(list(set(voicedTokens))) > 1:
 		logger.warning("You're trying to obtain VOT calculations of the following voiced stops: '{}'"\
 			.format("', '".join(list(set(voicedTokens)))))
 		logger.info("Note that AutoVOT's current model only works on voiceless stops; "\
 			"prevoicing in the productions may result in inaccurate calculations.\n")
 
-	# construct the stop tier if stops were identified
-	if len(extendedEntryList) > 0:
-		stopTier = phoneTier.new(name = speakerName[0]+"stops"+speakerName[1], entryList = extendedEntryList)
-		return stopTier		
-	else:
-		return False
-
-def getPredictions(wav, stopTiers, annotatedTextgrid, preferredChannel, distinctChannels, trainedModel):
+	# the last stop of a speaker is not elongated, so the padding may leave it without duration (shorter than 
+	# 10 ns, the shortest interval the TextGrid was ever written with): it is left out of the stop tier
+	empty = newEnds - newStarts < 0.00000001
+	for i in np.flatnonzero(empty):
+		logger.warning("In file {} (after adding padding), the segment starting at {:.3f} sec has no duration "\
+			"left, so it was left out.\nYou might have to decrease the amount of padding to keep it.\n"\
+			.format(TextGrid, starts[i]))
+
+	# the other stops must lie within the TextGrid and not overlap once shifted
+	shiftedOverlap = np.append(sameSpeaker & (newEnds[:-1] > newStarts[1:]), False)
+	for i in np.flatnonzero(~empty & ((newStarts < xmin) | (newEnds > xmax) | shiftedOverlap)):
+		if shiftedOverlap[i]:
+			logger.error("In file {} (after resolving timing conflicts), the segment starting at {:.3f} sec "\
+				"overlaps with the segment starting at {:.3f}.\nYou might have to decrease the amount of padding "\
+				"and/or manually adjust segmentation to solve the conflicts.\n".format(TextGrid, newStarts[i], 
+				newStarts[i+1]))
+		else:
+			logger.error("In file {} (after adding padding), the segment starting at {:.3f} sec exceeds the "\
+				"limits of the TextGrid ({:.3f} to {:.3f} sec).\nYou might have to decrease the amount of padding "\
+				"to solve the conflict.\n".format(TextGrid, newStarts[i], xmin, xmax))
+		raise RuntimeError("    *** Process incomplete. ***")
 
-	# track whether or not predictions were calculated
-	processComplete = False
+	# construct a stop tier for each speaker whose stops were identified, spanning the TextGrid with blank intervals 
+	# between the stops
+	newTiers = []
+	first = 0
+	for (speakerName, phoneTier, wordTier), (_, _, stopLabels) in zip(speakers, speakerStops):
+		last = first + len(stopLabels)
+		if len(stopLabels) > 0:
+			kept = first + np.flatnonzero(~empty[first:last])
+			bounds = np.empty(2 * len(kept) + 2)
+			bounds[0], bounds[-1] = xmin, xmax
+			bounds[1:-1:2], bounds[2:-1:2] = newStarts[kept], newEnds[kept]
+			marks = [""] * (2 * len(kept) + 1)
+			marks[1::2] = [stopLabels[i - first] for i in kept.tolist()]
+			# blank intervals shorter than the precision of the TextGrid are rounding noise
+			blank = np.arange(len(marks)) % 2 == 0
+			keep = np.flatnonzero(~blank | (bounds[1:] - bounds[:-1] >= 0.000001)).tolist()
+			stopTier = autovotTextgrid.IntervalTier(speakerName[0]+"stops"+speakerName[1], phoneTier.xmin(), 
+				phoneTier.xmax())
+			stopTier.extend_columns(bounds[:-1][keep], bounds[1:][keep], [marks[i] for i in keep])
+			newTiers.append(stopTier)
+		first = last
+	return newTiers
+
+def getPredictions(wav, stopTiers, textgrid, annotatedTextgrid, preferredChannel, distinctChannels, trainedModel, 
+	featureCache="", tokens=None):
+
+	# the three steps are separate, so that batch processing can run them concurrently on successive pairs (see 
+	# pipelinePairs)
+	windows = locateStops(wav, stopTiers, textgrid, annotatedTextgrid, preferredChannel, distinctChannels, trainedModel)
+	tierSamples = readStops(wav, windows)
+	return predictStops(wav, stopTiers, textgrid, annotatedTextgrid, windows, tierSamples, featureCache, tokens)
+
+def locateStops(wav, stopTiers, textgrid, annotatedTextgrid, preferredChannel, distinctChannels, trainedModel):
+
+	import autovot
+
+	# assign the trained model, by name or path (AutoVOT's pretrained model if none is given);
+	# models are loaded once per process
+	try:
+		model = autovot.get_model(trainedModel)
+	except (OSError, ValueError) as e:
+		logger.error("Unable to load the trained model: {}".format(e))
+		raise RuntimeError("    *** Process incomplete. ***")
 
-	# assign AutoVOT's pretrained model
-	if not trainedModel:
-		trainedModel = "autovot/models/vot_predictor.amanda.max_num_instances_1000.model"
+	wavName = wav.split("/")[-1]  # remove file path if present, for reporting purposes
 
-	# make temporary directory to process predictions
-	with tempfile.TemporaryDirectory() as tempDirectory:
+	# the prediction tiers are added to the TextGrid in memory, for all speakers
+	definitionsList = [autovot.TierDefinitions(vot_tier=tierName, vot_mark="*", window_min=-0.05, window_max=0.8) 
+		for tierName in stopTiers]
 
-		# process the sound file
+	# formats the WAV reader can't handle are loaded whole by Praat
+	try:
+		info = autovot.wav_info(wav)
+		psnd = None
+		numChannels, duration = info.num_channels, info.num_frames / float(info.sample_rate)
+	except (OSError, ValueError):
+		import parselmouth
 		psnd = parselmouth.Sound(wav)
-		wav = wav.split("/")[-1]  # remove file path if present, for reporting purposes
-		tempSound = os.path.join(tempDirectory, wav)
+		numChannels, duration = psnd.get_number_of_channels(), psnd.get_total_duration()
+
+	channels = speakerChannels(wavName, numChannels, len(stopTiers), preferredChannel, distinctChannels)
+	tierWindows = autovot.tier_windows(textgrid, definitionsList, duration, wavName, annotatedTextgrid)
+
+	return StopWindows(model, definitionsList, channels, tierWindows, psnd)
+
+def stopSpans(windows):
+
+	import autovot
+
+	# the spans of the recording (in samples at 16kHz) read by the windows of all speakers
+	return [autovot.front_end_span(window) for tier in windows.tierWindows if tier for window in tier]
+
+def readStops(wav, windows):
+
+	import autovot
+
+	# process the sound file: only the spans around the stop windows are read (memory-mapped) and resampled to 
+	# 16kHz; returns the audio of each speaker. Only these spans are written to the wav file the AutoVOT programs 
+	# read
+	channels = sorted(set(windows.channels))
+	if windows.psnd is None:
+		channelAudio = dict(zip(channels, autovot.read_spans(wav, stopSpans(windows), 16000, channels)))
+	else:
+		psnd = windows.psnd
 		if psnd.get_sampling_frequency() != 16000:
 			psnd = psnd.resample(16000)
+		channelAudio = {channel: psnd.values[channel] for channel in channels}
+	return [channelAudio[channel] for channel in windows.channels]
+
+def predictStops(wav, stopTiers, textgrid, annotatedTextgrid, windows, tierSamples, featureCache, tokens=None):
 
-		if distinctChannels:  # if multiple channels -- ie: one microphone per speaker
-			
-			channels = psnd.extract_all_channels()
-			channelNumber = 0
-
-			if len(channels) != len(stopTiers):
-				logger.error("You enabled the parameter 'distinctChannels', but there isn't an equal number of "\
-					"channels and speakers in the file {}. Fix the issue before continuing.\n".format(wav))
-				raise RuntimeError("    *** Process incomplete. ***")
-
-			# run VOT predictor
-			for channel in channels:
-				channel.save(tempSound, "WAV")
-
-				subprocess.run([
-					"python", "autovot/auto_vot_decode.py", 
-					"--vot_tier", stopTiers[channelNumber], 
-					"--vot_mark", "*", 
-					tempSound, 
-					annotatedTextgrid, 
-					trainedModel, 
-					"--ignore_existing_tiers"
-					])
-
-				channelNumber += 1
-				processComplete = True
+	import autovot
+
+	wavName = wav.split("/")[-1]
+
+	# run VOT predictor over the windows of all speakers in one pass. The features of the windows seen in earlier runs 
+	# are read from the cache, if one is given, instead of running VotFrontEnd2 on them again
+	try:
+		tierMeasurements = autovot.decode_tiers(tierSamples, textgrid, windows.definitionsList, windows.model, 
+			wav_filename=wavName, textgrid_filename=annotatedTextgrid, cache=autovot.feature_cache(featureCache), 
+			channels=[channel + 1 for channel in windows.channels], windows=windows.tierWindows)
+	except (OSError, RuntimeError, ValueError) as e:
+		logger.error("Unable to obtain VOT predictions for {}: {}".format(wavName, e))
+		raise RuntimeError("    *** Process incomplete. ***")
+
+	# track whether or not predictions were calculated
+	processComplete = False
 
+	# add one prediction tier per speaker, labeled after its stop tier; the measured tokens are added to 'tokens', if 
+	# given
+	for tierName, tierWindows, measurements in zip(stopTiers, windows.tierWindows, tierMeasurements):
+		if not measurements:
+			continue
+		if tokens is not None:
+			tokens.extend(stopTokens(textgrid, tierName, tierWindows, measurements))
+		if len(stopTiers) > 1:  # if multiple speakers
+			nameBookEnds = tierName.split("stops")
+			predictionTierName = nameBookEnds[0]+"AutoVOT"+nameBookEnds[1]
 		else:
-	
-			if psnd.get_number_of_channels() != 1:
-				psnd = psnd.extract_channel(preferredChannel)
-			psnd.save(tempSound, "WAV")
-			
-			# run VOT predictor
-			for tierName in stopTiers:
-				subprocess.run([
-					"python", "autovot/auto_vot_decode.py", 
-					"--vot_tier", tierName, 
-					"--vot_mark", "*", 
-					tempSound, 
-					annotatedTextgrid, 
-					"autovot/models/vot_predictor.amanda.max_num_instances_1000.model", 
-					"--ignore_existing_tiers"
-					])
-
-				processComplete = True
-
-	# rename repeated labels of AutoVOT prediction tiers
-	if len(stopTiers) > 1:  # if multiple speakers
-		with open(annotatedTextgrid, "r") as TG:
-			newTG = []
-			tierNumber = 0
-			for line in TG:
-				if "AutoVOT" in line:
-					nameBookEnds = stopTiers[tierNumber].split("stops")
-					line = line.replace("AutoVOT", nameBookEnds[0]+"AutoVOT"+nameBookEnds[1])
-					tierNumber += 1
-				newTG.append(line)
-		with open(annotatedTextgrid, "w") as TG:
-			TG.writelines(newTG)
+			predictionTierName = "AutoVOT"
+		textgrid.append(autovot.autovot_tier(measurements, textgrid.xmin(), textgrid.xmax(), predictionTierName))
+		processComplete = True
 	
 	return processComplete
 
+def stopTokens(textgrid, stopTier, tierWindows, measurements):
+
+	import numpy as np
+	import autovot
+
+	# the tokens of a speaker: the stop and the word each window was made for (found at the middle of the stop, which 
+	# padding may have moved across a word boundary), with the burst, the VOT and the confidence of its prediction. 
+	# A negative VOT goes from the onset of voicing to the burst
+	tierNames = textgrid.tierNames()
+	nameBookEnds = stopTier.split("stops")
+	speaker = "".join(nameBookEnds).strip(" -_")
+	middles = np.array([(window.vot_min + window.vot_max) / 2 for window in tierWindows])
+
+	def marksAt(tierName):
+		if tierName not in tierNames:
+			return [""] * len(middles)
+		tier = textgrid[tierNames.index(tierName)]
+		labels = tier.labels()
+		intervals = np.maximum(np.searchsorted(tier.xmins(), middles, "right") - 1, 0)
+		return [labels[code].strip() for code in tier.codes()[intervals].tolist()]
+
+	stopLabels = marksAt(stopTier)
+	wordTier = next((name for name in (nameBookEnds[0]+"words"+nameBookEnds[1], nameBookEnds[0]+"word"+nameBookEnds[1]) 
+		if name in tierNames), "")
+	words = marksAt(wordTier)
+
+	tokens = []
+	for stop, word, measurement in zip(stopLabels, words, measurements):
+		if measurement.mark.startswith("neg"):
+			tokens.append(autovot.Token(speaker, stop, word, measurement.xmax, measurement.xmin - measurement.xmax, 
+				measurement.confidence, True))
+		else:
+			tokens.append(autovot.Token(speaker, stop, word, measurement.xmin, measurement.xmax - measurement.xmin, 
+				measurement.confidence, measurement.prevoiced))
+	return tokens
+
+def speakerChannels(wav, numChannels, numSpeakers, preferredChannel, distinctChannels):
+
+	# the (0-based) channel holding each speaker's speech
+	if distinctChannels:  # if multiple channels -- ie: one microphone per speaker
+		if numChannels != numSpeakers:
+			logger.error("You enabled the parameter 'distinctChannels', but there isn't an equal number of "\
+				"channels and speakers in the file {}. Fix the issue before continuing.\n".format(wav))
+			raise RuntimeError("    *** Process incomplete. ***")
+		return list(range(numChannels))
+
+	if numChannels == 1:
+		return [0] * numSpeakers
+	if not 1 <= preferredChannel <= numChannels:
+		logger.error("The file {} has no channel {}. Fix the issue before continuing.\n".format(wav, preferredChannel))
+		raise RuntimeError("    *** Process incomplete. ***")
+	return [preferredChannel - 1] * numSpeakers
+
 def calculateVOT(
 	wav, 
 	TextGrid, 
@@ -392,9 +615,21 @@ def calculateVOT(
 	endPadding=0, 
 	preferredChannel=1, 
 	distinctChannels=False, 
-	trainedModel=""
+	trainedModel="", 
+	featureCache="", 
+	outputFormat="long"
 	):
 
+	setupLogging()
+
+	startPadding, endPadding, stops = checkPair(wav, TextGrid, stops, outputDirectory, startPadding, endPadding, 
+		outputFormat)
+
+	return processAnnotation(wav, TextGrid, None, stops, outputDirectory, startPadding, endPadding, preferredChannel, 
+		distinctChannels, trainedModel, featureCache, outputFormat)
+
+def checkPair(wav, TextGrid, stops, outputDirectory, startPadding, endPadding, outputFormat):
+
 	# verify file format
 	if not approvedFileFormat(wav, TextGrid):
 		print()
@@ -402,22 +637,72 @@ def calculateVOT(
 			"not meet format requirements.\n".format(wav.split("/")[-1], TextGrid.split("/")[-1]))
 		raise RuntimeError("    *** Process incomplete. ***")
 
+	# verify the format of the output TextGrid
+	approveOutputFormat(outputFormat)
+
 	# process variable parameters
 	startPadding, endPadding, stops = processParameters(startPadding, endPadding, stops, TextGrid)
 
 	# create directory to output files
 	outputPath = os.path.join(os.getcwd(), outputDirectory)
-	if not os.path.exists(outputPath):
-		os.mkdir(outputPath)
+	os.makedirs(outputPath, exist_ok=True)  # batch workers may create it concurrently
+
+	return startPadding, endPadding, stops
+
+def approveOutputFormat(outputFormat):
+
+	if outputFormat not in ("long", "short", "binary"):
+		logger.error("The output format must be 'long', 'short' or 'binary', not '{}'.\n".format(outputFormat))
+		raise RuntimeError("    *** Process incomplete. ***")
+
+def processAnnotation(
+	wav, 
+	TextGrid, 
+	tg, 
+	stops, 
+	outputDirectory, 
+	startPadding, 
+	endPadding, 
+	preferredChannel, 
+	distinctChannels, 
+	trainedModel, 
+	featureCache, 
+	outputFormat, 
+	tokens=None
+	):
+
+	# measure the VOTs of one recording, given its TextGrid file or its annotation in memory (tg), with processed 
+	# parameters; the measured tokens are added to 'tokens', if given
+	textgrid, stopTiers, annotatedTextgrid = loadAnnotation(wav, TextGrid, tg, stops, outputDirectory, startPadding, 
+		endPadding)
+
+	# apply AutoVOT prediction calculations; the TextGrid is written once, with the stop tiers and whatever 
+	# predictions were obtained
+	try:
+		processComplete = getPredictions(wav, stopTiers, textgrid, annotatedTextgrid, preferredChannel, distinctChannels, 
+			trainedModel, featureCache, tokens)
+	finally:
+		textgrid.write(annotatedTextgrid, outputFormat)
+
+	reportAnnotation(wav, TextGrid, processComplete)
+
+	return annotatedTextgrid
+
+def loadAnnotation(wav, TextGrid, tg, stops, outputDirectory, startPadding, endPadding):
+
+	if not os.path.isfile(wav):
+		logger.error("The audio file {} does not exist.\n".format(wav))
+		raise RuntimeError("    *** Process incomplete. ***")
 
 	# add stop tier populated with tokens of interest
-	stopTiers, saveName = addStopTier(TextGrid, startPadding, endPadding, stops, outputPath)
+	textgrid, stopTiers, saveName = addStopTier(TextGrid, startPadding, endPadding, stops, tg)
 
 	# specify where the annotated TG is located 
 	annotatedTextgrid = os.path.join(outputDirectory, saveName)
 
-	# apply AutoVOT prediction calculations
-	processComplete = getPredictions(wav, stopTiers, annotatedTextgrid, preferredChannel, distinctChannels, trainedModel)
+	return textgrid, stopTiers, annotatedTextgrid
+
+def reportAnnotation(wav, TextGrid, processComplete):
 
 	# remove file path from file names if present, for reporting purposes
 	TextGrid = TextGrid.split("/")[-1]
@@ -432,7 +717,56 @@ def calculateVOT(
 			.format(wav, TextGrid))
 		raise RuntimeError("    *** Process incomplete. ***")
 
-	return
+def findPairs(inputDirectory, pairing="", exclude=""):
+
+	# walk a corpus and yield each wav/TextGrid pair as soon as both of its files have been seen, so that processing 
+	# starts before the walk ends. The files of a pair are in the same directory, and are paired by a key: their name 
+	# without extension, or the part of it captured by the first group of the regular expression 'pairing', which must 
+	# match the whole name (eg, '(.*)_(audio|transcript)' pairs 'S01_audio.wav' with 'S01_transcript.TextGrid'). 
+	# Names it does not match are ignored. Subdirectories are walked too, except 'exclude' (eg, the output directory), 
+	# without following symbolic links
+	import re
+
+	pattern = re.compile(pairing) if pairing else None
+	directories = [inputDirectory]
+	while directories:
+		directory = directories.pop()
+		subdirectories = []
+		found = {}
+		try:
+			entries = os.scandir(directory)
+		except OSError as e:
+			logger.warning("Unable to read the directory {}: {}\n".format(directory, e))
+			continue
+		with entries:
+			for entry in entries:
+				try:
+					if entry.is_dir(follow_symlinks=False):
+						if os.path.abspath(entry.path) != exclude:
+							subdirectories.append(entry.path)
+						continue
+				except OSError:
+					continue
+				stem, extension = os.path.splitext(entry.name)
+				if extension != ".wav" and extension != ".TextGrid":
+					continue
+				if pattern is None:
+					key = stem
+				else:
+					match = pattern.fullmatch(stem)
+					if match is None:
+						continue
+					key = match.group(1) if pattern.groups else stem
+				files = found.setdefault(key, {})
+				if extension in files:
+					logger.warning("{} and {} have the same pairing key; {} is ignored.\n".format(files[extension], 
+						entry.path, entry.path))
+					continue
+				files[extension] = entry.path
+				if len(files) == 2:
+					yield files[".wav"], files[".TextGrid"]
+		# depth first, in name order, so that memory only holds the directories waiting to be walked
+		directories.extend(sorted(subdirectories, reverse=True))
 
 def calculateVOTBatch(
 	inputDirectory, 
@@ -442,48 +776,669 @@ def calculateVOTBatch(
 	endPadding=0, 
 	preferredChannel=1, 
 	distinctChannels=False, 
-	trainedModel=""
+	trainedModel="", 
+	jobs=1, 
+	featureCache="", 
+	outputFormat="long", 
+	force=False, 
+	pairing=""
 	):
-	
-	fileNames = []
-	
-	try:
-		for file in os.listdir(inputDirectory):
-			fileName, fileExt = os.path.splitext(file)
-			if fileExt == ".wav" or fileExt == ".TextGrid":
-				fileNames.append(fileName)
-	except FileNotFoundError:
+
+	import re
+	import autovot
+	from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+	setupLogging()
+
+	if not os.path.isdir(inputDirectory):
 		logger.error("The directory you entered for the parameter 'inputDirectory' does not exist.")
 		raise RuntimeError("    *** Process incomplete. ***")
+	try:
+		re.compile(pairing)
+	except re.error as e:
+		logger.error("The pairing rule '{}' is not a valid regular expression: {}.\n".format(pairing, e))
+		raise RuntimeError("    *** Process incomplete. ***")
+
+	# the pairs completed by earlier runs with the same parameters and model, whose inputs and outputs are unchanged, 
+	# are skipped (unless forced). The feature cache does not change the output, so it is not a parameter
+	try:
+		model = autovot.get_model(trainedModel)
+		modelHash, modelName = model.hash, os.path.basename(model.name)
+	except (OSError, ValueError):
+		modelHash = modelName = None  # every pair fails, and reports why
+	manifestParameters = {"stops": sorted(set(stops)), "startPadding": startPadding, "endPadding": endPadding, 
+		"preferredChannel": preferredChannel, "distinctChannels": distinctChannels, "outputFormat": outputFormat, 
+		"model": modelHash}
+	os.makedirs(os.path.join(os.getcwd(), outputDirectory), exist_ok=True)
+	manifestFile = os.path.join(outputDirectory, MANIFEST)
+	entries = readManifest(manifestFile)
+
+	# the tokens of each processed pair are appended to the results store, replacing those of earlier runs (a pair 
+	# that failed or has no tokens left replaces them with none). Only the manifest decides which pairs are skipped: 
+	# their tokens are those stored by the run that processed them
+	resultsFile = os.path.join(outputDirectory, RESULTS)
+	try:
+		store = autovot.ResultsWriter(resultsFile)
+	except OSError as e:
+		logger.warning("Unable to write the results store {}: {}. Tokens will not be recorded.\n".format(resultsFile, e))
+		store = None
+
+	# the manifest is rewritten without its superseded lines, then each pair is appended as soon as it is complete, 
+	# so that a run that stops partway can be resumed
+	try:
+		with open(manifestFile + ".tmp", "w", encoding="utf-8") as f:
+			f.writelines(json.dumps(entry) + "\n" for entry in entries.values())
+		os.replace(manifestFile + ".tmp", manifestFile)
+		manifest = open(manifestFile, "a", encoding="utf-8")
+	except OSError as e:
+		logger.warning("Unable to write the manifest {}: {}. Completed pairs will not be recorded.\n"\
+			.format(manifestFile, e))
+		manifest = None
+
+	results = []
+	skipped = 0
+
+	def pending():
+		# the pairs to process, with their place in the results, as they are found. The output of a pair in a 
+		# subdirectory goes to the same subdirectory of the output directory
+		nonlocal skipped
+		for wavFilePath, TextGridFilePath in findPairs(inputDirectory, pairing, os.path.abspath(outputDirectory)):
+			results.append(None)
+			entry = entries.get((os.path.abspath(wavFilePath), os.path.abspath(TextGridFilePath)))
+			if not force and isCurrent(entry, wavFilePath, TextGridFilePath, manifestParameters):
+				results[-1] = BatchResult(wavFilePath, TextGridFilePath, entry["output"], True, None)
+				skipped += 1
+				continue
+			pairDirectory = os.path.normpath(os.path.join(outputDirectory, 
+				os.path.relpath(os.path.dirname(wavFilePath), inputDirectory)))
+			yield len(results) - 1, (wavFilePath, TextGridFilePath, stops, pairDirectory, startPadding, endPadding, 
+				preferredChannel, distinctChannels, trainedModel, featureCache, outputFormat)
+
+	def record(i, result):
+		results[i] = result
+		if store is not None:
+			store.append(os.path.relpath(result.wav, inputDirectory), modelName, result.tokens or [])
+		if manifest is not None and result.complete:
+			manifest.write(json.dumps(manifestEntry(result.wav, result.TextGrid, result.outputFile, 
+				manifestParameters)) + "\n")
+			manifest.flush()
+
+	if jobs is None or jobs < 1:
+		jobs = os.cpu_count() or 1
+
+	try:
+		if jobs == 1:
+			pipelinePairs(pending(), record)
+		else:
+			# each worker process handles whole pairs. Pairs are submitted as they are found, keeping a few per 
+			# worker in flight, so that a large corpus is not held in memory
+			with ProcessPoolExecutor(max_workers=jobs) as pool:
+				running = {}
+				for i, arguments in pending():
+					if len(running) >= 2 * jobs:
+						done, _ = wait(running, return_when=FIRST_COMPLETED)
+						for future in done:
+							record(running.pop(future), future.result())
+					running[pool.submit(processPair, *arguments)] = i
+				for future in wait(running).done:
+					record(running[future], future.result())
+	finally:
+		if manifest is not None:
+			manifest.close()
+		if store is not None:
+			store.close()
+
+	failures = [result for result in results if not result.complete]
+	if skipped:
+		print()
+		logger.info("{} of {} pairs were up to date and were skipped (see {}).\n".format(skipped, len(results), 
+			manifestFile))
+	if store is not None:
+		print()
+		logger.info("The measured tokens are in the results store {} (read it with autovot.read_results).\n"\
+			.format(resultsFile))
+	print()
+	logger.info("Batch processing finished: {} of {} pairs complete.\n".format(len(results) - len(failures), 
+		len(results)))
+	for result in failures:
+		logger.error("{} and {} were not processed: {}".format(result.wav.split("/")[-1], 
+			result.TextGrid.split("/")[-1], result.error))
+
+	return results
+
+def calculateVOTMlf(
+	mlf, 
+	audioDirectory, 
+	stops=[], 
+	outputDirectory="output", 
+	startPadding=0, 
+	endPadding=0, 
+	preferredChannel=1, 
+	distinctChannels=False, 
+	trainedModel="", 
+	featureCache="", 
+	outputFormat="long"
+	):
+
+	# process the utterances of an HTK MLF (eg, the output of a forced aligner) one at a time, as they are read: the 
+	# phones and words of each utterance go straight to the stop selection and the predictions, so memory does not 
+	# grow with the size of the MLF. The audio of an utterance is the wav file named after it in audioDirectory, and 
+	# its output is a TextGrid named after it. The tokens of each utterance are appended to the results store (none 
+	# if it failed), as in batch processing
+	import autovot
+	from autovot.helpers import textgrid as autovotTextgrid
+
+	setupLogging()
+	approveOutputFormat(outputFormat)
+	startPadding, endPadding, stops = processParameters(startPadding, endPadding, stops, mlf)
+	os.makedirs(os.path.join(os.getcwd(), outputDirectory), exist_ok=True)
+	try:
+		modelName = os.path.basename(autovot.get_model(trainedModel).name)
+	except (OSError, ValueError):
+		modelName = None  # every utterance fails, and reports why
+	resultsFile = os.path.join(outputDirectory, RESULTS)
+	try:
+		store = autovot.ResultsWriter(resultsFile)
+	except OSError as e:
+		logger.warning("Unable to write the results store {}: {}. Tokens will not be recorded.\n".format(resultsFile, e))
+		store = None
+
+	parameters = (stops, outputDirectory, startPadding, endPadding, preferredChannel, distinctChannels, trainedModel, 
+		featureCache, outputFormat)
+
+	results = []
+	try:
+		for name, phoneTier, wordTier in autovotTextgrid.mlf_utterances(mlf):
+			utterance = os.path.splitext(name.split("/")[-1])[0]
+			textgrid = autovotTextgrid.TextGrid(utterance)
+			textgrid.append(phoneTier)
+			textgrid.append(wordTier)
+			print()
+			logger.info("Processing utterance {} of {}...\n".format(utterance, mlf.split("/")[-1]))
+			results.append(processPair(os.path.join(audioDirectory, utterance+".wav"), utterance+".TextGrid", 
+				*parameters, textgrid=textgrid))
+			if store is not None:
+				store.append(utterance+".wav", modelName, results[-1].tokens or [])
+	except (OSError, ValueError, IndexError) as e:
+		logger.error("Unable to read the MLF {}: {}\n".format(mlf, e))
+		raise RuntimeError("    *** Process incomplete. ***")
+	finally:
+		if store is not None:
+			store.close()
+
+	failures = [result for result in results if not result.complete]
+	print()
+	logger.info("MLF processing finished: {} of {} utterances complete.\n".format(len(results) - len(failures), 
+		len(results)))
+	for result in failures:
+		logger.error("{} was not processed: {}".format(result.TextGrid.split(".TextGrid")[0], result.error))
 
-	for fileGroup in Counter(fileNames).items():
-		if fileGroup[1] == 2:
-			wavFilePath = os.path.join(inputDirectory,fileGroup[0]+".wav")
-			TextGridFilePath = os.path.join(inputDirectory,fileGroup[0]+".TextGrid")
+	return results
+
+def processPair(
+	wav, 
+	TextGrid, 
+	stops, 
+	outputDirectory, 
+	startPadding, 
+	endPadding, 
+	preferredChannel, 
+	distinctChannels, 
+	trainedModel, 
+	featureCache, 
+	outputFormat, 
+	textgrid=None
+	):
+
+	# process one pair (as calculateVOT does) and report the outcome instead of raising, so that batch workers never 
+	# die on a bad file. An utterance of an MLF comes with its annotation (textgrid) and processed parameters
+	errors = ErrorCollector()
+	logger.addHandler(errors)
+	tokens = []
+	try:
+		if textgrid is None:
+			setupLogging()
+			startPadding, endPadding, stops = checkPair(wav, TextGrid, stops, outputDirectory, startPadding, endPadding, 
+				outputFormat)
+		outputFile = processAnnotation(wav, TextGrid, textgrid, stops, outputDirectory, startPadding, endPadding, 
+			preferredChannel, distinctChannels, trainedModel, featureCache, outputFormat, tokens)
+		return BatchResult(wav, TextGrid, outputFile, True, None, tokens)
+	except Exception as e:
+		error = " ".join(errors.messages) or "{}: {}".format(type(e).__name__, str(e).strip())
+		return BatchResult(wav, TextGrid, None, False, error)
+	finally:
+		logger.removeHandler(errors)
+
+class PipelinePair:
+
+	# a pair of a batch on its way through the stages of pipelinePairs; error is set by the stage where it fails
+	def __init__(self, index, arguments):
+		self.index = index
+		(self.wav, self.TextGrid, self.stops, self.outputDirectory, self.startPadding, self.endPadding, 
+			self.preferredChannel, self.distinctChannels, self.trainedModel, self.featureCache, 
+			self.outputFormat) = arguments
+		self.textgrid = None
+		self.tokens = []
+		self.error = None
+
+def pipelinePairs(tasks, record, depth=PIPELINE_DEPTH):
+
+	# process the pairs of a batch in four stages that run at the same time, each in its own thread: loading (the 
+	# TextGrid, the stop windows, and the bytes of the recording they read), reading (and resampling) the audio, 
+	# measuring the VOTs (features and decoding), and writing the output. The stages are connected by queues of 
+	# 'depth' pairs, so that the next pair is loaded while one is decoded, and no stage runs far ahead of the others. 
+	# tasks yields (index, processPair arguments); record(index, BatchResult) is called, in order, as pairs are written
+	import threading
+	import queue
+	import autovot
+
+	def load(pair):
+		startPadding, endPadding, stops = checkPair(pair.wav, pair.TextGrid, pair.stops, pair.outputDirectory, 
+			pair.startPadding, pair.endPadding, pair.outputFormat)
+		pair.textgrid, pair.stopTiers, pair.annotatedTextgrid = loadAnnotation(pair.wav, pair.TextGrid, None, stops, 
+			pair.outputDirectory, startPadding, endPadding)
+		pair.windows = locateStops(pair.wav, pair.stopTiers, pair.textgrid, pair.annotatedTextgrid, 
+			pair.preferredChannel, pair.distinctChannels, pair.trainedModel)
+		if pair.windows.psnd is None:
+			autovot.prefetch_spans(pair.wav, stopSpans(pair.windows), 16000)
+
+	def read(pair):
+		pair.tierSamples = readStops(pair.wav, pair.windows)
+
+	def predict(pair):
+		pair.processComplete = predictStops(pair.wav, pair.stopTiers, pair.textgrid, pair.annotatedTextgrid, 
+			pair.windows, pair.tierSamples, pair.featureCache, pair.tokens)
+		pair.tierSamples = pair.windows = None  # the audio is not needed anymore
+
+	def write(pair):
+		# the TextGrid is written with the stop tiers and whatever predictions were obtained, as in processAnnotation
+		if pair.textgrid is not None:
+			pair.textgrid.write(pair.annotatedTextgrid, pair.outputFormat)
+		if pair.error is None:
+			reportAnnotation(pair.wav, pair.TextGrid, pair.processComplete)
+
+	def run(stage, pair, errors):
+		errors.messages = []
+		try:
+			stage(pair)
+		except Exception as e:
+			if pair.error is None:
+				pair.error = " ".join(errors.messages) or "{}: {}".format(type(e).__name__, str(e).strip())
+
+	def put(box, pair):
+		# wait for room in the queue, unless the pipeline is stopped
+		while not stop.is_set():
 			try:
-				calculateVOT(
-					wavFilePath, 
-					TextGridFilePath, 
-					stops, 
-					outputDirectory, 
-					startPadding, 
-					endPadding, 
-					preferredChannel, 
-					distinctChannels
-					)
-			except Exception as e:
-				print(e)
+				box.put(pair, timeout=POLL_INTERVAL)
+				return True
+			except queue.Full:
+				pass
+		return False
+
+	def get(box):
+		# the next pair, or None at the end of the pairs or when the pipeline is stopped
+		while not stop.is_set():
+			try:
+				return box.get(timeout=POLL_INTERVAL)
+			except queue.Empty:
+				pass
+		return None
+
+	def work(stage, inbox, outbox):
+		# error messages are collected per thread, so that those of the pairs in other stages do not mix in
+		errors = ErrorCollector(threading.get_ident())
+		logger.addHandler(errors)
+		try:
+			for pair in iter(lambda: get(inbox), None):
+				if pair.error is None:
+					run(stage, pair, errors)
+				put(outbox, pair)
+		except BaseException as e:  # not a failure of the pair: the whole pipeline stops, and the caller raises it
+			failures.append(e)
+			stop.set()
+		finally:
+			logger.removeHandler(errors)
+			put(outbox, None)
+
+	def feed(inbox):
+		try:
+			for index, arguments in tasks:
+				if not put(inbox, PipelinePair(index, arguments)):
+					break
+		except BaseException as e:  # raised by the main thread once the pipeline is empty
+			failures.append(e)
+		finally:
+			put(inbox, None)
+
+	failures = []
+	stop = threading.Event()
+	queues = [queue.Queue(depth) for _ in range(4)]
+	threads = [threading.Thread(target=feed, args=(queues[0],), daemon=True)]
+	threads += [threading.Thread(target=work, args=(stage, inbox, outbox), daemon=True) 
+		for stage, inbox, outbox in zip((load, read, predict), queues, queues[1:])]
+	for thread in threads:
+		thread.start()
+
+	errors = ErrorCollector(threading.get_ident())
+	logger.addHandler(errors)
+	try:
+		for pair in iter(lambda: get(queues[-1]), None):
+			run(write, pair, errors)
+			record(pair.index, BatchResult(pair.wav, pair.TextGrid, None if pair.error else pair.annotatedTextgrid, 
+				pair.error is None, pair.error, None if pair.error else pair.tokens))
+	finally:
+		# if record (or a stage) failed, the stages give up waiting on the queues; the pairs left in them are dropped
+		logger.removeHandler(errors)
+		stop.set()
+		for thread in threads:
+			thread.join()
+	if failures:
+		raise failures[0]
+
+def warmWorker(trainedModel):
+
+	# load the imports and the model of a service worker once, before its first request
+	import autovot
+
+	setupLogging()
+	try:
+		autovot.get_model(trainedModel)
+	except (OSError, ValueError):
+		pass  # reported by the requests that use it
+
+class LatencyStats:
+
+	# number of requests and errors of the VOT service, and the latency percentiles of the latest ones
+	def __init__(self):
+		import threading
+		from collections import deque
+
+		self.lock = threading.Lock()
+		self.latencies = deque(maxlen=LATENCY_WINDOW)
+		self.requests = 0
+		self.errors = 0
+
+	def add(self, seconds, ok):
+		with self.lock:
+			self.latencies.append(seconds)
+			self.requests += 1
+			self.errors += not ok
+
+	def summary(self):
+		with self.lock:
+			latencies = sorted(self.latencies)
+			summary = {"requests": self.requests, "errors": self.errors}
+		if latencies:
+			# nearest-rank percentiles, in milliseconds
+			summary["latencyMs"] = {"p{}".format(p): round(1000 * latencies[max(0, -(-p * len(latencies) // 100) - 1)], 
+				3) for p in (50, 90, 99)}
+			summary["latencyMs"]["max"] = round(1000 * latencies[-1], 3)
+			summary["latencyMs"]["mean"] = round(1000 * sum(latencies) / len(latencies), 3)
+		return summary
+
+def formFields(contentType, body):
+
+	# the fields and the uploaded files ((filename, content) pairs) of a multipart/form-data request body. The body 
+	# is split on the boundary directly (the email parser is slow on large binary uploads); only the headers of the 
+	# parts are parsed
+	from email.message import Message
+	from email.parser import BytesHeaderParser
+
+	header = Message()
+	header["Content-Type"] = contentType
+	boundary = header.get_param("boundary")
+	if not boundary:
+		raise ValueError("the body is not a multipart form")
+	fields, files = {}, {}
+	for part in body.split(b"--" + boundary.encode("latin-1"))[1:]:
+		if part.startswith(b"--"):  # the end of the form
+			break
+		headers, separator, content = part.partition(b"\r\n\r\n")
+		if not separator:
+			raise ValueError("a part of the form has no headers")
+		headers = BytesHeaderParser().parsebytes(headers.lstrip(b"\r\n") + b"\r\n\r\n")
+		content = content[:-2] if content.endswith(b"\r\n") else content
+		name = headers.get_param("name", header="content-disposition")
+		if headers.get_filename():
+			files[name] = (headers.get_filename(), content)
+		else:
+			fields[name] = content.decode("utf-8")
+	return fields, files
+
+def serviceParameters(defaults, fields, form):
+
+	# the parameters of a request: those of the service, overridden by the fields of the request. Form fields are 
+	# strings; stops are separated by spaces or commas. A value of the wrong type or out of range raises ValueError, 
+	# which the service reports to the client
+	import math
+
+	parameters = dict(defaults)
+	for name, kind in SERVICE_PARAMETERS.items():
+		if name not in fields:
+			continue
+		value = fields[name]
+		if form:
+			if kind is list:
+				value = value.replace(",", " ").split()
+			elif kind is bool:
+				if value.strip().lower() not in ("1", "true", "yes", "0", "false", "no"):
+					raise ValueError("'{}' must be true or false, not '{}'".format(name, value))
+				value = value.strip().lower() in ("1", "true", "yes")
+			elif kind is not str:
+				try:
+					value = kind(value)
+				except ValueError:
+					raise ValueError("'{}' must be {}, not '{}'".format(name, 
+						"an integer" if kind is int else "a number", value))
+		if kind is list:
+			if not isinstance(value, list) or not all(isinstance(stop, str) and stop.strip() for stop in value):
+				raise ValueError("'{}' must be a list of phone labels, such as [\"p\", \"t\"]".format(name))
+		elif kind is bool:
+			if not isinstance(value, bool):
+				raise ValueError("'{}' must be true or false, not {}".format(name, json.dumps(value)))
+		elif kind is int:
+			if isinstance(value, bool) or not isinstance(value, int):
+				raise ValueError("'{}' must be an integer, not {}".format(name, json.dumps(value)))
+		elif kind is float:
+			if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+				raise ValueError("'{}' must be a number, not {}".format(name, json.dumps(value)))
+		elif not isinstance(value, str):
+			raise ValueError("'{}' must be a string, not {}".format(name, json.dumps(value)))
+		if name in SERVICE_CHOICES and value not in SERVICE_CHOICES[name]:
+			raise ValueError("'{}' must be one of {}, not '{}'".format(name, ", ".join(SERVICE_CHOICES[name]), value))
+		if name == "preferredChannel" and value < 1:
+			raise ValueError("'preferredChannel' must be 1 or more, not {}".format(value))
+		parameters[name] = value
+	return parameters
+
+def predictionList(tokens):
+
+	# the predictions of a pair, one per measured token, with their confidence. A negative VOT ends at the burst
+	predictions = []
+	for token in tokens:
+		start, end = sorted((token.burst, token.burst + token.vot))
+		predictions.append({"speaker": token.speaker, "stop": token.stop, "word": token.word, "start": float(start), 
+			"end": float(end), "vot": float(token.vot), "confidence": float(token.confidence), 
+			"prevoiced": bool(token.prevoiced)})
+	return predictions
+
+def serveVOT(
+	port=8765, 
+	socketPath="", 
+	jobs=1, 
+	stops=[], 
+	startPadding=0, 
+	endPadding=0, 
+	preferredChannel=1, 
+	distinctChannels=False, 
+	trainedModel="", 
+	featureCache="", 
+	outputFormat="long"
+	):
+
+	# measure VOTs on request, over HTTP on localhost (or on a Unix socket), with the imports and the models kept 
+	# loaded in 'jobs' worker processes between requests. POST /vot takes either a JSON object with the paths of a 
+	# 'wav' and a 'TextGrid' file, or a multipart form uploading them; other fields override the parameters of the 
+	# service, and 'outputDirectory' keeps the output. The response is the annotated TextGrid, or the predictions as 
+	# JSON if 'response' is 'json'. GET /stats reports the number of requests and the latency percentiles
+	import http.server
+	import shutil
+	import signal
+	import socketserver
+	import tempfile
+	import time
+	import autovot
+	from concurrent.futures import ProcessPoolExecutor
+
+	setupLogging()
+	approveOutputFormat(outputFormat)
+	try:
+		autovot.get_model(trainedModel)
+	except (OSError, ValueError) as e:
+		logger.error("Unable to load the trained model: {}".format(e))
+		raise RuntimeError("    *** Process incomplete. ***")
 
-	return
+	defaults = {"stops": stops, "startPadding": startPadding, "endPadding": endPadding, 
+		"preferredChannel": preferredChannel, "distinctChannels": distinctChannels, "trainedModel": trainedModel, 
+		"featureCache": featureCache, "outputFormat": outputFormat}
+	if jobs is None or jobs < 1:
+		jobs = os.cpu_count() or 1
+	pool = ProcessPoolExecutor(max_workers=jobs, initializer=warmWorker, initargs=(trainedModel,))
+	for future in [pool.submit(os.getpid) for _ in range(jobs)]:  # start (and warm up) the workers now
+		future.result()
+	stats = LatencyStats()
+
+	class Handler(http.server.BaseHTTPRequestHandler):
+
+		protocol_version = "HTTP/1.1"  # keeps connections open, and answers 'Expect: 100-continue' (eg, curl uploads)
+
+		def address_string(self):
+			return self.client_address[0] if self.client_address else socketPath
+
+		def log_message(self, format, *args):
+			logger.debug("%s - %s" % (self.address_string(), format % args))
+
+		def reply(self, status, body, contentType="application/json", filename=None):
+			if not isinstance(body, bytes):
+				body = (json.dumps(body) + "\n").encode("utf-8")
+			self.send_response(status)
+			self.send_header("Content-Type", contentType)
+			self.send_header("Content-Length", str(len(body)))
+			if filename:
+				self.send_header("Content-Disposition", 'attachment; filename="{}"'.format(filename))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def do_GET(self):
+			if self.path == "/stats":
+				self.reply(200, stats.summary())
+			else:
+				self.reply(404, {"error": "unknown path {}".format(self.path)})
 
+		def do_POST(self):
+			start = time.perf_counter()
+			status = 500
+			try:
+				if self.path == "/vot":
+					status = self.measure()
+				else:
+					status = 404
+					self.reply(404, {"error": "unknown path {}".format(self.path)})
+			except Exception as e:
+				logger.error("Request failed: {}: {}".format(type(e).__name__, e))
+				self.reply(500, {"error": "{}: {}".format(type(e).__name__, e)})
+			finally:
+				stats.add(time.perf_counter() - start, status == 200)
+
+		def measure(self):
+			length = int(self.headers.get("Content-Length") or 0)
+			body = self.rfile.read(length)
+			contentType = self.headers.get("Content-Type", "")
+			workDirectory = tempfile.mkdtemp(prefix="VOT-CP_")
+			try:
+				try:
+					if contentType.startswith("multipart/form-data"):
+						fields, files = formFields(contentType, body)
+						if "wav" not in files or "TextGrid" not in files:
+							self.reply(400, {"error": "upload a 'wav' and a 'TextGrid' file"})
+							return 400
+						for name in ("wav", "TextGrid"):
+							# the uploaded name gives the name of the output
+							stem = os.path.splitext(os.path.basename(files[name][0].replace("\\", "/")))[0] or "upload"
+							fields[name] = os.path.join(workDirectory, stem + "." + name)
+							with open(fields[name], "wb") as f:
+								f.write(files[name][1])
+						form = True
+					else:
+						fields = json.loads(body.decode("utf-8") or "{}")
+						if not isinstance(fields, dict) or not fields.get("wav") or not fields.get("TextGrid") or \
+							not all(isinstance(fields.get(name, ""), str) for name in ("wav", "TextGrid", "outputDirectory")):
+							self.reply(400, {"error": "give the paths of a 'wav' and a 'TextGrid' file"})
+							return 400
+						form = False
+					parameters = serviceParameters(defaults, fields, form)
+				except (ValueError, TypeError, OSError) as e:
+					self.reply(400, {"error": "invalid request: {}".format(e)})
+					return 400
+
+				outputDirectory = os.path.abspath(fields.get("outputDirectory") or os.path.join(workDirectory, "output"))
+				result = pool.submit(processPair, os.path.abspath(fields["wav"]), os.path.abspath(fields["TextGrid"]), 
+					parameters["stops"], outputDirectory, parameters["startPadding"], parameters["endPadding"], 
+					parameters["preferredChannel"], parameters["distinctChannels"], parameters["trainedModel"], 
+					parameters["featureCache"], parameters["outputFormat"]).result()
+				if not result.complete:
+					self.reply(422, {"error": result.error})
+					return 422
+				if fields.get("response") == "json":
+					self.reply(200, {"output": result.outputFile if fields.get("outputDirectory") else None, 
+						"predictions": predictionList(result.tokens)})
+				else:
+					with open(result.outputFile, "rb") as f:
+						self.reply(200, f.read(), "application/octet-stream" if parameters["outputFormat"] == "binary" 
+							else "text/plain; charset=utf-8", os.path.basename(result.outputFile))
+				return 200
+			finally:
+				shutil.rmtree(workDirectory, ignore_errors=True)
+
+	if socketPath:
+		class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+			daemon_threads = True
+		if os.path.exists(socketPath):
+			os.remove(socketPath)  # left by a service that was killed
+		server = Server(socketPath, Handler)
+		address = socketPath
+	else:
+		server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+		address = "http://127.0.0.1:{}".format(server.server_address[1])
+
+	print()
+	logger.info("Serving VOT measurements on {} with {} worker(s). Press Ctrl+C to stop.\n".format(address, jobs))
+	def stop(signum, frame):
+		raise KeyboardInterrupt
+	signal.signal(signal.SIGTERM, stop)  # stop cleanly when run as a daemon, too
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		pool.shutdown()
+		if socketPath and os.path.exists(socketPath):
+			os.remove(socketPath)
+		print()
+		logger.info("Service stopped: {}\n".format(json.dumps(stats.summary())))
 
 
 if __name__ == "__main__":
+    import argparse
+
 	# parse arguments
     parser = argparse.ArgumentParser()
     parser.add_argument('--wav', default='', help="An audio file with a '.wav' extension.")
     parser.add_argument('--TextGrid', default='', help="A labeled TextGrid file containing stops to measured VOT.")
     parser.add_argument('--inputDirectory', default='', help="A string-based path where data corpus is located.")
+    parser.add_argument('--mlf', default='', help="An HTK MLF file (eg, the output of a forced aligner) whose utterances "
+        "are processed one at a time, with the wav files named after them in inputDirectory.")
     parser.add_argument('--stops', default='', help="A list of phone labels to look for and process.", nargs="*")
     parser.add_argument('--outputDirectory', default='output', help="A string to be used as the name of the directory "
         "where the output will be sored.")
@@ -502,11 +1457,45 @@ if __name__ == "__main__":
     parser.add_argument('--distinctChannels', default=False, help="a boolean (ie, True or False) that indicates whether "
         "or not there are different speakers in the recording and transcription, each with a distinct channel.", type=bool)
     parser.add_argument('--trainedModel', default='', help="a string-based path that indicates the location of a trained "
-        "model for your corpus.")
+        "model for your corpus, or the name of a model in autovot/models.")
+    parser.add_argument('--jobs', default=1, help="A number (an integer) of pairs to process in parallel during batch "
+        "processing. Use 0 to use all available processors.", type=int)
+    parser.add_argument('--featureCache', default='', help="A string-based path of a directory where acoustic features "
+        "are cached between runs, so that re-running a corpus only runs AutoVOT's front end (VotFrontEnd2) on new "
+        "windows.")
+    parser.add_argument('--force', action='store_true', help="Process again the pairs of a batch that are up to date "
+        "according to the manifest in the output directory.")
+    parser.add_argument('--pairing', default='', help="A regular expression matching the whole name (without extension) "
+        "of the wav and TextGrid files of a batch, whose first group is the part shared by the two files of a pair (eg, "
+        "'(.*)_(audio|transcript)'). By default, the files of a pair have the same name.")
+    parser.add_argument('--serve', action='store_true', help="Run as a service that measures VOTs on request, keeping "
+        "the model loaded: POST /vot with the paths of a wav and a TextGrid file (as JSON) or an upload of them (as a "
+        "multipart form); GET /stats for the latency percentiles. The other arguments are the defaults of the requests, "
+        "and jobs is the number of requests processed at the same time.")
+    parser.add_argument('--port', default=8765, help="The port of the service on localhost.", type=int)
+    parser.add_argument('--socket', default='', help="A Unix socket the service listens on, instead of a port.")
+    parser.add_argument('--outputFormat', default='long', help="The format of the output TextGrids: 'long' (Praat's "
+        "text format), 'short' (Praat's short text format, about three times smaller) or 'binary' (Praat's binary "
+        "format, the smallest and fastest to reload).", choices=["long", "short", "binary"])
 
     args = parser.parse_args()
+    setupLogging()
 
-    if args.wav and args.TextGrid:
+    if args.serve:
+        serveVOT(
+        	args.port, 
+        	args.socket, 
+        	args.jobs, 
+        	args.stops, 
+        	args.startPadding, 
+        	args.endPadding, 
+        	args.preferredChannel, 
+        	args.distinctChannels, 
+        	args.trainedModel, 
+        	args.featureCache, 
+        	args.outputFormat
+        	)
+    elif args.wav and args.TextGrid:
 	    try:
 	    	calculateVOT(
 	        	args.wav, 
@@ -517,10 +1506,26 @@ if __name__ == "__main__":
 	        	args.endPadding, 
 	        	args.preferredChannel, 
 	        	args.distinctChannels, 
-	        	args.trainedModel
+	        	args.trainedModel, 
+	        	args.featureCache, 
+	        	args.outputFormat
 	        	)
 	    except Exception:
 	    	pass
+    elif args.mlf:
+        calculateVOTMlf(
+        	args.mlf, 
+        	args.inputDirectory or ".", 
+        	args.stops, 
+        	args.outputDirectory, 
+        	args.startPadding, 
+        	args.endPadding, 
+        	args.preferredChannel, 
+        	args.distinctChannels, 
+        	args.trainedModel, 
+        	args.featureCache, 
+        	args.outputFormat
+        	)
     elif args.inputDirectory:
         calculateVOTBatch(
         	args.inputDirectory, 
@@ -530,13 +1535,18 @@ if __name__ == "__main__":
         	args.endPadding, 
         	args.preferredChannel, 
         	args.distinctChannels, 
-        	args.trainedModel
+        	args.trainedModel, 
+        	args.jobs, 
+        	args.featureCache, 
+        	args.outputFormat, 
+        	args.force, 
+        	args.pairing
         	)
     else:
     	print()
     	logger.error("The required positional arguments were not provided. Provide a wav and TextGrid files for single-pair "
-    		"processing or an input directory for batch processing.\nIf you need help, type 'calculateVOT.py -h' in your "
-    		"terminal.\n")
+    		"processing, an input directory for batch processing or an MLF file.\nIf you need help, type 'calculateVOT.py -h' "
+    		"in your terminal.\n")
     	sys.exit()
 
 
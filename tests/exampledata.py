@@ -0,0 +1,54 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# exampledata.py: the bundled examples the tests run on, as 16kHz
+# mono WAV files and the stop windows calculateVOT decodes on them.
+#
+
+import os
+
+from autovot.helpers.audio import resample_wav
+
+import calculateVOT
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (WAV file, TextGrid file, stops) of the examples with audio (ARA_NORM__0003.TextGrid has an unnamed tier, which
+# calculateVOT rejects)
+EXAMPLES = [
+    ('Examples/spanish_corpus/ALL_129_F_SPA_SPA_NWS.wav', 'Examples/spanish_corpus/ALL_129_F_SPA_SPA_NWS.TextGrid',
+     ['p', 't', 'k']),
+] + [('Examples/arabic_corpus/ARA_NORM__%04d.wav' % i, 'Examples/arabic_corpus/ARA_NORM__%04d.TextGrid' % i,
+      ['t', 'T', 'tt']) for i in (2, 4, 5, 6)]
+
+
+def example_wav(wav, working_dir):
+    """ the example's recording as a 16kHz, 16 bit, mono WAV file (the input of the AutoVOT programs) """
+    wav16 = os.path.join(working_dir, os.path.basename(wav))
+    resample_wav(os.path.join(ROOT, wav), wav16, 16000, channels=[0])
+    return wav16
+
+
+def example_windows(wav, TextGrid, stops):
+    """ the windows calculateVOT decodes on an example, those of all its speakers in one list """
+    wav, TextGrid = os.path.join(ROOT, wav), os.path.join(ROOT, TextGrid)
+    startPadding, endPadding, stops = calculateVOT.processParameters(0, 0, stops, TextGrid)
+    textgrid, stopTiers, saveName = calculateVOT.addStopTier(TextGrid, startPadding, endPadding, stops)
+    windows = calculateVOT.locateStops(wav, stopTiers, textgrid, saveName, 1, False, "")
+    return [window for tier in windows.tierWindows if tier for window in tier]
@@ -0,0 +1,144 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_audio.py: the block-by-block resampling of whole recordings
+# (resample_wav) against the resampling of spans (read_spans), and the
+# WAV files holding only the audio around the windows (window_audio).
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+
+from autovot.helpers.audio import Resampler, WavReader, read_spans, resample_wav, write_wav
+from autovot.helpers.decoder import window_audio
+from autovot.helpers.frontend import Window, front_end_span
+
+
+def write_test_wav(wav_filename, sample_rate, num_channels, num_frames, seed=0):
+    """ a 16 bit WAV file of tones in noise, different on each channel """
+    random = np.random.RandomState(seed)
+    t = np.arange(num_frames) / float(sample_rate)
+    samples = np.stack([0.3 * np.sin(2 * np.pi * (150 + 100 * channel) * t) + 0.05 * random.randn(num_frames)
+                        for channel in range(num_channels)], axis=1)
+    pcm = np.clip(np.rint(samples * 32768), -32768, 32767).astype('<i2')
+    output = wave.open(wav_filename, 'wb')
+    output.setnchannels(num_channels)
+    output.setsampwidth(2)
+    output.setframerate(sample_rate)
+    output.writeframes(pcm.tobytes())
+    output.close()
+    return pcm
+
+
+class ResampleWavTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def path(self, name):
+        return os.path.join(self.working_dir, name)
+
+    def read_pcm(self, wav_filename):
+        f = wave.open(wav_filename)
+        self.assertEqual((f.getframerate(), f.getsampwidth(), f.getnchannels()), (16000, 2, 1))
+        return np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+
+    def test_same_as_spans(self):
+        write_test_wav(self.path('in.wav'), 44100, 2, 44100 * 3 + 17)
+        num_frames = resample_wav(self.path('in.wav'), self.path('out.wav'), 16000, channels=[1], block_frames=5000)
+        pcm = self.read_pcm(self.path('out.wav'))
+        self.assertEqual(len(pcm), num_frames)
+        self.assertEqual(num_frames, Resampler(44100, 16000).num_outputs(44100 * 3 + 17))
+        spans = read_spans(self.path('in.wav'), [(0, num_frames)], 16000, [1])[0]
+        expected = np.clip(np.rint(spans[0:num_frames] * 32768.0), -32768, 32767)
+        self.assertLessEqual(np.abs(pcm - expected).max(), 1)
+
+    def test_block_size(self):
+        write_test_wav(self.path('in.wav'), 22050, 1, 22050 * 2)
+        resample_wav(self.path('in.wav'), self.path('small.wav'), 16000, block_frames=777)
+        resample_wav(self.path('in.wav'), self.path('large.wav'), 16000, block_frames=1 << 20)
+        np.testing.assert_array_equal(self.read_pcm(self.path('small.wav')), self.read_pcm(self.path('large.wav')))
+
+    def test_identity(self):
+        pcm = write_test_wav(self.path('in.wav'), 16000, 1, 16000 + 5)
+        resample_wav(self.path('in.wav'), self.path('out.wav'), 16000, block_frames=4096)
+        np.testing.assert_array_equal(self.read_pcm(self.path('out.wav')), pcm[:, 0])
+        self.assertTrue(WavReader(self.path('out.wav')).is_int16())
+
+
+class WindowAudioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_same_samples(self):
+        wav_filename = os.path.join(self.working_dir, 'in.wav')
+        pcm = write_test_wav(wav_filename, 16000, 2, 16000 * 10 + 7)[:, 1]
+        # windows close to both ends of the recording, overlapping ones, and distant ones
+        bounds = [(0.01, 0.3), (1.2, 1.9), (1.5, 2.2), (5.0, 5.4), (9.85, 10.0)]
+        windows = [Window('in.wav', window_min, window_max, window_min, window_max) for window_min, window_max in bounds]
+        samples = read_spans(wav_filename, map(front_end_span, windows), 16000, [1])[0]
+        spans, moved = window_audio(windows, len(samples))
+        compact_filename = os.path.join(self.working_dir, 'compact.wav')
+        write_wav(compact_filename, samples, 16000, block_frames=1000, spans=spans)
+        f = wave.open(compact_filename)
+        compact = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+        self.assertEqual(len(compact), sum(last - first for first, last in spans))
+        self.assertLess(len(compact), len(pcm) / 2)
+        for window, window_moved in zip(windows, moved):
+            shift = (window.window_min - window_moved.window_min) * 1000
+            self.assertAlmostEqual(shift, round(shift), places=6)
+            self.assertAlmostEqual(window.window_max - window.window_min, window_moved.window_max -
+                                   window_moved.window_min, places=6)
+            first, last = front_end_span(window)
+            moved_first, _ = front_end_span(window_moved)
+            # the samples before the beginning and after the end of the recording are not in either file
+            clipped = max(-first, 0)
+            first, moved_first, last = first + clipped, moved_first + clipped, min(last, len(pcm))
+            np.testing.assert_array_equal(compact[moved_first:moved_first + last - first], pcm[first:last])
+
+    def test_channel_views(self):
+        # a 16 bit, 16kHz channel is read as strided views of the memory-mapped file, and written from them
+        wav_filename = os.path.join(self.working_dir, 'in.wav')
+        pcm = write_test_wav(wav_filename, 16000, 3, 16000 * 4)
+        windows = [Window('in.wav', 0.5, 0.9, 0.5, 0.9), Window('in.wav', 2.5, 3.1, 2.5, 3.1)]
+        samples = read_spans(wav_filename, map(front_end_span, windows), 16000, [2])[0]
+        for _, span in samples.spans:
+            self.assertFalse(span.flags.owndata)
+            self.assertEqual(span.strides, (3 * 2,))
+        spans, _ = window_audio(windows, len(samples))
+        compact_filename = os.path.join(self.working_dir, 'compact.wav')
+        write_wav(compact_filename, samples, 16000, spans=spans)
+        f = wave.open(compact_filename)
+        compact = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+        np.testing.assert_array_equal(compact, np.concatenate([pcm[first:last, 2] for first, last in spans]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_featurecache.py: the feature cache of VotFrontEnd2 files. Hits,
+# misses and eviction are checked with a stand-in front end; with the
+# AutoVOT programs, a cached run must measure the same VOTs as a run
+# without the cache.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from autovot.helpers.audio import read_spans, write_wav
+from autovot.helpers.binaries import DECODER, FRONT_END, binary_available
+from autovot.helpers.decoder import binary_decode_samples, binary_decode_windows
+from autovot.helpers.featurecache import FeatureCache
+from autovot.helpers.frontend import SAMPLE_RATE, Window, front_end_span
+from autovot.helpers.models import get_model
+
+from exampledata import EXAMPLES, example_wav, example_windows
+
+
+class FeatureCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.cache = FeatureCache(os.path.join(self.working_dir, 'cache'))
+        self.samples = np.random.RandomState(0).randint(-3000, 3000, SAMPLE_RATE * 5).astype(np.int16)
+        self.windows = [Window('in.wav', window_min, window_min + 0.4, window_min, window_min + 0.4)
+                        for window_min in (0.5, 1.5, 3.0)]
+        self.runs = list()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def feature_files(self, samples, windows, run):
+        """ the feature files of a run over windows, written by a stand-in front end that records the windows it is
+        called on """
+        filenames = [os.path.join(self.working_dir, '%s_%d.txt' % (run, i)) for i in range(len(windows))]
+
+        def front_end(indices):
+            self.runs.append(list(indices))
+            for i in indices:
+                with open(filenames[i], 'w') as f:
+                    f.write('1 2\n%s %d\n' % (run, i))
+
+        self.cache.feature_files(samples, windows, filenames, front_end)
+        return [open(filename).read() for filename in filenames]
+
+    def test_hits(self):
+        first = self.feature_files(self.samples, self.windows, 'first')
+        second = self.feature_files(self.samples, self.windows, 'second')
+        self.assertEqual(self.runs, [[0, 1, 2]])
+        self.assertEqual(second, first)
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 3))
+
+    def test_changed_audio(self):
+        self.feature_files(self.samples, self.windows, 'first')
+        samples = self.samples.copy()
+        first, _ = front_end_span(self.windows[1])
+        samples[first] += 1
+        # a sample just outside of the span of a window does not change its features
+        samples[front_end_span(self.windows[2])[0] - 1] += 1
+        second = self.feature_files(samples, self.windows, 'second')
+        self.assertEqual(self.runs, [[0, 1, 2], [1]])
+        self.assertTrue(second[1].startswith('1 2\nsecond'))
+
+    def test_sparse_audio(self):
+        # the same windows read from a sparse recording share the entries of the whole one
+        self.feature_files(self.samples, self.windows, 'first')
+        wav_filename = os.path.join(self.working_dir, 'in.wav')
+        write_wav(wav_filename, self.samples, SAMPLE_RATE)
+        sparse = read_spans(wav_filename, map(front_end_span, self.windows), SAMPLE_RATE, [0])[0]
+        self.feature_files(sparse, self.windows, 'second')
+        self.assertEqual(self.runs, [[0, 1, 2]])
+
+    def test_eviction(self):
+        self.cache.max_size = 100
+        windows = [Window('in.wav', window_min, window_min + 0.1, window_min, window_min + 0.1)
+                   for window_min in np.arange(0.2, 4.5, 0.2)]
+        self.feature_files(self.samples, windows, 'first')
+        sizes = [size for _, size, _ in self.cache.entries()]
+        self.assertLess(len(sizes), len(windows))
+        self.assertLessEqual(sum(sizes), self.cache.max_size)
+
+
+@unittest.skipUnless(binary_available(FRONT_END) and binary_available(DECODER),
+                     "%s or %s cannot run on this platform" % (FRONT_END, DECODER))
+class BinaryFeatureCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_measurements(self):
+        model = get_model()
+        cache = FeatureCache(os.path.join(self.working_dir, 'cache'))
+        wav, textgrid, stops = EXAMPLES[0]
+        wav16 = example_wav(wav, self.working_dir)
+        windows = example_windows(wav, textgrid, stops)
+        _, reference = binary_decode_windows(wav16, windows, model)
+        samples = read_spans(wav16, map(front_end_span, windows), SAMPLE_RATE, [0])[0]
+        for run in range(2):
+            _, predictions = binary_decode_samples(samples, windows, model, cache=cache)
+            self.assertEqual(predictions, reference, "run %d" % run)
+        self.assertEqual((cache.hits, cache.misses), (len(windows), len(windows)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_featurestore.py: the per-recording feature store. Text feature
+# files packed into a store must read back, and be written back for the
+# AutoVOT programs, exactly as VotFrontEnd2 wrote them; with the
+# programs, a store made by auto_vot_extract_features.py must hold the
+# features of its text feature files.
+#
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from autovot.helpers.binaries import FRONT_END, binary_available
+from autovot.helpers.featurestore import (STORE_SUFFIX, index_filename, open_store, parse_entry, read_entry,
+                                          read_feature_files, read_text_features, store_entry, text_feature_list,
+                                          write_store)
+
+from exampledata import EXAMPLES, ROOT, example_wav
+
+
+NUM_FEATURES = 63
+
+
+def write_text_features(feature_filename, features):
+    """ a text feature file as VotFrontEnd2 writes them, with 6 significant digits """
+    np.savetxt(feature_filename, features, fmt='%g', header='%d %d' % features.shape, comments='')
+
+
+class FeatureStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        random = np.random.RandomState(0)
+        self.feature_filenames = list()
+        for i, num_frames in enumerate([120, 1, 300]):
+            self.feature_filenames.append(self.path('%d.txt' % i))
+            write_text_features(self.feature_filenames[-1], random.randn(num_frames, NUM_FEATURES) * 1000)
+        self.store_filename = self.path('recording' + STORE_SUFFIX)
+        write_store(self.store_filename, read_feature_files(self.feature_filenames))
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def path(self, name):
+        return os.path.join(self.working_dir, name)
+
+    def test_text_features(self):
+        features = read_text_features(self.feature_filenames[0])
+        np.testing.assert_array_equal(features, np.loadtxt(self.feature_filenames[0], skiprows=1, ndmin=2))
+        with open(self.path('truncated.txt'), 'w') as f:
+            f.write('2 3\n1 2 3\n4 5\n')
+        with self.assertRaises(ValueError):
+            read_text_features(self.path('truncated.txt'))
+
+    def test_one_matrix(self):
+        features_list = read_feature_files(self.feature_filenames)
+        self.assertEqual([len(features) for features in features_list], [120, 1, 300])
+        for features in features_list[1:]:
+            self.assertTrue(np.shares_memory(features, features_list[0].base))
+
+    def test_entries(self):
+        entry = store_entry(self.store_filename, 2)
+        self.assertEqual(parse_entry(entry), (self.store_filename, 2))
+        self.assertEqual(parse_entry(self.feature_filenames[2]), (self.feature_filenames[2], None))
+        self.assertEqual(parse_entry('C:/features/0.txt'), ('C:/features/0.txt', None))
+        self.assertTrue(os.path.isfile(index_filename(self.store_filename)))
+
+    def test_round_trip(self):
+        store = open_store(self.store_filename)
+        self.assertEqual(len(store), 3)
+        for i, feature_filename in enumerate(self.feature_filenames):
+            reference = np.loadtxt(feature_filename, skiprows=1, ndmin=2)
+            np.testing.assert_array_equal(store[i], reference)
+            np.testing.assert_array_equal(read_entry(store_entry(self.store_filename, i)), reference)
+            self.assertFalse(store[i].flags.owndata)
+
+    def test_text_feature_list(self):
+        features_filename = self.path('windows.feature_filelist')
+        with open(features_filename, 'w') as f:
+            f.write(''.join(filename + '\n' for filename in self.feature_filenames))
+        self.assertEqual(text_feature_list(features_filename, self.working_dir), features_filename)
+
+        # the windows of the store are written back with the values VotFrontEnd2 wrote, the text files are kept
+        entries = [store_entry(self.store_filename, 2), self.feature_filenames[1], store_entry(self.store_filename, 0)]
+        os.makedirs(self.path('stores'))
+        with open(self.path('stores/windows.feature_filelist'), 'w') as f:
+            f.write(''.join(entry + '\n' for entry in entries))
+        export_dir = self.path('export')
+        os.makedirs(export_dir)
+        text_list = text_feature_list(self.path('stores/windows.feature_filelist'), export_dir)
+        text_filenames = [line.strip() for line in open(text_list)]
+        self.assertEqual(text_filenames[1], self.feature_filenames[1])
+        for text_filename, original in zip(text_filenames, [self.feature_filenames[i] for i in (2, 1, 0)]):
+            np.testing.assert_array_equal(read_text_features(text_filename), read_text_features(original))
+
+
+@unittest.skipUnless(binary_available(FRONT_END), "%s cannot run on this platform" % FRONT_END)
+class ExtractFeaturesStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def extract(self, name, *options):
+        wav, textgrid, _ = EXAMPLES[0]
+        run_dir = os.path.join(self.working_dir, name)
+        os.makedirs(os.path.join(run_dir, 'features'))
+        with open(os.path.join(run_dir, 'wav_list'), 'w') as f:
+            f.write(example_wav(wav, run_dir) + '\n')
+        with open(os.path.join(run_dir, 'textgrid_list'), 'w') as f:
+            f.write(os.path.join(ROOT, textgrid) + '\n')
+        features_filename = os.path.join(run_dir, 'windows.feature_filelist')
+        labels_filename = os.path.join(run_dir, 'windows.labels')
+        arguments = [os.path.join(run_dir, 'textgrid_list'), os.path.join(run_dir, 'wav_list'),
+                     os.path.join(run_dir, 'windows.input'), features_filename, labels_filename,
+                     os.path.join(run_dir, 'features')]
+        subprocess.run([sys.executable, os.path.join(ROOT, 'autovot', 'auto_vot_extract_features.py'),
+                        '--logging_level', 'ERROR', '--vot_tier', 'utt - phones', '--vot_mark', 't'] +
+                       list(options) + arguments, cwd=os.path.join(ROOT, 'autovot'), check=True)
+        return ([line.strip() for line in open(features_filename) if line.strip()],
+                open(labels_filename).read())
+
+    def test_same_features(self):
+        text_entries, text_labels = self.extract('text')
+        store_entries, store_labels = self.extract('store', '--feature_store')
+        self.assertEqual(len(store_entries), len(text_entries))
+        self.assertEqual(store_labels, text_labels)
+        for i, (text_entry, entry) in enumerate(zip(text_entries, store_entries)):
+            self.assertEqual(parse_entry(entry)[1], i)
+            np.testing.assert_array_equal(read_entry(entry), read_entry(text_entry))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_mlf.py: HTK MLF input. The utterances of an MLF are read one at a
+# time into phone and word tiers, with times in units of 100 ns; with
+# the AutoVOT programs, calculateVOTMlf must measure the tokens that
+# calculateVOT measures on the TextGrid the MLF was made from.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import calculateVOT
+from autovot.helpers.binaries import DECODER, FRONT_END, binary_available
+from autovot.helpers.results import read_results
+from autovot.helpers.textgrid import TextGrid, mlf, mlf_utterances
+
+from exampledata import EXAMPLES, ROOT
+
+
+MLF = """#!MLF!#
+"*/first.lab"
+0 2500000 sil
+2500000 3100000 t ta
+3100000 4000000 a
+4000000 4500000 sp
+4500000 5230000 k kasa
+5230000 6000000 a
+6000000 7000000 s
+7000000 8000000 a
+.
+"*/second.rec"
+0 1000000 p pa
+1000000 1230000 a
+.
+"""
+
+
+def write_mlf(mlf_filename, utterances):
+    """ an MLF of (name, phone tier, word tier) utterances; phones are labeled 'sil' where the tier is blank """
+    lines = ['#!MLF!#']
+    for name, phone_tier, word_tier in utterances:
+        lines.append('"*/%s.lab"' % name)
+        word_starts = dict(zip(word_tier.xmins().tolist(), word_tier.marks()))
+        for xmin, xmax, mark in zip(phone_tier.xmins().tolist(), phone_tier.xmaxs().tolist(), phone_tier.marks()):
+            line = '%d %d %s' % (round(xmin * 1e7), round(xmax * 1e7), mark.strip() or 'sil')
+            if word_starts.get(xmin, '').strip():
+                line += ' ' + word_starts[xmin].strip()
+            lines.append(line)
+        lines.append('.')
+    with open(mlf_filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+class MlfTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.mlf_filename = os.path.join(self.working_dir, 'aligned.mlf')
+        with open(self.mlf_filename, 'w') as f:
+            f.write(MLF)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_utterances(self):
+        utterances = list(mlf_utterances(self.mlf_filename))
+        self.assertEqual([name for name, _, _ in utterances], ['*/first.lab', '*/second.rec'])
+
+        _, phones, words = utterances[0]
+        np.testing.assert_array_equal(phones.xmins(), np.array([0, 2500000, 3100000, 4000000, 4500000, 5230000,
+                                                                6000000, 7000000]) / 1e7)
+        np.testing.assert_array_equal(phones.xmaxs(), np.array([2500000, 3100000, 4000000, 4500000, 5230000,
+                                                                6000000, 7000000, 8000000]) / 1e7)
+        self.assertEqual(phones.marks(), ['sil', 't', 'a', 'sp', 'k', 'a', 's', 'a'])
+        self.assertEqual((phones.xmin(), phones.xmax()), (0.0, 0.8))
+
+        # a word lasts from its first phone to the phone before the next word
+        self.assertEqual([(interval.xmin(), interval.xmax(), interval.mark()) for interval in words],
+                         [(0.25, 0.45, 'ta'), (0.45, 0.8, 'kasa')])
+
+        _, phones, words = utterances[1]
+        self.assertEqual(phones.xmaxs().tolist(), [0.1, 0.123])
+        self.assertEqual([(interval.xmin(), interval.xmax(), interval.mark()) for interval in words],
+                         [(0.0, 0.123, 'pa')])
+
+    def test_mlf(self):
+        textgrids = mlf(self.mlf_filename)
+        self.assertEqual(len(textgrids), 2)
+        for textgrid in textgrids:
+            self.assertIsInstance(textgrid, TextGrid)
+            self.assertEqual(textgrid.tierNames(), ['phones', 'words'])
+        self.assertEqual([textgrid.xmax() for textgrid in textgrids], [0.8, 0.123])
+
+    def test_round_trip(self):
+        # the tiers of an example, written as an MLF, read back to the 100 ns
+        wav, textgrid_filename, _ = EXAMPLES[0]
+        textgrid = TextGrid()
+        textgrid.read(os.path.join(ROOT, textgrid_filename))
+        write_mlf(self.mlf_filename, [('example', textgrid[1], textgrid[0])])
+        (name, phones, words), = mlf_utterances(self.mlf_filename)
+        self.assertEqual(name, '*/example.lab')
+        self.assertEqual(phones.marks(), [mark.strip() or 'sil' for mark in textgrid[1].marks()])
+        np.testing.assert_allclose(phones.xmins(), textgrid[1].xmins(), atol=5e-8)
+        self.assertEqual(words.marks(), [mark.strip() for mark in textgrid[0].marks() if mark.strip()])
+
+
+@unittest.skipUnless(binary_available(FRONT_END) and binary_available(DECODER),
+                     "%s or %s cannot run on this platform" % (FRONT_END, DECODER))
+class CalculateVOTMlfTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_same_tokens(self):
+        wav, textgrid_filename, stops = EXAMPLES[0]
+        textgrid = TextGrid()
+        textgrid.read(os.path.join(ROOT, textgrid_filename))
+        utterance = os.path.splitext(os.path.basename(wav))[0]
+        mlf_filename = os.path.join(self.working_dir, 'aligned.mlf')
+        write_mlf(mlf_filename, [(utterance, textgrid[1], textgrid[0])])
+
+        output_dir = os.path.join(self.working_dir, 'mlf')
+        results = calculateVOT.calculateVOTMlf(mlf_filename, os.path.dirname(os.path.join(ROOT, wav)), stops,
+                                               output_dir)
+        self.assertEqual([result.complete for result in results], [True])
+        self.assertEqual(results[0].outputFile, os.path.join(output_dir, utterance + '_output.TextGrid'))
+        output = TextGrid()
+        output.read(results[0].outputFile)
+        self.assertEqual(output.tierNames()[:3], ['phones', 'words', 'stops'])
+
+        reference = calculateVOT.processPair(os.path.join(ROOT, wav), os.path.join(ROOT, textgrid_filename), stops,
+                                             os.path.join(self.working_dir, 'textgrid'), 0, 0, 1, False, '', '',
+                                             'long')
+        self.assertTrue(reference.complete, reference.error)
+        tokens = results[0].tokens
+        self.assertTrue(tokens)
+        self.assertEqual([(token.stop, token.word) for token in tokens],
+                         [(token.stop, token.word) for token in reference.tokens])
+        np.testing.assert_allclose([token.burst for token in tokens], [token.burst for token in reference.tokens],
+                                   atol=0.001)
+
+        stored = read_results(os.path.join(output_dir, calculateVOT.RESULTS))
+        self.assertEqual(list(stored['file']), [utterance + '.wav'] * len(tokens))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_parity.py: the AutoVOT programs run on the audio around the
+# windows, as decode_tiers gives it to them, against the programs run
+# on whole recordings, on the bundled examples. They are skipped where
+# the programs cannot run (the ones shipped in autovot/ are macOS
+# builds).
+#
+
+import shutil
+import tempfile
+import unittest
+
+from autovot.helpers.audio import read_spans
+from autovot.helpers.binaries import DECODER, FRONT_END, binary_available
+from autovot.helpers.decoder import binary_decode_windows, decode_tiers, measurements
+from autovot.helpers.frontend import SAMPLE_RATE, front_end_span
+from autovot.helpers.models import get_model
+
+from exampledata import EXAMPLES, example_wav, example_windows
+
+
+@unittest.skipUnless(binary_available(FRONT_END) and binary_available(DECODER),
+                     "%s or %s cannot run on this platform" % (FRONT_END, DECODER))
+class WindowAudioParityTest(unittest.TestCase):
+    """ the AutoVOT programs on a WAV file holding only the audio around the windows (what decode_tiers writes for
+    audio read with read_spans) must measure the same VOTs as on the whole recording """
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_measurements(self):
+        model = get_model()
+        for wav, textgrid, stops in EXAMPLES:
+            with self.subTest(wav=wav):
+                wav16 = example_wav(wav, self.working_dir)
+                windows = example_windows(wav, textgrid, stops)
+                reference = measurements(windows, *binary_decode_windows(wav16, windows, model))
+                samples = read_spans(wav16, [front_end_span(window) for window in windows], SAMPLE_RATE, [0])[0]
+                self.assertEqual(decode_tiers(samples, None, [None], model, windows=[windows])[0], reference)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_pipeline.py: the batch pipeline of calculateVOT stops, instead of
+# waiting forever on its queues, when recording a pair or one of its
+# stages fails, and the failure reaches the caller.
+#
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import calculateVOT
+from autovot.helpers.binaries import DECODER, FRONT_END, binary_available
+
+from exampledata import EXAMPLES, ROOT
+
+
+# more pairs than the queues of the pipeline hold, so that its stages block on them
+NUM_PAIRS = 4 * calculateVOT.PIPELINE_DEPTH + 4
+TIMEOUT = 60
+
+
+class Stop(BaseException):
+    """ a failure that is not the failure of a pair """
+
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        wav, textgrid, stops = EXAMPLES[0]
+        self.tasks = [(i, (os.path.join(ROOT, wav), os.path.join(ROOT, textgrid), stops,
+                           os.path.join(self.working_dir, str(i)), 0, 0, 1, False, '', '', 'long'))
+                      for i in range(NUM_PAIRS)]
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def run_pipeline(self, record):
+        """ the exception pipelinePairs raises, failing the test if it does not return """
+        raised = list()
+
+        def target():
+            try:
+                calculateVOT.pipelinePairs(iter(self.tasks), record, depth=1)
+            except BaseException as e:
+                raised.append(e)
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(TIMEOUT)
+        self.assertFalse(thread.is_alive(), "the pipeline did not stop")
+        return raised[0] if raised else None
+
+    @unittest.skipUnless(binary_available(FRONT_END) and binary_available(DECODER),
+                         "%s or %s cannot run on this platform" % (FRONT_END, DECODER))
+    def test_complete(self):
+        recorded = list()
+        self.assertIsNone(self.run_pipeline(lambda i, result: recorded.append((i, result.complete))))
+        self.assertEqual(recorded, [(i, True) for i in range(NUM_PAIRS)])
+
+    def test_record_fails(self):
+        def record(i, result):
+            raise OSError("disk full")
+        self.assertIsInstance(self.run_pipeline(record), OSError)
+
+    def test_stage_fails(self):
+        recorded = list()
+        with mock.patch.object(calculateVOT, 'readStops', side_effect=Stop):
+            self.assertIsInstance(self.run_pipeline(lambda i, result: recorded.append(i)), Stop)
+        self.assertEqual(recorded, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_results.py: the columnar results store: appends, superseded
+# tokens, empty chunks, appends cut short by a crash, and columns read
+# on demand. A pair that fails in a batch must replace the tokens an
+# earlier run stored for it.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import calculateVOT
+from autovot.helpers.results import COLUMNS, ResultsWriter, Token, column_filename, num_rows, read_results
+
+from exampledata import EXAMPLES, ROOT
+
+
+class ResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.store = os.path.join(self.working_dir, 'VOT-CP_results')
+        with ResultsWriter(self.store) as writer:
+            writer.append('a.wav', 'model', [Token('1', 't', 'ta', 1.0, 0.02, 3.0, False)] * 3)
+            writer.append('b.wav', 'model', [Token('1', 'k', 'ka', 2.0, -0.05, 1.0, True)] * 2)
+            writer.append('a.wav', 'model', [Token('2', 'p', 'pa', 1.5, 0.01, 2.0, False)])
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_superseded(self):
+        results = read_results(self.store)
+        self.assertEqual(list(results), list(COLUMNS))
+        self.assertEqual(list(results['file']), ['b.wav', 'b.wav', 'a.wav'])
+        np.testing.assert_array_equal(results['vot'], [-0.05, -0.05, 0.01])
+        self.assertEqual(list(read_results(self.store, superseded=True)['stop']), ['t'] * 3 + ['k'] * 2 + ['p'])
+
+    def test_empty(self):
+        # a recording without tokens replaces the earlier tokens of its file, and adds no token
+        with ResultsWriter(self.store) as writer:
+            writer.append('b.wav', 'model', [])
+            writer.append('c.wav', 'model', [])
+        results = read_results(self.store)
+        self.assertEqual(list(results['file']), ['a.wav'])
+        self.assertEqual(list(results['model']), ['model'])
+        self.assertEqual(len(read_results(self.store, superseded=True)['vot']), 6)
+        self.assertEqual(num_rows(self.store), 8)
+
+        # and is replaced by the next tokens of the file
+        with ResultsWriter(self.store) as writer:
+            writer.append('b.wav', 'other', [Token('1', 'k', 'ko', 2.5, 0.04, 2.0, False)])
+        results = read_results(self.store)
+        self.assertEqual(list(results['file']), ['a.wav', 'b.wav'])
+        self.assertEqual(list(results['model']), ['model', 'other'])
+
+        only_empty = os.path.join(self.working_dir, 'empty')
+        with ResultsWriter(only_empty) as writer:
+            writer.append('a.wav', None, [])
+        results = read_results(only_empty)
+        self.assertEqual([len(results[column]) for column in COLUMNS], [0] * len(COLUMNS))
+        self.assertEqual(results['vot'].dtype, np.float64)
+
+    def test_failed_pair(self):
+        # a batch whose pair fails (here, for want of a model) replaces the tokens stored for it by an earlier run
+        wav, textgrid, stops = EXAMPLES[0]
+        input_dir = os.path.join(self.working_dir, 'input')
+        os.makedirs(input_dir)
+        for filename in (wav, textgrid):
+            shutil.copy(os.path.join(ROOT, filename), input_dir)
+        output_dir = os.path.join(self.working_dir, 'output')
+        store = os.path.join(output_dir, calculateVOT.RESULTS)
+        with ResultsWriter(store) as writer:
+            writer.append(os.path.basename(wav), 'model', [Token('utt', 't', 'ta', 1.0, 0.02, 3.0, False)])
+        results = calculateVOT.calculateVOTBatch(input_dir, stops, output_dir, trainedModel='missing_model')
+        self.assertEqual([result.complete for result in results], [False])
+        self.assertEqual(len(read_results(store)['vot']), 0)
+        self.assertEqual(list(read_results(store, superseded=True)['word']), ['ta'])
+
+    def test_lazy(self):
+        results = read_results(self.store)
+        os.remove(column_filename(self.store, 'word'))
+        self.assertEqual(list(results['speaker']), ['1', '1', '2'])
+        self.assertRaises(OSError, results.__getitem__, 'word')
+
+    def test_crash(self):
+        # an append that reached only some of the columns is dropped, and overwritten by the next one
+        with open(column_filename(self.store, 'vot'), 'ab') as f:
+            f.truncate(4 * 8)
+        self.assertEqual(len(read_results(self.store, superseded=True)['burst']), 4)
+        with ResultsWriter(self.store) as writer:
+            writer.append('c.wav', 'model', [Token('1', 't', 'te', 3.0, 0.03, 1.0, False)])
+        results = read_results(self.store, superseded=True)
+        self.assertEqual(list(results['file']), ['a.wav'] * 3 + ['b.wav', 'c.wav'])
+        np.testing.assert_array_equal(results['vot'], [0.02] * 3 + [-0.05, 0.03])
+
+
+if __name__ == '__main__':
+    unittest.main()
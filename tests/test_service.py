@@ -0,0 +1,81 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_service.py: the parameters of the requests to the VOT service,
+# from JSON objects and from form fields, and its JSON predictions.
+#
+
+import json
+import unittest
+
+import numpy as np
+
+import calculateVOT
+from autovot.helpers.results import Token
+
+
+DEFAULTS = {"stops": [], "startPadding": 0, "endPadding": 0, "preferredChannel": 1, "distinctChannels": False,
+            "trainedModel": "", "featureCache": "", "outputFormat": "long"}
+
+
+class ServiceParametersTest(unittest.TestCase):
+
+    def test_json(self):
+        parameters = calculateVOT.serviceParameters(DEFAULTS, {"stops": ["p", "t"], "startPadding": 5,
+                                                               "endPadding": -2.5, "preferredChannel": 2,
+                                                               "distinctChannels": True, "featureCache": "cache"}, False)
+        self.assertEqual(parameters, dict(DEFAULTS, stops=["p", "t"], startPadding=5, endPadding=-2.5,
+                                          preferredChannel=2, distinctChannels=True, featureCache="cache"))
+
+    def test_form(self):
+        parameters = calculateVOT.serviceParameters(DEFAULTS, {"stops": "p, t k", "startPadding": "5",
+                                                               "preferredChannel": "2", "distinctChannels": "no",
+                                                               "outputFormat": "short"}, True)
+        self.assertEqual(parameters, dict(DEFAULTS, stops=["p", "t", "k"], startPadding=5.0, preferredChannel=2,
+                                          outputFormat="short"))
+
+    def test_invalid_json(self):
+        for fields in ({"stops": "pt"}, {"stops": ["p", 1]}, {"stops": [""]}, {"startPadding": "5"},
+                       {"startPadding": True}, {"endPadding": None}, {"preferredChannel": 1.5},
+                       {"preferredChannel": 0}, {"distinctChannels": "yes"}, {"trainedModel": 3},
+                       {"featureCache": 1}, {"outputFormat": "xml"}):
+            with self.subTest(fields=fields):
+                with self.assertRaisesRegex(ValueError, "'%s' must be" % list(fields)[0]):
+                    calculateVOT.serviceParameters(DEFAULTS, fields, False)
+
+    def test_invalid_form(self):
+        for fields in ({"startPadding": "five"}, {"endPadding": "nan"}, {"preferredChannel": "1.5"},
+                       {"distinctChannels": "maybe"}, {"outputFormat": "xml"}):
+            with self.subTest(fields=fields):
+                with self.assertRaisesRegex(ValueError, "'%s' must be" % list(fields)[0]):
+                    calculateVOT.serviceParameters(DEFAULTS, fields, True)
+
+
+class PredictionListTest(unittest.TestCase):
+
+    def test_predictions(self):
+        tokens = [Token('1', 't', 'ta', 1.5, 0.02, 3.25, np.bool_(False)),
+                  Token('1', 'k', 'ka', 2.5, -0.05, -1.5, True)]
+        predictions = calculateVOT.predictionList(tokens)
+        self.assertEqual([(p['start'], p['end'], p['confidence'], p['prevoiced']) for p in predictions],
+                         [(1.5, 1.52, 3.25, False), (2.45, 2.5, -1.5, True)])
+        json.dumps(predictions)
+
+
+if __name__ == '__main__':
+    unittest.main()
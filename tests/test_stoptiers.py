@@ -0,0 +1,183 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_stoptiers.py: the stop tiers of calculateVOT, selected and padded
+# with array operations, against a reference copy of the former
+# interval-by-interval implementation (processStopTier), on the example
+# TextGrids and on random stops, across paddings.
+#
+
+import os
+import unittest
+
+import numpy as np
+
+import calculateVOT
+from autovot.helpers.textgrid import TextGrid
+
+from exampledata import ROOT
+
+
+# (TextGrid, stops) of the examples; ARA_NORM__0001_transcript.TextGrid has no word-initial stops, and
+# ARA_NORM__0003.TextGrid has an unnamed tier, which calculateVOT rejects
+TEXTGRIDS = [
+    ('Examples/spanish_corpus/ALL_129_F_SPA_SPA_NWS.TextGrid', ['p', 't', 'k']),
+    ('Examples/english_corpus/DP_EN_03_EN_05_EN_EN_03_DP_EN_03_EN_05_EN_EN_05.TextGrid', ['t', 'T', 'tt']),
+    ('Examples/cantonese_corpus/VM34A_Cantonese_I1_20191028.TextGrid', []),
+    ('Examples/arabic_corpus/ARA_NORM__0001_transcript.TextGrid', []),
+] + [('Examples/arabic_corpus/ARA_NORM__%04d.TextGrid' % i, ['t', 'T', 'tt']) for i in (2, 4, 5, 6)]
+
+# (startPadding, endPadding) in msec
+PADDINGS = [(0, 0), (25, 25), (-25, -25), (20, -20), (-20, 20), (10, 0), (0, -15), (-5, 25)]
+
+# the former implementation dropped intervals shorter than this when it wrote the TextGrid
+MIN_INTERVAL_LENGTH = 1e-08
+
+
+def reference_selection(phones, word_starts, stops):
+    """ the stops the former implementation selected: phones are (xmin, xmax, mark) tuples of the labeled intervals
+    of a phone tier, and word_starts the starts of the labeled words, both matched on 10 µs ticks """
+    ticks = [int(start * 100000) for start in word_starts]
+    return [[xmin, xmax, mark] for xmin, xmax, mark in phones
+            if (mark.lower() in stops or mark in stops) and int(xmin * 100000) in ticks]
+
+
+def reference_conflicts(entries, start_padding, end_padding):
+    """ the former length and proximity rules, applied in place to the stops of a speaker, in order. Raises
+    RuntimeError on an overlap """
+    entries = [[start + start_padding, stop + end_padding, mark] for start, stop, mark in entries]
+    for i in range(len(entries) - 1):
+        current, following = entries[i], entries[i + 1]
+        if current[1] > following[0]:
+            raise RuntimeError("overlap")
+        elif current[1] - current[0] < 0.025:
+            current[1] = current[0] + 0.025
+            if following[0] - current[1] <= 0.020:
+                following[0] = current[1] + 0.021
+        elif following[0] - current[1] <= 0.020:
+            following[0] = current[1] + 0.021
+    return entries
+
+
+def reference_stop_tiers(textgrid_filename, stops, start_padding, end_padding):
+    """ the labeled intervals of the stop tier of each speaker, as the former implementation wrote them """
+    textgrid = TextGrid()
+    textgrid.read(textgrid_filename)
+    tiers = {tier.name().lower(): tier for tier in textgrid}
+    result = dict()
+    for name, phone_tier in tiers.items():
+        if 'phone' not in name:
+            continue
+        word_tier = tiers[name.replace('phone', 'word')]
+        phones = [(xmin, xmax, mark.strip()) for xmin, xmax, mark in
+                  zip(phone_tier.xmins(), phone_tier.xmaxs(), phone_tier.marks()) if mark.strip()]
+        word_starts = [xmin for xmin, mark in zip(word_tier.xmins(), word_tier.marks()) if mark.strip()]
+        selected = reference_selection(phones, word_starts, stops)
+        if selected:
+            speaker = name.split('phone')
+            if speaker[1].lower().startswith('s'):
+                speaker[1] = speaker[1][1:]
+            entries = reference_conflicts(selected, start_padding, end_padding)
+            result[speaker[0] + 'stops' + speaker[1]] = [entry for entry in entries
+                                                         if entry[1] - entry[0] >= MIN_INTERVAL_LENGTH]
+    if not result:
+        raise RuntimeError("no stops")
+    return result
+
+
+def stop_tiers(textgrid_filename, stops, start_padding, end_padding):
+    """ the labeled intervals of the stop tier of each speaker, as addStopTier adds them """
+    textgrid, stop_tiers, _ = calculateVOT.addStopTier(textgrid_filename, start_padding, end_padding, stops)
+    tiers = {tier.name(): tier for tier in textgrid}
+    return {name: [[xmin, xmax, mark] for xmin, xmax, mark in
+                   zip(tiers[name].xmins(), tiers[name].xmaxs(), tiers[name].marks()) if mark]
+            for name in stop_tiers}
+
+
+class StopTiersTest(unittest.TestCase):
+
+    def assertSameTiers(self, tiers, reference):
+        self.assertEqual(sorted(tiers), sorted(reference))
+        for name in reference:
+            self.assertEqual([mark for _, _, mark in tiers[name]], [mark for _, _, mark in reference[name]], name)
+            np.testing.assert_allclose([bounds[:2] for bounds in tiers[name]],
+                                       [bounds[:2] for bounds in reference[name]], atol=1e-9, err_msg=name)
+
+    def assertSameStopTiers(self, textgrid_filename, stops, paddings):
+        start_padding, end_padding, stops = calculateVOT.processParameters(paddings[0], paddings[1], list(stops),
+                                                                           textgrid_filename)
+        try:
+            reference = reference_stop_tiers(textgrid_filename, stops, start_padding, end_padding)
+        except RuntimeError:
+            with self.assertRaises(RuntimeError):
+                stop_tiers(textgrid_filename, stops, start_padding, end_padding)
+            return
+        self.assertSameTiers(stop_tiers(textgrid_filename, stops, start_padding, end_padding), reference)
+
+    def test_selection(self):
+        for textgrid, stops in TEXTGRIDS:
+            with self.subTest(textgrid=textgrid):
+                self.assertSameStopTiers(os.path.join(ROOT, textgrid), stops, (0, 0))
+
+    def test_paddings(self):
+        for textgrid, stops in TEXTGRIDS:
+            for paddings in PADDINGS:
+                with self.subTest(textgrid=textgrid, paddings=paddings):
+                    self.assertSameStopTiers(os.path.join(ROOT, textgrid), stops, paddings)
+
+    def test_no_duration_left(self):
+        # the last stop of the second speaker (at 270.035 sec) is 40 msec long: it has no duration left
+        textgrid_filename = os.path.join(ROOT, TEXTGRIDS[1][0])
+        start_padding, end_padding, stops = calculateVOT.processParameters(20, -20, ['t', 'T', 'tt'],
+                                                                           textgrid_filename)
+        tiers = stop_tiers(textgrid_filename, stops, start_padding, end_padding)
+        self.assertLess(tiers['2-stops'][-1][1], 270)
+        self.assertSameTiers(tiers, reference_stop_tiers(textgrid_filename, stops, start_padding, end_padding))
+
+    def test_word_initial_stops(self):
+        rng = np.random.default_rng(0)
+        word_starts = np.round(np.sort(rng.uniform(0, 100, 200)), 5)
+        phone_starts = np.concatenate((word_starts[::2], word_starts[1::2] + 0.00002, rng.uniform(0, 100, 100)))
+        reference = np.isin((phone_starts * 100000).astype(int), (word_starts * 100000).astype(int))
+        np.testing.assert_array_equal(calculateVOT.wordInitialStops(phone_starts, word_starts), reference)
+
+    def test_resolve_conflicts(self):
+        rng = np.random.default_rng(0)
+        for start_padding, end_padding in PADDINGS:
+            with self.subTest(paddings=(start_padding, end_padding)):
+                # stops of 10 to 80 msec, 5 to 60 msec apart, so that chains of conflicts are common
+                lengths = rng.uniform(0.010, 0.080, 300)
+                gaps = rng.uniform(0.005, 0.060, 300)
+                starts = np.cumsum(gaps + np.concatenate(([0], lengths[:-1])))
+                entries = [[start, start + length, 't'] for start, length in zip(starts, lengths)]
+                padded_starts = starts + start_padding / 1000.0
+                padded_ends = starts + lengths + end_padding / 1000.0
+                try:
+                    reference = reference_conflicts(entries, start_padding / 1000.0, end_padding / 1000.0)
+                except RuntimeError:
+                    overlap = padded_ends[:-1] > padded_starts[1:]
+                    self.assertTrue(overlap.any())
+                    continue
+                new_starts, new_ends, _, _ = calculateVOT.resolveConflicts(padded_starts, padded_ends,
+                                                                          np.ones(len(starts) - 1, dtype=bool))
+                np.testing.assert_allclose(new_starts, [start for start, _, _ in reference], atol=1e-9)
+                np.testing.assert_allclose(new_ends, [end for _, end, _ in reference], atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
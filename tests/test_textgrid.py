@@ -0,0 +1,336 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_textgrid.py: the TextGrid reader and its tiers. TextGrid files
+# written by Praat (through parselmouth) must read as Praat reads them:
+# the tiers of the long text format are located by their headers and
+# parsed when first used, down to the unnamed tier of ARA_NORM__0003.
+# TextGrids written in each format must read back, by this reader and
+# by Praat, with their times (to the microsecond in the text formats,
+# which write them with %f) and labels.
+# The tiers keep their times in arrays and their marks as codes into
+# the distinct labels of the tier.
+#
+
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+from autovot.helpers.textgrid import (Interval, IntervalTier, LazyTier, Point, PointTier, TextGrid, long_form_tiers,
+                                      read_tiers)
+
+from exampledata import ROOT
+
+
+TEXTGRIDS = sorted(glob.glob(os.path.join(ROOT, 'Examples', '*', '*.TextGrid')))
+
+# labels that look like the headers of the long form or hold quotes
+LABELS = ['item [2]:', 'say "a"', 'class = "IntervalTier"', '']
+
+_praat_contents = dict()
+
+
+def praat_contents(textgrid_filename):
+    """ xmin, xmax and the (class, name, times, marks) of each tier of a TextGrid file, as Praat reads it """
+    if textgrid_filename not in _praat_contents:
+        textgrid = parselmouth.read(textgrid_filename)
+        tiers = list()
+        for i in range(1, call(textgrid, "Get number of tiers") + 1):
+            if call(textgrid, "Is interval tier", i):
+                size = call(textgrid, "Get number of intervals", i)
+                times = [(call(textgrid, "Get start time of interval", i, j),
+                          call(textgrid, "Get end time of interval", i, j)) for j in range(1, size + 1)]
+                marks = [call(textgrid, "Get label of interval", i, j) for j in range(1, size + 1)]
+                tiers.append(('IntervalTier', call(textgrid, "Get tier name", i), times, marks))
+            else:
+                size = call(textgrid, "Get number of points", i)
+                times = [(call(textgrid, "Get time of point", i, j),) for j in range(1, size + 1)]
+                marks = [call(textgrid, "Get label of point", i, j) for j in range(1, size + 1)]
+                tiers.append(('PointTier', call(textgrid, "Get tier name", i), times, marks))
+        _praat_contents[textgrid_filename] = (textgrid.xmin, textgrid.xmax, tiers)
+    return _praat_contents[textgrid_filename]
+
+
+def contents(textgrid):
+    """ xmin, xmax and the (class, name, times, marks) of each tier of a TextGrid """
+    tiers = list()
+    for tier in textgrid:
+        if isinstance(tier, IntervalTier):
+            times = list(zip(tier.xmins().tolist(), tier.xmaxs().tolist()))
+        else:
+            times = [(time,) for time in tier.times().tolist()]
+        tiers.append((tier.__class__.__name__, tier.name(), times, tier.marks()))
+    return textgrid.xmin(), textgrid.xmax(), tiers
+
+
+def read(textgrid_filename):
+    textgrid = TextGrid()
+    textgrid.read(textgrid_filename)
+    return textgrid
+
+
+class TextGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def path(self, name):
+        return os.path.join(self.working_dir, name)
+
+    def praat_file(self, textgrid, name, command="Save as text file"):
+        """ a TextGrid file written by Praat from a TextGrid file or a parselmouth TextGrid """
+        if isinstance(textgrid, str):
+            textgrid = parselmouth.read(textgrid)
+        call(textgrid, command, self.path(name))
+        return self.path(name)
+
+    def test_praat_files(self):
+        for textgrid_filename in TEXTGRIDS:
+            with self.subTest(textgrid=os.path.basename(textgrid_filename)):
+                reference = praat_contents(textgrid_filename)
+                self.assertEqual(contents(read(textgrid_filename)), reference)
+                praat_filename = self.praat_file(textgrid_filename, 'long.TextGrid')
+                self.assertEqual(contents(read(praat_filename)), reference)
+
+    def test_lazy_tiers(self):
+        textgrid_filename = os.path.join(ROOT, 'Examples', 'cantonese_corpus', 'VM34A_Cantonese_I1_20191028.TextGrid')
+        xmin, xmax, tiers = read_tiers(self.praat_file(textgrid_filename, 'long.TextGrid'))
+        reference = praat_contents(textgrid_filename)
+        self.assertEqual((xmin, xmax), reference[:2])
+        for tier, (tier_class, name, times, marks) in zip(tiers, reference[2]):
+            self.assertIsInstance(tier, LazyTier)
+            self.assertEqual((tier.name(), len(tier), tier.xmin(), tier.xmax()), (name, len(marks), xmin, xmax))
+            parsed = tier.parse()
+            self.assertEqual((parsed.__class__.__name__, parsed.name(), parsed.xmin(), parsed.xmax()),
+                             (tier_class, name, xmin, xmax))
+            self.assertEqual((list(zip(parsed.xmins().tolist(), parsed.xmaxs().tolist())), parsed.marks()),
+                             (times, marks))
+
+        # a tier is parsed when first used; renaming a tier does not parse it
+        textgrid = read(textgrid_filename)
+        textgrid.renameTier(3, 'phones')
+        self.assertEqual(textgrid.tierNames(), ['task', 'utterance', 'word', 'phones'])
+        self.assertEqual(textgrid[3].name(), 'phones')
+        self.assertEqual(textgrid[3].marks(), reference[2][3][3])
+
+    def test_unnamed_tier(self):
+        textgrid_filename = os.path.join(ROOT, 'Examples', 'arabic_corpus', 'ARA_NORM__0003.TextGrid')
+        reference = praat_contents(textgrid_filename)
+        self.assertEqual(reference[2][2][1], '')
+        for filename in (textgrid_filename, self.praat_file(textgrid_filename, 'long.TextGrid')):
+            textgrid = read(filename)
+            self.assertEqual(textgrid.tierNames(), ['phones', 'words', ''])
+            self.assertEqual(contents(textgrid), reference)
+
+    def labels_textgrid(self):
+        """ a parselmouth TextGrid with an interval tier and a point tier labeled with LABELS """
+        textgrid = call("Create TextGrid", 0.0, 2.0, "labels points", "points")
+        for i, label in enumerate(LABELS[:-1]):
+            call(textgrid, "Insert boundary", 1, 0.5 * (i + 1))
+            call(textgrid, "Set interval text", 1, i + 1, label)
+            call(textgrid, "Insert point", 2, 0.5 * i + 0.25, label)
+        return textgrid
+
+    def test_headers_in_labels(self):
+        # labels that look like tier headers or hold quotes: the tiers cannot be located by their headers, the file is
+        # read token by token
+        praat_filename = self.praat_file(self.labels_textgrid(), 'labels.TextGrid')
+        with open(praat_filename, 'rb') as f:
+            text = f.read()
+        self.assertIsNone(long_form_tiers(text, text.index(b'xmin') - 1, praat_filename))
+        self.assertEqual(contents(read(praat_filename)), praat_contents(praat_filename))
+        self.assertEqual(read(praat_filename)[0].marks(), LABELS)
+
+    def test_utf16(self):
+        # Praat writes TextGrids with non-ASCII labels in UTF-16 when its preferences ask for it
+        textgrid_filename = os.path.join(ROOT, 'Examples', 'arabic_corpus', 'ARA_NORM__0002.TextGrid')
+        praat_filename = self.praat_file(textgrid_filename, 'long.TextGrid')
+        with open(praat_filename, encoding='utf-8') as f:
+            text = f.read()
+        with open(self.path('utf16.TextGrid'), 'w', encoding='utf-16') as f:
+            f.write(text)
+        self.assertEqual(contents(read(self.path('utf16.TextGrid'))), praat_contents(textgrid_filename))
+        self.assertEqual(contents(read(self.path('utf16.TextGrid'))), praat_contents(self.path('utf16.TextGrid')))
+
+    def assertSameContents(self, textgrid_contents, reference, exact=True):
+        """ exact, or with times to the microsecond """
+        if exact:
+            self.assertEqual(textgrid_contents, reference)
+            return
+        self.assertEqual(len(textgrid_contents[2]), len(reference[2]))
+        np.testing.assert_allclose(textgrid_contents[:2], reference[:2], atol=5e-7)
+        for (tier_class, name, times, marks), reference_tier in zip(textgrid_contents[2], reference[2]):
+            self.assertEqual((tier_class, name, marks), (reference_tier[0], reference_tier[1], reference_tier[3]))
+            np.testing.assert_allclose(np.reshape(times, (len(marks), -1)),
+                                       np.reshape(reference_tier[2], (len(marks), -1)), atol=5e-7, err_msg=name)
+
+    def test_praat_forms(self):
+        # the short text and the binary formats, as Praat writes them
+        for textgrid_filename in TEXTGRIDS:
+            for command in ("Save as short text file", "Save as binary file"):
+                with self.subTest(textgrid=os.path.basename(textgrid_filename), command=command):
+                    praat_filename = self.praat_file(textgrid_filename, 'praat.TextGrid', command)
+                    self.assertEqual(contents(read(praat_filename)), praat_contents(textgrid_filename))
+
+    def test_round_trips(self):
+        # written in each format, read back by this reader and by Praat; the binary format keeps the times exactly
+        textgrids = [read(textgrid_filename) for textgrid_filename in TEXTGRIDS]
+        textgrids.append(read(self.praat_file(self.labels_textgrid(), 'labels.TextGrid')))
+        for textgrid in textgrids:
+            reference = contents(textgrid)
+            for form in ('long', 'short', 'binary'):
+                with self.subTest(tiers=textgrid.tierNames(), form=form):
+                    filename = self.path('%s.TextGrid' % form)
+                    textgrid.write(filename, form)
+                    self.assertSameContents(contents(read(filename)), reference, form == 'binary')
+                    self.assertSameContents(praat_contents(filename), reference, form == 'binary')
+                    del _praat_contents[filename]
+
+    def test_binary_strings(self):
+        # ASCII labels are written in one byte per character, the others in UTF-16
+        textgrid = TextGrid()
+        tier = IntervalTier('ar \u0639', 0.0, 1.0)
+        tier.extend_columns([0.0, 0.5], [0.5, 1.0], ['t', '\u0637\u0627'])
+        textgrid.append(tier)
+        textgrid.write(self.path('binary.TextGrid'), 'binary')
+        with open(self.path('binary.TextGrid'), 'rb') as f:
+            data = f.read()
+        self.assertIn(b'\x00\x01t', data)
+        self.assertIn(b'\xff\xff\x00\x02' + '\u0637\u0627'.encode('utf-16-be'), data)
+        self.assertEqual(contents(read(self.path('binary.TextGrid'))), contents(textgrid))
+        self.assertEqual(praat_contents(self.path('binary.TextGrid')), contents(textgrid))
+
+        with open(self.path('truncated.TextGrid'), 'wb') as f:
+            f.write(data[:-3])
+        with self.assertRaises(ValueError):
+            read(self.path('truncated.TextGrid'))
+
+    def test_not_a_textgrid(self):
+        for name, text in [('empty', ''), ('other', 'File type = "ooTextFile"\nObject class = "Sound"\n'),
+                           ('truncated', 'File type = "ooTextFile"\nObject class = "TextGrid"\n\n0\n1\n<exists>\n1\n'
+                                         '"IntervalTier"\n"a"\n0\n1\n2\n0\n0.5\n"x"\n')]:
+            with self.subTest(name=name):
+                with open(self.path(name), 'w') as f:
+                    f.write(text)
+                with self.assertRaises(ValueError):
+                    read(self.path(name))
+
+
+class TierTest(unittest.TestCase):
+
+    def intervals(self, tier):
+        return [(interval.xmin(), interval.xmax(), interval.mark()) for interval in tier]
+
+    def test_append(self):
+        # more intervals than the initial capacity, appended one at a time and as columns
+        tier = IntervalTier('phones', 0.0, 0.0)
+        reference = [(0.1 * i, 0.1 * i + 0.05, 'abc'[i % 3]) for i in range(40)]
+        for xmin, xmax, mark in reference[:25]:
+            tier.append(Interval(xmin, xmax, mark))
+        tier.extend_columns(*zip(*reference[25:]))
+        self.assertEqual(len(tier), 40)
+        self.assertEqual(self.intervals(tier), reference)
+        self.assertEqual(tier.xmax(), reference[-1][1])
+        self.assertEqual((tier[-1].xmin(), tier[-1].mark()), reference[-1][:1] + reference[-1][2:])
+        self.assertEqual([interval.mark() for interval in tier[2:9:3]], ['c', 'c', 'c'])
+        with self.assertRaises(IndexError):
+            tier[40]
+
+        # the columns are read-only views
+        with self.assertRaises(ValueError):
+            tier.xmins()[0] = 1.0
+        with self.assertRaises(ValueError):
+            tier.codes()[0] = 1
+        tier.remove(Interval(*reference[1]))
+        self.assertEqual(self.intervals(tier), reference[:1] + reference[2:])
+        with self.assertRaises(ValueError):
+            tier.remove(Interval(0.0, 1.0, 'a'))
+
+    def test_points(self):
+        tier = PointTier('points', 0.0, 2.0)
+        tier.append(Point(0.5, 'x'))
+        tier.extend([Point(1.0, 'y'), Point(1.5, 'x')])
+        self.assertEqual([(point.time(), point.mark()) for point in tier], [(0.5, 'x'), (1.0, 'y'), (1.5, 'x')])
+        self.assertEqual(tier.times().tolist(), [0.5, 1.0, 1.5])
+        self.assertEqual(tier.select('x', xmin=1.0).tolist(), [2])
+        self.assertEqual(tier.labels(), ['x', 'y'])
+
+    def test_labels(self):
+        # each distinct mark is kept once, with codes in the order of first appearance
+        tier = IntervalTier('words', 0.0, 1.0)
+        marks = ['the', '', 'cat', 'the', '', 'The']
+        tier.extend_columns(np.arange(6) / 6.0, np.arange(1, 7) / 6.0, marks)
+        self.assertEqual(tier.labels(), ['the', '', 'cat', 'The'])
+        self.assertEqual(tier.codes().tolist(), [0, 1, 2, 0, 1, 3])
+        self.assertEqual(tier.marks(), marks)
+        self.assertEqual((tier.code('cat'), tier.code('dog')), (2, -1))
+        self.assertIs(tier[0].mark(), tier[3].mark())
+        # a copy of the labels is returned
+        tier.labels().append('dog')
+        self.assertEqual(tier.code('dog'), -1)
+
+    def test_select(self):
+        tier = IntervalTier('phones', 0.0, 1.0)
+        marks = ['t', 'a', '', 'T', 'tt', 'a']
+        tier.extend_columns(np.arange(6) / 6.0, np.arange(1, 7) / 6.0, marks)
+        self.assertEqual(tier.select().tolist(), list(range(6)))
+        self.assertEqual(tier.select('a').tolist(), [1, 5])
+        self.assertEqual(tier.select(['t', 'tt', 'k']).tolist(), [0, 4])
+        self.assertEqual(tier.select('k').tolist(), [])
+        self.assertEqual(tier.select(lambda label: label.lower().startswith('t')).tolist(), [0, 3, 4])
+        self.assertEqual(tier.select(lambda label: label != '', xmin=0.1, xmax=5 / 6.0).tolist(), [1, 3, 4])
+        self.assertEqual(tier.select(xmin=0.5).tolist(), [3, 4, 5])
+
+    def test_fill_gaps(self):
+        # appending moves the end of the tier to the end of the last interval
+        tier = IntervalTier('stops', 0.0, 3.0)
+        tier.extend_columns([0.5, 1.0, 2.0], [1.0, 1.5, 2.5], ['p', 't', 'p'])
+        tier.fill_gaps()
+        self.assertEqual(self.intervals(tier), [(0.0, 0.5, ''), (0.5, 1.0, 'p'), (1.0, 1.5, 't'), (1.5, 2.0, ''),
+                                                (2.0, 2.5, 'p')])
+        self.assertEqual(tier.labels(), ['p', 't', ''])
+        tier.fill_gaps(xmax=3.0)
+        self.assertEqual(self.intervals(tier)[-1], (2.5, 3.0, ''))
+        self.assertEqual(tier.xmax(), 3.0)
+        # nothing left to fill
+        tier.fill_gaps()
+        self.assertEqual(len(tier), 6)
+
+        # beyond the limits of the tier, with another mark
+        tier = IntervalTier('stops', 1.0, 2.0)
+        tier.extend_columns([1.0], [2.0], ['k'])
+        tier.fill_gaps(0.0, 3.0, mark='sil')
+        self.assertEqual(self.intervals(tier), [(0.0, 1.0, 'sil'), (1.0, 2.0, 'k'), (2.0, 3.0, 'sil')])
+        self.assertEqual((tier.xmin(), tier.xmax()), (0.0, 3.0))
+
+        tier = IntervalTier('empty', 0.0, 3.0)
+        tier.fill_gaps()
+        self.assertEqual(self.intervals(tier), [(0.0, 3.0, '')])
+
+
+if __name__ == '__main__':
+    unittest.main()
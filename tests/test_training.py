@@ -0,0 +1,115 @@
+#
+# This file is part of Autovot, a package for automatic extraction of
+# voice onset time (VOT) from audio files.
+#
+# Autovot is free software: you can redistribute it and/or modify it
+# under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# Autovot is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with Autovot.  If not, see
+# <http://www.gnu.org/licenses/>.
+#
+# test_training.py: auto_vot_train.py end to end. A model is trained on
+# the bundled examples, labeled with the predictions of the released
+# model, and must then decode them close to those labels.
+#
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from autovot.helpers.binaries import DECODER, FRONT_END, TRAINER, binary_available
+from autovot.helpers.decoder import binary_decode_windows
+from autovot.helpers.models import get_model
+from autovot.helpers.textgrid import Interval, IntervalTier, TextGrid
+
+from exampledata import EXAMPLES, ROOT, example_wav, example_windows
+
+
+MIN_VOT_LENGTH = 15
+# median distance (in msec) allowed between the VOTs of the trained model and the labels it was trained on
+MAX_MEDIAN_ERROR = 20
+
+
+def write_vot_textgrid(textgrid_filename, duration, vots):
+    """ a TextGrid with a 'vot' tier marking the (xmin, xmax) intervals of vots, in seconds """
+    tier = IntervalTier('vot', 0.0, duration)
+    end = 0.0
+    for xmin, xmax in sorted(vots):
+        if xmin < end:
+            continue
+        if xmin > end:
+            tier.append(Interval(end, xmin, ''))
+        tier.append(Interval(xmin, xmax, 'vot'))
+        end = xmax
+    tier.append(Interval(end, duration, ''))
+    textgrid = TextGrid()
+    textgrid.append(tier)
+    textgrid.write(textgrid_filename)
+
+
+@unittest.skipUnless(all(binary_available(name) for name in (FRONT_END, TRAINER, DECODER)),
+                     "%s, %s or %s cannot run on this platform" % (FRONT_END, TRAINER, DECODER))
+class TrainingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_train_and_decode(self):
+        released = get_model()
+        examples = list()
+        for wav, textgrid, stops in EXAMPLES:
+            wav16 = example_wav(wav, self.working_dir)
+            windows = example_windows(wav, textgrid, stops)
+            _, predictions = binary_decode_windows(wav16, windows, released, MIN_VOT_LENGTH)
+            labels = [(window.window_min + prediction.xmin / 1000.0, window.window_min + prediction.xmax / 1000.0)
+                      for window, prediction in zip(windows, predictions)]
+            textgrid16 = os.path.splitext(wav16)[0] + '.TextGrid'
+            duration = max(window.window_max for window in windows) + 1.0
+            write_vot_textgrid(textgrid16, duration, labels)
+            examples.append((wav16, textgrid16, windows, predictions))
+
+        wav_list = os.path.join(self.working_dir, 'wav_list')
+        textgrid_list = os.path.join(self.working_dir, 'textgrid_list')
+        with open(wav_list, 'w') as f:
+            f.write(''.join(wav16 + '\n' for wav16, _, _, _ in examples))
+        with open(textgrid_list, 'w') as f:
+            f.write(''.join(textgrid16 + '\n' for _, textgrid16, _, _ in examples))
+        model_filename = os.path.join(self.working_dir, 'trained.classifier')
+        subprocess.run([sys.executable, os.path.join(ROOT, 'autovot', 'auto_vot_train.py'), '--logging_level',
+                        'ERROR', wav_list, textgrid_list, model_filename], cwd=os.path.join(ROOT, 'autovot'),
+                       check=True)
+        self.assertTrue(os.path.isfile(model_filename + '.pos'))
+
+        trained = get_model(model_filename)
+        errors = list()
+        lengths = list()
+        for wav16, _, windows, labels in examples:
+            features_list, predictions = binary_decode_windows(wav16, windows, trained, MIN_VOT_LENGTH)
+            self.assertEqual(len(predictions), len(windows))
+            for window, features, prediction, label in zip(windows, features_list, predictions, labels):
+                self.assertTrue(0 <= prediction.xmin < prediction.xmax <= len(features),
+                                "window %.3f-%.3f" % (window.window_min, window.window_max))
+                errors.append(abs(prediction.xmax - label.xmax))
+                lengths.append(prediction.xmax - prediction.xmin)
+        self.assertGreater(len(set(lengths)), 1, "all the VOTs have the same length")
+        self.assertLessEqual(np.median(errors), MAX_MEDIAN_ERROR)
+
+
+if __name__ == '__main__':
+    unittest.main()